@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the text analyzers - no network.
+
+Runs every analyzer over the same deterministic corpus of synthetic pages
+(2 KB to 1 MB, filler text seeded with the phrases the analyzers look for)
+and reports pages/s, p50/p99 per-page time and peak traced memory. With a
+baseline it exits non-zero when an analyzer's throughput drops by more than
+--threshold, so a keyword-list or regex change that makes a crawl slower
+shows up before the crawl does.
+
+Usage:
+    python bench_analyzers.py --save bench_baseline.json      # record a baseline
+    python bench_analyzers.py --baseline bench_baseline.json  # compare (exit 1 on regression)
+    python bench_analyzers.py --only fixed_strict aba_search --repeat 5
+
+Baselines are per machine; record one before the change on the same box.
+The suite also times every windowed rule of the rule packs on its
+adversarial input (crawlkit.windowed.check_rules).
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import rescore   # sets up the archive import paths and the analyzer loaders
+from crawlkit.rules import RuleEngine
+from crawlkit.windowed import WindowRule, check_rules
+
+SEED = 1729
+# (page size in chars, number of pages)
+SIZES = [(2_000, 200), (20_000, 60), (200_000, 8), (1_000_000, 2)]
+FILLER = ('the our we you and to of for in with families children services program team '
+          'contact about schedule office hours appointment location care support community '
+          'provide learn more welcome today staff experience insurance call').split()
+PHRASES = [
+    'equine assisted therapy', 'animal assisted therapy for children', 'therapy dog visits',
+    'hippotherapy with licensed therapists', 'pet therapy program', 'autism spectrum disorder',
+    'applied behavior analysis', 'BCBA supervised', 'board certified behavior analyst',
+    'speech therapy for kids', 'pediatric occupational therapy', 'physical therapy',
+    'horse rehabilitation', 'veterinary rehabilitation for dogs', 'canine massage',
+    'PATH International certified', 'Pet Partners registered', 'we accept medicaid',
+    'sensory friendly', 'social skills group', 'early intervention', 'chiropractic for people',
+]
+
+
+def build_corpus(seed=SEED, sizes=SIZES):
+    """[(size class, text)], identical on every run for a given seed."""
+    rng = random.Random(seed)
+    pages = []
+    for size, count in sizes:
+        for _ in range(count):
+            words, length = [], 0
+            while length < size:
+                word = rng.choice(PHRASES) if rng.random() < 0.02 else rng.choice(FILLER)
+                words.append(word)
+                length += len(word) + 1
+            pages.append((size, ' '.join(words)))
+    return pages
+
+
+# ------------------------------------------------------------ analyzers
+
+def pages_analyzer(name):
+    """A rescore analyzer (provider id, [(url, text)]) as a per-page callable."""
+    analyze = rescore.ANALYZERS[name]()
+    return lambda text: analyze('bench', [('https://example.org/', text)])
+
+
+def score_provider():
+    if rescore.ARCHIVE not in sys.path:
+        sys.path.append(rescore.ARCHIVE)
+    from pet_therapy_scraper import Provider, score_provider
+    return lambda text: score_provider(Provider('bench', 'https://example.org/', 'bench'), text)
+
+
+def aba_search():
+    from aba_verification_crawler import ABAVerificationCrawler
+    crawler = ABAVerificationCrawler()
+    lists = [crawler.aba_terms, crawler.behavior_analysis_terms, crawler.autism_terms,
+             crawler.pediatric_indicators]
+
+    def analyze(text):
+        for patterns in lists:
+            crawler.search_text(text, patterns)
+    return analyze
+
+
+BENCHMARKS = {
+    'fixed_strict': lambda: pages_analyzer('fixed_strict'),
+    'strict': lambda: pages_analyzer('strict'),
+    'aggressive': lambda: pages_analyzer('aggressive'),
+    'website_checker': lambda: pages_analyzer('website_checker'),
+    'score_provider': score_provider,
+    'aba_search': aba_search,
+    'aba': lambda: pages_analyzer('aba'),
+    'rules': lambda: pages_analyzer('rules'),
+}
+
+
+# ------------------------------------------------------------ measuring
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(analyze, corpus, repeat):
+    """Best-of-repeat per-page seconds, and peak traced bytes over one pass."""
+    analyze(corpus[0][1])   # warm caches (compiled regexes, lazy imports)
+    best = [float('inf')] * len(corpus)
+    for _ in range(repeat):
+        for i, (_, text) in enumerate(corpus):
+            started = time.perf_counter()
+            analyze(text)
+            best[i] = min(best[i], time.perf_counter() - started)
+    tracemalloc.start()
+    for _, text in corpus:
+        analyze(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def measure(name, corpus, repeat):
+    analyze = BENCHMARKS[name]()
+    times, peak = run(analyze, corpus, repeat)
+    total = sum(times)
+    by_size = {}
+    for (size, _), seconds in zip(corpus, times):
+        by_size.setdefault(size, []).append(seconds)
+    return {
+        'pages_per_sec': round(len(corpus) / total, 2),
+        'mb_per_sec': round(sum(len(t) for _, t in corpus) / total / 1e6, 3),
+        'p50_ms': round(percentile(times, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(times, 0.99) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'ms_by_size': {str(size): round(sum(t) / len(t) * 1000, 3) for size, t in by_size.items()},
+    }
+
+
+def compare(results, baseline, threshold):
+    """Lines describing regressions; throughput ones are failures, the rest warnings."""
+    failures, warnings = [], []
+    for name, now in results.items():
+        before = baseline.get('analyzers', {}).get(name)
+        if not before:
+            continue
+        if now['pages_per_sec'] < before['pages_per_sec'] * (1 - threshold):
+            failures.append(f"{name}: {now['pages_per_sec']} pages/s vs {before['pages_per_sec']} baseline")
+        if now['p99_ms'] > before['p99_ms'] * (1 + threshold):
+            warnings.append(f"{name}: p99 {now['p99_ms']} ms vs {before['p99_ms']} ms")
+        if now['peak_kb'] > before['peak_kb'] * (1 + threshold):
+            warnings.append(f"{name}: peak {now['peak_kb']} KB vs {before['peak_kb']} KB")
+    return failures, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the text analyzers on a fixed corpus')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed throughput drop (0.2 = 20%%)')
+    parser.add_argument('--save', help='write the results as a baseline JSON')
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    chars = sum(len(t) for _, t in corpus)
+    print(f"Corpus: {len(corpus)} pages, {chars / 1e6:.1f}M chars (seed {SEED})\n")
+    print(f"{'analyzer':<16} {'pages/s':>9} {'MB/s':>7} {'p50 ms':>9} {'p99 ms':>9} {'peak KB':>9}")
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = r = measure(name, corpus, args.repeat)
+        print(f"{name:<16} {r['pages_per_sec']:>9} {r['mb_per_sec']:>7} {r['p50_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['peak_kb']:>9}")
+
+    rules = [p for p in RuleEngine.load().patterns if isinstance(p, WindowRule)]
+    rule_failures = check_rules(rules)
+    print(f"\nWindowed rules on adversarial input: {len(rules) - len(rule_failures)}/{len(rules)} OK")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'machine': platform.node(), 'python': platform.python_version(),
+                       'seed': SEED, 'sizes': SIZES, 'analyzers': results}, f, indent=2)
+        print(f"💾 Baseline saved to {args.save}")
+
+    failures, warnings = list(rule_failures), []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('seed') != SEED or baseline.get('sizes') != [list(s) for s in SIZES]:
+            print("⚠️  Baseline was recorded on a different corpus; comparison skipped")
+        else:
+            regressions, warnings = compare(results, baseline, args.threshold)
+            failures += regressions
+    for line in warnings:
+        print(f"⚠️  {line}")
+    for line in failures:
+        print(f"❌ {line}")
+    if failures:
+        sys.exit(1)
+    if args.baseline:
+        print(f"✅ No analyzer slower than {args.threshold:.0%} below baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Verify providers from a shared work queue, with as many workers as you like.
+
+Instead of splitting a big CSV by hand, load it once into a queue
+(crawlkit/workqueue.py) and start any number of workers on it; each one
+leases a provider, crawls it with the chosen verifier and commits the
+verdict. A worker that crashes loses nothing: its provider is leased again
+once the lease times out. Verdicts also go into the re-verification
+schedule (reverify.py) for providers it knows.
+
+Usage:
+    python crawl_worker.py enqueue providers.csv [--verifier fixed_strict] [--queue NAME]
+    python crawl_worker.py enqueue --plan 500          # top of the reverify ranking
+    python crawl_worker.py work [--verifier fixed_strict] [--wait]    # start N of these
+    python crawl_worker.py status
+    python crawl_worker.py results --out verdicts.csv
+    python crawl_worker.py retry-dead
+"""
+
+import argparse
+import csv
+from collections import Counter
+
+from crawlkit.scheduler import VerificationScheduler
+from crawlkit.workqueue import DEAD, DONE, VISIBILITY, WorkQueue, work
+from reverify import SCOPES, VERIFIERS
+
+
+def cmd_enqueue(args, queue):
+    if args.plan:
+        rows = VerificationScheduler().ranked(limit=args.plan, where=SCOPES.get(args.verifier))
+        tasks = [(row['provider_id'], row['provider'], row['priority']) for row in rows]
+    else:
+        with open(args.providers, encoding='utf-8-sig') as f:
+            scope = SCOPES.get(args.verifier)
+            tasks = [(row['id'], row, 0) for row in csv.DictReader(f)
+                     if row.get('id') and (scope is None or scope(row))]
+    added = queue.put_many(tasks, max_attempts=args.attempts)
+    print(f"✅ {added} new task(s) in queue '{queue.name}' ({len(tasks) - added} already there)")
+    cmd_status(args, queue)
+
+
+def cmd_work(args, queue):
+    verify = VERIFIERS[args.verifier]()
+    scheduler = VerificationScheduler()
+
+    def handle(provider):
+        print(f"🔎 {provider.get('provider_name', '')[:50]} ({provider.get('website', '')})")
+        verdict, pages, complete = verify(provider)
+        scheduler.record(provider['id'], verdict, pages, complete=complete)
+        print(f"  → {verdict}")
+        return {'verdict': verdict, 'pages': len(pages)}
+
+    print(f"▶️  Worker on queue '{queue.name}' with {args.verifier} (lease {queue.visibility}s)\n")
+    try:
+        counts = work(queue, handle, wait=args.wait, limit=args.limit)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped; the current task went back to the queue")
+        return
+    print(f"\n🏁 {counts['done']} done, {counts['failed']} failed (will retry), "
+          f"{counts['duplicate']} duplicate(s) dropped")
+
+
+def cmd_status(args, queue):
+    counts = queue.counts()
+    print(f"📋 {queue.name}: " + ", ".join(f"{state}: {n}" for state, n in sorted(counts.items())))
+    verdicts = Counter(result['verdict'] for *_, result, _, _ in queue.results((DONE,)))
+    if verdicts:
+        print("   " + ", ".join(f"{v}: {n}" for v, n in verdicts.most_common()))
+    for task_id, _, provider, _, error, attempts in queue.results((DEAD,))[:10]:
+        print(f"   ☠️  {task_id} {provider.get('provider_name', '')[:40]} after {attempts}: {error}")
+
+
+def cmd_results(args, queue):
+    rows = queue.results()
+    fields = list(dict.fromkeys(k for _, _, provider, *_ in rows for k in provider))
+    with open(args.out, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields + ['verdict', 'pages_crawled', 'attempts', 'error'])
+        writer.writeheader()
+        for _, state, provider, result, error, attempts in rows:
+            result = result or {'verdict': 'CRAWL_FAILED', 'pages': 0}
+            writer.writerow({**provider, 'verdict': result['verdict'], 'pages_crawled': result['pages'],
+                             'attempts': attempts, 'error': error or ''})
+    print(f"💾 {len(rows)} result(s) written to {args.out}")
+
+
+def cmd_retry_dead(args, queue):
+    print(f"🔁 {queue.requeue((DEAD,))} dead task(s) queued again")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--queue', help='queue name (default: the verifier name)')
+    parser.add_argument('--verifier', choices=sorted(VERIFIERS), default='fixed_strict')
+    parser.add_argument('--lease', type=int, default=VISIBILITY, help='lease timeout, seconds')
+    sub = parser.add_subparsers(dest='command', required=True)
+    enqueue = sub.add_parser('enqueue', help='add providers (CSV rows with id) as tasks')
+    enqueue.add_argument('providers', nargs='?')
+    enqueue.add_argument('--plan', type=int, help='enqueue the top N of the reverify ranking instead')
+    enqueue.add_argument('--attempts', type=int, default=3)
+    worker = sub.add_parser('work', help='lease and verify providers until the queue is drained')
+    worker.add_argument('--wait', action='store_true', help='keep polling for new tasks')
+    worker.add_argument('--limit', type=int, help='stop after N tasks')
+    sub.add_parser('status', help='task counts, verdicts and dead tasks')
+    results = sub.add_parser('results', help='export verdicts as CSV')
+    results.add_argument('--out', default='queue_results.csv')
+    sub.add_parser('retry-dead', help='give dead tasks fresh attempts')
+    args = parser.parse_args()
+    if args.command == 'enqueue' and not (args.providers or args.plan):
+        parser.error('enqueue needs a providers CSV or --plan N')
+
+    queue = WorkQueue(args.queue or args.verifier, visibility=args.lease)
+    {'enqueue': cmd_enqueue, 'work': cmd_work, 'status': cmd_status, 'results': cmd_results,
+     'retry-dead': cmd_retry_dead}[args.command](args, queue)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""
+crawlkit - shared plumbing for the provider and church crawlers.
+
+The crawler scripts under _archive/ and Python_scripts/ put this folder on
+sys.path and import from here instead of each building its own
+requests.Session.
+"""
+
+from .deadline import DeadlineExceeded
+from .domain_health import DomainHealthStore
+from .session import CrawlSession, DeadDomainError, SkippedContent
@@ -0,0 +1,160 @@
+"""
+A pool of Playwright pages for crawling many hosts at once.
+
+The Playwright crawler used to drive one page for the whole run: every
+image, font and tracker was downloaded and rendered, and safe_pause() slept
+between every load, so throughput was one page per several seconds no
+matter how many different hosts were waiting.
+
+BrowserPool launches one browser with `size` contexts (one page each) and
+routes every request through a filter that aborts images, media, fonts and
+known analytics/ad hosts before they load. Work is spread over the pages
+with run(items, handler); politeness is per host (HostPoliteness), so two
+churches on different hosts load in parallel while pages of one host keep
+their 2-4 s spacing. Contexts are recycled every `recycle_after` pages to
+keep memory flat on long runs.
+
+Playwright itself is imported by the caller; this module only needs the
+object returned by async_playwright().
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from .domain_health import host_of
+
+POOL_SIZE = 4
+BLOCKED_TYPES = {'image', 'media', 'font'}
+# Third-party analytics, tag managers, ad and chat widgets: never needed for text
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'googleadservices.com', 'facebook.net', 'hotjar.com', 'clarity.ms', 'segment.io',
+    'segment.com', 'mixpanel.com', 'newrelic.com', 'nr-data.net', 'quantserve.com',
+    'scorecardresearch.com', 'adsrvr.org', 'analytics.tiktok.com', 'sc-static.net',
+    'px.ads.linkedin.com', 'bat.bing.com', 'intercom.io', 'tawk.to', 'livechatinc.com',
+    'zopim.com', 'addthis.com', 'sharethis.com',
+)
+
+
+def is_tracker(url):
+    host = host_of(url)
+    return any(host == t or host.endswith('.' + t) for t in TRACKER_HOSTS)
+
+
+class HostPoliteness:
+    """At most one request per host per `interval` seconds (a (min, max) range is jittered)."""
+
+    def __init__(self, interval=(2, 4)):
+        self.interval = interval
+        self.next_ok = {}    # host -> monotonic time of the next allowed request
+        self.locks = {}
+
+    def gap(self):
+        if isinstance(self.interval, tuple):
+            return random.uniform(*self.interval)
+        return self.interval
+
+    async def wait(self, url):
+        host = host_of(url)
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self.next_ok.get(host, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_ok[host] = time.monotonic() + self.gap()
+
+
+class BrowserPool:
+    def __init__(self, playwright, size=POOL_SIZE, headless=True, block=True,
+                 politeness=(2, 4), recycle_after=50, blocked_types=BLOCKED_TYPES):
+        self.playwright = playwright
+        self.size = size
+        self.headless = headless
+        self.block = block
+        self.blocked_types = set(blocked_types)
+        self.politeness = HostPoliteness(politeness)
+        self.recycle_after = recycle_after
+        self.browser = None
+        self.idle = asyncio.Queue()
+        self.stats = {'pages': 0, 'blocked': 0, 'allowed': 0, 'recycled': 0}
+
+    @classmethod
+    async def start(cls, playwright, **kwargs):
+        pool = cls(playwright, **kwargs)
+        pool.browser = await playwright.chromium.launch(headless=pool.headless)
+        for _ in range(pool.size):
+            await pool.idle.put(await pool._new_slot())
+        return pool
+
+    async def _new_slot(self):
+        context = await self.browser.new_context()
+        if self.block:
+            await context.route('**/*', self._route)
+        page = await context.new_page()
+        return {'context': context, 'page': page, 'used': 0}
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_types or is_tracker(request.url):
+            self.stats['blocked'] += 1
+            await route.abort()
+        else:
+            self.stats['allowed'] += 1
+            await route.continue_()
+
+    @asynccontextmanager
+    async def page(self, url=None):
+        """An idle page, after url's host politeness delay; returned to the pool afterwards."""
+        if url:
+            # Wait before taking a page, so a slow host never holds one idle
+            await self.politeness.wait(url)
+        slot = await self.idle.get()
+        try:
+            yield slot['page']
+        finally:
+            slot['used'] += 1
+            self.stats['pages'] += 1
+            if slot['used'] >= self.recycle_after:
+                await slot['context'].close()
+                slot = await self._new_slot()
+                self.stats['recycled'] += 1
+            await self.idle.put(slot)
+
+    async def run(self, items, handler):
+        """
+        await handler(item) for every item, `size` at a time, in item order as
+        far as concurrency allows. Returns the handlers' results in item order;
+        a handler that raises yields None and the error is printed.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        queue = asyncio.Queue()
+        for i, item in enumerate(items):
+            queue.put_nowait((i, item))
+
+        async def worker():
+            while not queue.empty():
+                i, item = queue.get_nowait()
+                try:
+                    results[i] = await handler(item)
+                except Exception as e:
+                    print(f" [pool] {type(e).__name__}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.size, len(items)) or 1)))
+        return results
+
+    def summary(self):
+        s = self.stats
+        total = s['blocked'] + s['allowed']
+        share = f"{100 * s['blocked'] / total:.0f}%" if total else '0%'
+        return (f"{s['pages']} page loads on {self.size} contexts, "
+                f"{s['blocked']} sub-requests blocked ({share}), {s['recycled']} context recycles")
+
+    async def close(self):
+        while not self.idle.empty():
+            slot = self.idle.get_nowait()
+            await slot['context'].close()
+        if self.browser is not None:
+            await self.browser.close()
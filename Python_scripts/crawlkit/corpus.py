@@ -0,0 +1,123 @@
+"""
+Extracted-text corpus for offline re-scoring.
+
+Every crawl stores the text of each page it read, zlib-compressed and keyed
+by (provider, url), in crawl order. rescore.py replays any analyzer over
+the stored text, so a threshold or keyword change can be evaluated across
+the whole provider set without touching the network. The text is stored
+exactly as the crawler's analyzer saw it, line breaks included: windowed
+rules and `.*` patterns stop at a newline, so collapsing whitespace here
+could change a verdict on replay.
+A crawl that stopped early (its verdict was settled before the last
+subpage) is listed in partial_sites, so a re-score knows that site's text
+is incomplete.
+
+The corpus lives in its own SQLite file (corpus.db beside crawl_state.db)
+because it is the one store that grows with page count.
+"""
+
+import re
+import time
+import zlib
+
+from .state import SqliteStore, default_db_path
+
+_WS = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Lower-case and collapse whitespace (fingerprints; not applied to stored pages)."""
+    return _WS.sub(' ', text or '').strip().lower()
+
+
+def default_corpus_path():
+    return default_db_path().with_name('corpus.db')
+
+
+class Corpus(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        provider_id TEXT NOT NULL,
+        seq         INTEGER NOT NULL,
+        url         TEXT NOT NULL,
+        crawled_at  REAL NOT NULL,
+        raw_len     INTEGER NOT NULL,
+        text        BLOB NOT NULL,
+        PRIMARY KEY (provider_id, url)
+    );
+    CREATE INDEX IF NOT EXISTS pages_by_provider ON pages (provider_id, seq);
+    CREATE TABLE IF NOT EXISTS partial_sites (
+        provider_id TEXT PRIMARY KEY,
+        reason      TEXT NOT NULL,
+        crawled_at  REAL NOT NULL
+    );
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or default_corpus_path())
+
+    def put_site(self, provider_id, pages, partial=None):
+        """Replace a provider's pages with [(url, text), ...] from a new crawl; partial: why it stopped early."""
+        now = time.time()
+        rows = []
+        for seq, (url, text) in enumerate(pages):
+            text = text or ''
+            rows.append((str(provider_id), seq, url, now, len(text),
+                         zlib.compress(text.encode('utf-8'), 6)))
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM pages WHERE provider_id = ?', (str(provider_id),))
+            self.conn.executemany('INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?,?)', rows)
+            self.conn.execute('DELETE FROM partial_sites WHERE provider_id = ?', (str(provider_id),))
+            if partial:
+                self.conn.execute('INSERT INTO partial_sites VALUES (?, ?, ?)', (str(provider_id), partial, now))
+
+    def partial_sites(self):
+        """{provider_id: reason} for the sites whose last crawl stopped early."""
+        with self.lock:
+            return dict(self.conn.execute('SELECT provider_id, reason FROM partial_sites'))
+
+    def pages(self, provider_id):
+        """[(url, text), ...] for one provider, in crawl order."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT url, text FROM pages WHERE provider_id = ? ORDER BY seq',
+                (str(provider_id),)).fetchall()
+        return [(url, zlib.decompress(blob).decode('utf-8')) for url, blob in rows]
+
+    def site_text(self, provider_id):
+        """All of a provider's pages joined the way crawl_website joins them."""
+        return ' '.join(text for _, text in self.pages(provider_id))
+
+    def providers(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                'SELECT DISTINCT provider_id FROM pages ORDER BY provider_id')]
+
+    def iter_sites(self):
+        """Yield (provider_id, [(url, text), ...]) for the whole corpus."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT provider_id, url, text FROM pages ORDER BY provider_id, seq').fetchall()
+        current, pages = None, []
+        for provider_id, url, blob in rows:
+            if provider_id != current and pages:
+                yield current, pages
+                pages = []
+            current = provider_id
+            pages.append((url, zlib.decompress(blob).decode('utf-8')))
+        if pages:
+            yield current, pages
+
+    def state(self):
+        """Page count and newest crawl time; changes whenever a site is stored."""
+        with self.lock:
+            pages, newest = self.conn.execute('SELECT COUNT(*), MAX(crawled_at) FROM pages').fetchone()
+        return f'{pages}@{newest or 0:.6f}'
+
+    def stats(self):
+        with self.lock:
+            providers, pages, raw, packed = self.conn.execute(
+                'SELECT COUNT(DISTINCT provider_id), COUNT(*), '
+                'COALESCE(SUM(raw_len), 0), COALESCE(SUM(LENGTH(text)), 0) FROM pages').fetchone()
+        return {'providers': providers, 'pages': pages,
+                'text_bytes': raw, 'stored_bytes': packed}
@@ -0,0 +1,86 @@
+"""
+Wall-clock deadlines for a site and for a whole run.
+
+A site's worst case used to be pages x timeout plus sleeps (50 s for the
+pet-therapy crawlers, 100 s for the ABA path list, minutes for Playwright),
+so a handful of slow hosts set the length of every large run. A Deadline
+bounds that: CrawlSession clamps each request's timeout to the time left,
+checks between body chunks, and raises DeadlineExceeded once it is spent.
+Crawlers keep the pages they already have and record status DEADLINE.
+
+Site deadlines are children of the run deadline, so a site never outlives
+the run budget. ASD_CRAWL_RUN_MINUTES sets a run budget for any crawler
+that does not pass one explicitly.
+"""
+
+import os
+import time
+
+import requests
+
+DEADLINE = 'DEADLINE'   # crawl status for sites cut short
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The site or run deadline passed; not a fault of the host."""
+
+    def __init__(self, scope, url=''):
+        self.scope = scope
+        super().__init__(f"{scope} deadline passed{': ' + url if url else ''}")
+
+
+class Deadline:
+    def __init__(self, seconds=None, parent=None, scope='site'):
+        self.scope = scope
+        self.parent = parent
+        self.expires = time.monotonic() + seconds if seconds is not None else None
+
+    def child(self, seconds, scope='site'):
+        return Deadline(seconds, parent=self, scope=scope)
+
+    def remaining(self):
+        """Seconds left (the tighter of this and every parent); None if unbounded."""
+        left = None if self.expires is None else self.expires - time.monotonic()
+        if self.parent is not None:
+            up = self.parent.remaining()
+            if up is not None:
+                left = up if left is None else min(left, up)
+        return left
+
+    def expired(self):
+        left = self.remaining()
+        return left is not None and left <= 0
+
+    def binding_scope(self):
+        """'site' or 'run': whichever deadline is the one running out."""
+        if self.parent is not None and self.parent.expired():
+            return self.parent.binding_scope()
+        return self.scope
+
+    def check(self, url=''):
+        if self.expired():
+            raise DeadlineExceeded(self.binding_scope(), url)
+
+    def clamp(self, timeout):
+        """timeout (seconds, or a (connect, read) pair) cut to the time left."""
+        left = self.remaining()
+        if left is None:
+            return timeout
+        left = max(left, 0.1)
+        if timeout is None:
+            return left
+        if isinstance(timeout, tuple):
+            return tuple(left if t is None else min(t, left) for t in timeout)
+        return min(timeout, left)
+
+    def sleep(self, seconds):
+        """time.sleep that never sleeps past the deadline."""
+        left = self.remaining()
+        time.sleep(max(0, seconds if left is None else min(seconds, left)))
+
+
+def run_deadline(seconds=None):
+    """The run budget: seconds, else ASD_CRAWL_RUN_MINUTES, else unbounded."""
+    if seconds is None and os.environ.get('ASD_CRAWL_RUN_MINUTES'):
+        seconds = float(os.environ['ASD_CRAWL_RUN_MINUTES']) * 60
+    return Deadline(seconds, scope='run')
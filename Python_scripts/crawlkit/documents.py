@@ -0,0 +1,280 @@
+"""
+Text from PDF and DOCX pages, extracted in a separate process.
+
+Many provider and church sites put their services, insurance lists and
+ministry descriptions only in PDFs or Word files. CrawlSession refused
+those content types (SkippedContent) and a crawler that got one anyway
+handed the binary to BeautifulSoup. A pathological document - a
+1000-page scan, a compression bomb, a parser loop - would stall the crawl
+or bloat the crawler's memory for the rest of the run.
+
+DocumentExtractor runs the parsing in a small process pool instead:
+
+  * each document gets a wall-clock timeout; a worker that overruns is
+    killed and the pool restarted;
+  * on POSIX each task also gets a CPU-seconds limit (RLIMIT_CPU, raised
+    as an error inside the worker) and each worker an address-space cap
+    (RLIMIT_AS), so MemoryError stays in the worker;
+  * workers are replaced every `tasks_per_worker` documents, so whatever a
+    parser leaks goes with them;
+  * only the first `max_pages` pages and `max_chars` characters are kept.
+
+register(session) routes application/pdf and DOCX responses through it;
+the session then hands the crawler plain text (response.text / .content,
+with response.extracted_from naming the document type; the headers are left
+as sent), which flows into the same BeautifulSoup / analyzer path as an
+HTML page.
+PDFs need the optional pypdf package; DOCX uses only the standard library.
+A document never outlasts the session's site deadline: the timeout is
+clamped to the time left, and running out raises DeadlineExceeded.
+
+The workers are spawned, so each one imports the crawler's main module
+again (as __mp_main__): a crawler that registers a session keeps its
+sessions, stores and heavy imports inside main(), not at module level.
+"""
+
+import atexit
+import io
+import multiprocessing
+import re
+import signal
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from .deadline import DeadlineExceeded
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock timeouts only
+    resource = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDFs are then skipped (SkippedContent "no text")
+    PdfReader = None
+
+PDF = 'application/pdf'
+DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+WORKERS = 2
+TIMEOUT = 20               # wall-clock seconds per document
+CPU_SECONDS = 10           # CPU seconds per document (POSIX)
+MEMORY_MB = 768            # address space per worker (POSIX)
+MAX_PAGES = 30
+MAX_CHARS = 300_000
+MAX_DOCUMENT_BYTES = 6 * 1024 * 1024
+MAX_XML_BYTES = 40 * 1024 * 1024   # uncompressed word/document.xml; larger is a zip bomb
+TASKS_PER_WORKER = 25
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class DocumentError(Exception):
+    """A document that could not be (or may not be) turned into text."""
+
+
+# ---------------------------------------------------------------- in the worker
+
+def _init_worker(memory_mb):
+    if resource is None:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+    signal.signal(signal.SIGXCPU, _cpu_exceeded)
+
+
+def _cpu_exceeded(signum, frame):
+    raise DocumentError('CPU limit')
+
+
+def _limit_cpu(seconds):
+    """Soft RLIMIT_CPU at this worker's usage so far + seconds (SIGXCPU after that)."""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def extract_text(kind, body, max_pages=MAX_PAGES, max_chars=MAX_CHARS, cpu_seconds=None):
+    """(text, pages read) of a PDF or DOCX body. Runs in a worker, but works anywhere."""
+    if cpu_seconds:
+        _limit_cpu(cpu_seconds)
+    if kind == PDF:
+        return _pdf_text(body, max_pages, max_chars)
+    if kind == DOCX:
+        return _docx_text(body, max_chars)
+    raise DocumentError(f'unsupported document type {kind}')
+
+
+def _pdf_text(body, max_pages, max_chars):
+    if PdfReader is None:
+        raise DocumentError('pypdf not installed')
+    reader = PdfReader(io.BytesIO(body), strict=False)
+    if reader.is_encrypted:
+        try:
+            reader.decrypt('')
+        except Exception:
+            raise DocumentError('encrypted PDF')
+    parts, chars, pages = [], 0, 0
+    for page in reader.pages[:max_pages]:
+        text = page.extract_text() or ''
+        parts.append(text)
+        chars += len(text)
+        pages += 1
+        if chars >= max_chars:
+            break
+    return '\n'.join(parts)[:max_chars], pages
+
+
+def _docx_text(body, max_chars):
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        info = archive.getinfo('word/document.xml')
+    except (zipfile.BadZipFile, KeyError):
+        raise DocumentError('not a DOCX file')
+    if info.file_size > MAX_XML_BYTES:
+        raise DocumentError(f'document.xml is {info.file_size} bytes')
+    paragraphs, chars = [], 0
+    with archive.open(info) as xml:
+        for _, element in ElementTree.iterparse(xml):
+            if element.tag != _W + 'p':
+                continue
+            text = ''.join(t.text or '' for t in element.iter(_W + 't'))
+            element.clear()
+            if text:
+                paragraphs.append(text)
+                chars += len(text)
+                if chars >= max_chars:
+                    break
+    return '\n'.join(paragraphs)[:max_chars], 1
+
+
+# ---------------------------------------------------------------- in the crawler
+
+def document_kind(body, content_type=''):
+    """PDF, DOCX or None, from the content type or the first bytes."""
+    if content_type.startswith(PDF) or body[:5] == b'%PDF-':
+        return PDF
+    if content_type.startswith(DOCX) or (body[:2] == b'PK' and b'word/' in body[:4096]):
+        return DOCX
+    return None
+
+
+class DocumentExtractor:
+    def __init__(self, workers=WORKERS, timeout=TIMEOUT, cpu_seconds=CPU_SECONDS,
+                 memory_mb=MEMORY_MB, max_pages=MAX_PAGES, max_chars=MAX_CHARS,
+                 tasks_per_worker=TASKS_PER_WORKER):
+        self.workers = workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.tasks_per_worker = tasks_per_worker
+        self.pool = None   # started on the first document
+        self.lock = threading.Lock()
+        self.stats = {'documents': 0, 'pages': 0, 'failed': 0, 'timeouts': 0, 'crashes': 0,
+                      'seconds': 0.0}
+        atexit.register(self.close)
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # spawn: a fresh interpreter per worker, nothing of the crawler's memory
+                self.pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.memory_mb,),
+                    max_tasks_per_child=self.tasks_per_worker)
+            return self.pool
+
+    def _restart(self, pool):
+        """Kill pool's workers (one may be stuck in a parser) and start over on next use."""
+        with self.lock:
+            if self.pool is not pool:
+                return
+            self.pool = None
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, url, body, content_type='', timeout=None):
+        """Text of a PDF/DOCX body, or None if it is not one or could not be read in time."""
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        kind = document_kind(body, content_type)
+        if kind is None:
+            return None
+        pool = self._get_pool()
+        started = time.perf_counter()
+        try:
+            future = pool.submit(extract_text, kind, body, self.max_pages, self.max_chars,
+                                 self.cpu_seconds)
+            text, pages = future.result(timeout=timeout)
+        except FutureTimeout:
+            self.stats['timeouts'] += 1
+            print(f" [document] {url}: no text after {timeout:.0f}s, worker killed")
+            self._restart(pool)
+            return None
+        except BrokenProcessPool:
+            self.stats['crashes'] += 1
+            print(f" [document] {url}: worker died (memory or CPU limit)")
+            self._restart(pool)
+            return None
+        except Exception as e:
+            self.stats['failed'] += 1
+            print(f" [document] {url}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.stats['seconds'] += time.perf_counter() - started
+        self.stats['documents'] += 1
+        self.stats['pages'] += pages
+        text = re.sub(r'[ \t]+', ' ', text).strip()
+        return text or None
+
+    def register(self, session, max_bytes=MAX_DOCUMENT_BYTES):
+        """Route session's PDF and DOCX responses through this extractor, within its deadline."""
+        def handler(url, body, content_type):
+            text = self.extract(url, body, content_type, timeout=session.deadline.clamp(self.timeout))
+            if text is None and session.out_of_time(url):
+                raise DeadlineExceeded(session.deadline.binding_scope(), url)
+            return text
+        for content_type in (PDF, DOCX):
+            session.route(content_type, handler, max_bytes=max_bytes)
+        return session
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['documents']} document(s), {s['pages']} page(s) in {s['seconds']:.1f}s; "
+                f"{s['failed']} unreadable, {s['timeouts']} timed out, {s['crashes']} worker crash(es)")
+
+    def close(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared = None
+
+
+def register(session, **kwargs):
+    """Route session's documents through one extractor shared by the process."""
+    global _shared
+    if _shared is None:
+        _shared = DocumentExtractor(**kwargs)
+    return _shared.register(session)
+
+
+def shared_summary():
+    return _shared.summary() if _shared is not None else None
@@ -0,0 +1,218 @@
+"""
+Dead-domain negative cache.
+
+Records hosts that failed in a way that will not fix itself within a crawl
+run (DNS failure, TLS error, parked-domain page, repeated timeouts) together
+with an expiry. Crawlers consult it before fetching so a decayed provider
+domain costs one lookup instead of a full timeout per guessed path.
+
+See curation/psw_evidence_gaps_and_domain_decay_2026-08-20.md for why.
+"""
+
+import socket
+import ssl
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from .state import SqliteStore
+
+# Failure kinds
+DNS = 'DNS'
+TLS = 'TLS'
+PARKED = 'PARKED'
+TIMEOUT = 'TIMEOUT'
+REFUSED = 'REFUSED'
+ALIVE = 'ALIVE'
+
+DAY = 86400
+
+# How long a host stays skipped after each kind of failure
+TTL = {
+    DNS: 7 * DAY,
+    TLS: 3 * DAY,
+    PARKED: 30 * DAY,
+    TIMEOUT: 1 * DAY,
+    REFUSED: 1 * DAY,
+}
+
+# Timeouts are often transient, so only skip after this many in a row
+TIMEOUT_STRIKES = 2
+
+# Phrases that registrar/parking landing pages put in their first screen
+PARKED_MARKERS = [
+    'this domain is for sale',
+    'this domain may be for sale',
+    'buy this domain',
+    'domain is parked',
+    'parked free, courtesy of godaddy',
+    'parkingcrew',
+    'sedoparking',
+    'hugedomains.com',
+    'dan.com/buy-domain',
+    'afternic',
+    'this domain has expired',
+    'domain has been registered',
+]
+
+# Shared infrastructure we query, not provider sites: a bad minute there must
+# never take the host out of every crawl for a day
+NEVER_SKIP = {
+    'html.duckduckgo.com', 'duckduckgo.com', 'www.bing.com', 'bing.com',
+    'www.googleapis.com', 'nominatim.openstreetmap.org',
+}
+
+DNS_HINTS = [
+    'nameresolutionerror', 'name or service not known', 'getaddrinfo failed',
+    'nodename nor servname', 'temporary failure in name resolution',
+    'no address associated with hostname', 'failed to resolve',
+]
+
+
+def host_of(url):
+    """Lower-cased hostname of a URL, tolerating a missing scheme."""
+    if not url:
+        return ''
+    url = str(url).strip()
+    if '://' not in url:
+        url = 'https://' + url
+    return (urlparse(url).hostname or '').lower()
+
+
+def classify_exception(exc):
+    """Map a requests exception to a failure kind, or None if not sticky."""
+    if isinstance(exc, requests.exceptions.SSLError):
+        return TLS
+    if isinstance(exc, requests.exceptions.Timeout):
+        return TIMEOUT
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        cause = exc
+        while cause is not None:
+            if isinstance(cause, socket.gaierror):
+                return DNS
+            if isinstance(cause, ssl.SSLError):
+                return TLS
+            if isinstance(cause, ConnectionRefusedError):
+                return REFUSED
+            cause = cause.__cause__ or cause.__context__
+        text = str(exc).lower()
+        if any(hint in text for hint in DNS_HINTS):
+            return DNS
+        if 'certificate' in text or 'ssl' in text:
+            return TLS
+        if 'connection refused' in text:
+            return REFUSED
+    return None
+
+
+def classify_browser_error(message):
+    """Map a Playwright/Chromium navigation error message to a failure kind."""
+    text = str(message)
+    if 'ERR_NAME_NOT_RESOLVED' in text:
+        return DNS
+    if 'ERR_CERT' in text or 'ERR_SSL' in text:
+        return TLS
+    if 'ERR_CONNECTION_REFUSED' in text:
+        return REFUSED
+    if 'Timeout' in text or 'ERR_TIMED_OUT' in text:
+        return TIMEOUT
+    return None
+
+
+def looks_parked(text):
+    """True if the start of a page reads like a registrar parking page."""
+    if not text:
+        return False
+    head = text[:20000].lower()
+    return any(marker in head for marker in PARKED_MARKERS)
+
+
+class DomainHealthStore(SqliteStore):
+    """Per-host health records with expiry, cached in memory."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS domain_health (
+        host          TEXT PRIMARY KEY,
+        status        TEXT NOT NULL,
+        reason        TEXT,
+        strikes       INTEGER NOT NULL DEFAULT 0,
+        dead_until    REAL NOT NULL DEFAULT 0,
+        checked_at    REAL NOT NULL,
+        etag          TEXT,
+        last_modified TEXT
+    );
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        cols = ('host', 'status', 'reason', 'strikes', 'dead_until',
+                'checked_at', 'etag', 'last_modified')
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT %s FROM domain_health' % ', '.join(cols)).fetchall()
+        self.cache = {row[0]: dict(zip(cols, row)) for row in rows}
+
+    # ------------------------------------------------------------ lookups
+
+    def check(self, url):
+        """The record for a URL's host if it is currently dead, else None."""
+        record = self.cache.get(host_of(url))
+        if record and record['dead_until'] > time.time():
+            return record
+        return None
+
+    def is_dead(self, url):
+        return self.check(url) is not None
+
+    def validators(self, url):
+        """(etag, last_modified) seen on the last successful check."""
+        record = self.cache.get(host_of(url)) or {}
+        return record.get('etag'), record.get('last_modified')
+
+    def summary(self):
+        """Count of hosts per status, dead ones only counted while unexpired."""
+        now = time.time()
+        counts = {}
+        for record in self.cache.values():
+            status = record['status'] if record['dead_until'] > now else ALIVE
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    # ------------------------------------------------------------ updates
+
+    def record_failure(self, url, kind, reason=''):
+        host = host_of(url)
+        if not host or host in NEVER_SKIP:
+            return
+        now = time.time()
+        record = self.cache.get(host) or {
+            'host': host, 'strikes': 0, 'etag': None, 'last_modified': None}
+        strikes = record['strikes'] + 1 if record.get('status') == kind else 1
+        dead = kind != TIMEOUT or strikes >= TIMEOUT_STRIKES
+        record.update(status=kind, reason=str(reason)[:200], strikes=strikes,
+                      dead_until=now + TTL[kind] if dead else 0, checked_at=now)
+        self._save(record)
+
+    def record_success(self, url, etag=None, last_modified=None):
+        host = host_of(url)
+        record = self.cache.get(host)
+        unchanged = record is None or (record['status'] == ALIVE
+                                       and not record['strikes'])
+        if unchanged and not (etag or last_modified):
+            return  # already known healthy: nothing worth writing
+        record = record or {'host': host}
+        record.update(status=ALIVE, reason='', strikes=0, dead_until=0,
+                      checked_at=time.time(),
+                      etag=etag or record.get('etag'),
+                      last_modified=last_modified or record.get('last_modified'))
+        self._save(record)
+
+    def _save(self, record):
+        self.cache[record['host']] = record
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO domain_health VALUES (?,?,?,?,?,?,?,?)',
+                (record['host'], record['status'], record['reason'],
+                 record['strikes'], record['dead_until'], record['checked_at'],
+                 record.get('etag'), record.get('last_modified')))
@@ -0,0 +1,200 @@
+"""
+Simhash change detection: skip re-analysis of sites that have not changed.
+
+Most provider sites are the same from one verification run to the next.
+Each crawl stores a 64-bit simhash of every page's normalized text (word
+3-gram shingles) next to the verdict it produced. On the next crawl, if the
+site's fingerprint is within TOLERANCE bits of the stored one and the
+analyzer itself is unchanged, the stored verdict is reused and the analysis
+(regex passes, proximity scan) is skipped.
+
+When a site did change and its verdict flipped, or its text changed beyond
+all recognition (MAJOR_CHANGE bits, e.g. a domain that was sold), it goes on
+a small review queue instead of silently overwriting the old verdict.
+"""
+
+import hashlib
+import inspect
+import json
+import re
+import time
+
+import numpy as np
+
+from .corpus import normalize_text
+from .state import SqliteStore
+
+# Measured on synthetic pages: a changed footer/date or 0.5% of words moves
+# 1-6 bits, 2% of words ~8, 30% rewritten ~25, an unrelated site ~32
+TOLERANCE = 6       # bits; at or under this the site counts as unchanged
+MAJOR_CHANGE = 24   # bits; a different site altogether
+
+_WORD = re.compile(r'\w+')
+
+
+def simhash(text, shingle=3):
+    """64-bit simhash of normalized text over word shingles (0 for empty text)."""
+    words = _WORD.findall(normalize_text(text))
+    if not words:
+        return 0
+    grams = [' '.join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    hashes = np.frombuffer(b''.join(
+        hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest() for g in grams), dtype='>u8')
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)   # MSB first
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(grams)
+    return int(''.join('1' if v > 0 else '0' for v in votes), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def site_fingerprint(pages):
+    """One simhash for a site's pages (order-insensitive) plus one per page."""
+    per_page = {url: simhash(text) for url, text in pages}
+    return simhash(' '.join(text for _, text in sorted(pages))), per_page
+
+
+def analyzer_version(*parts):
+    """
+    Short hash of whatever decides a verdict: keyword lists, weights, and the
+    source of analysis functions. Cached verdicts from another version are
+    never reused.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update((inspect.getsource(part) if callable(part) else repr(part)).encode('utf-8'))
+    return h.hexdigest()
+
+
+class FingerprintStore(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        scope       TEXT NOT NULL,
+        provider_id TEXT NOT NULL,
+        simhash     TEXT NOT NULL,
+        pages       TEXT NOT NULL,
+        version     TEXT NOT NULL,
+        verdict     TEXT NOT NULL,
+        checked_at  REAL NOT NULL,
+        changed_at  REAL NOT NULL,
+        PRIMARY KEY (scope, provider_id)
+    );
+    CREATE TABLE IF NOT EXISTS review_queue (
+        scope        TEXT NOT NULL,
+        provider_id  TEXT NOT NULL,
+        queued_at    REAL NOT NULL,
+        distance     INTEGER NOT NULL,
+        old_decision TEXT,
+        new_decision TEXT,
+        changed_urls TEXT NOT NULL,
+        resolved     INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, provider_id)
+    );
+    """
+
+    def __init__(self, scope, version, db_path=None, tolerance=TOLERANCE):
+        super().__init__(db_path)
+        self.scope = scope
+        self.version = version
+        self.tolerance = tolerance
+        self.reused = 0
+        self.analyzed = 0
+        self.queued = 0
+
+    def get(self, provider_id):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT simhash, pages, version, verdict FROM fingerprints '
+                'WHERE scope = ? AND provider_id = ?', (self.scope, str(provider_id))).fetchone()
+        if not row:
+            return None
+        return {'simhash': int(row[0], 16), 'pages': json.loads(row[1]),
+                'version': row[2], 'verdict': json.loads(row[3])}
+
+    def reusable(self, provider_id):
+        """True if a verdict of this analyzer version is stored (an unchanged site would reuse it)."""
+        prior = self.get(provider_id)
+        return bool(prior and prior['version'] == self.version)
+
+    def analyze(self, provider_id, pages, analyze, decision_key='decision', partial=False):
+        """
+        The verdict for a crawled site: the stored one if the site is unchanged
+        (and the analyzer version matches), else analyze(). Returns (verdict, reused).
+        partial: the crawl stopped early, so its pages are not the whole site;
+        they are analyzed but neither compared with nor stored as its fingerprint.
+        """
+        if partial:
+            self.analyzed += 1
+            return analyze(), False
+        fp, per_page = site_fingerprint(pages)
+        prior = self.get(provider_id)
+        now = time.time()
+        if prior and prior['version'] == self.version and hamming(fp, prior['simhash']) <= self.tolerance:
+            with self.lock, self.conn:
+                self.conn.execute('UPDATE fingerprints SET checked_at = ? WHERE scope = ? AND provider_id = ?',
+                                  (now, self.scope, str(provider_id)))
+            self.reused += 1
+            return prior['verdict'], True
+
+        verdict = analyze()
+        self.analyzed += 1
+        if prior:
+            distance = hamming(fp, prior['simhash'])
+            old, new = prior['verdict'].get(decision_key), verdict.get(decision_key)
+            if old != new or distance >= MAJOR_CHANGE:
+                changed = sorted(url for url, h in per_page.items()
+                                 if url not in prior['pages']
+                                 or hamming(h, int(prior['pages'][url], 16)) > self.tolerance)
+                self.enqueue(provider_id, distance, old, new, changed)
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO fingerprints VALUES (?,?,?,?,?,?,?,?)',
+                (self.scope, str(provider_id), f'{fp:016x}',
+                 json.dumps({url: f'{h:016x}' for url, h in per_page.items()}),
+                 self.version, json.dumps(verdict, default=str), now, now))
+        return verdict, False
+
+    # ------------------------------------------------------------ review queue
+
+    def enqueue(self, provider_id, distance, old_decision, new_decision, changed_urls):
+        self.queued += 1
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO review_queue VALUES (?,?,?,?,?,?,?,0)',
+                (self.scope, str(provider_id), time.time(), distance,
+                 old_decision, new_decision, json.dumps(changed_urls)))
+
+    def review_queue(self):
+        """Unresolved material changes, newest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT provider_id, queued_at, distance, old_decision, new_decision, changed_urls '
+                'FROM review_queue WHERE scope = ? AND resolved = 0 ORDER BY queued_at DESC',
+                (self.scope,)).fetchall()
+        return [{'provider_id': r[0], 'queued_at': r[1], 'distance': r[2],
+                 'old_decision': r[3], 'new_decision': r[4], 'changed_urls': json.loads(r[5])}
+                for r in rows]
+
+    def resolve(self, provider_id):
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE review_queue SET resolved = 1 WHERE scope = ? AND provider_id = ?',
+                              (self.scope, str(provider_id)))
+
+    def summary(self):
+        return f"{self.reused} unchanged (verdict reused), {self.analyzed} analyzed, {self.queued} queued for review"
+
+
+if __name__ == '__main__':
+    # python -m crawlkit.fingerprint <scope> [--resolve PROVIDER_ID ...]
+    import sys
+    scope = sys.argv[1] if len(sys.argv) > 1 else 'fixed_strict'
+    store = FingerprintStore(scope, version=None)
+    if '--resolve' in sys.argv:
+        for provider_id in sys.argv[sys.argv.index('--resolve') + 1:]:
+            store.resolve(provider_id)
+    queue = store.review_queue()
+    print(f"Review queue '{scope}': {len(queue)} open")
+    for item in queue:
+        print(f"  {item['provider_id']:<40} {item['old_decision']} -> {item['new_decision']}"
+              f"  ({item['distance']} bits, {len(item['changed_urls'])} page(s) changed)")
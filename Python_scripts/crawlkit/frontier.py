@@ -0,0 +1,290 @@
+"""
+Crawl frontier: canonical URLs, per-host queues and a persistent seen set.
+
+FloridaChurchCrawler kept the pages it had scraped in an in-memory set of
+raw URL strings, and the faith-based crawlers appended them to a JSON list
+in checkpoint.json (a linear scan per lookup, the whole list rewritten
+after every church). Neither recognised the same page under another
+spelling: ?utm_source=... and ?fbclid=... variants, http and https, a
+trailing slash, a #fragment; so those were fetched again. The set was
+also gone after a restart.
+
+Frontier keeps both sides of a crawl in the shared state file:
+
+  * seen_key(url) is the identity of a page: canonical_url() (lower-case
+    host, no default port or fragment, tracking and session parameters
+    dropped, the rest sorted) without its scheme or trailing slash;
+  * seen(url) asks a Bloom filter first. Its size is fixed by capacity
+    and error rate (about 1.2 MB for a million URLs at 1%), so memory
+    stays bounded however long the crawl runs. "No" is final; "maybe" is
+    confirmed against the exact frontier_seen table, so a false positive
+    costs one indexed lookup and never skips a page. The filter is saved
+    every 1000 new URLs and at exit, and rebuilt from the table if it is
+    missing, stale (a crash between saves) or over capacity;
+  * push(url, payload, priority) queues a page per host, and pop() takes
+    the hosts in turn, best priority first within a host, so consecutive
+    fetches spread over sites. Queued pages are kept until mark(url),
+    and a run that stops early resumes with what is left.
+
+With revisit_days, a page seen longer ago than that counts as new again.
+python -m crawlkit.frontier NAME [--reset] prints (or clears) a frontier.
+"""
+
+import atexit
+import hashlib
+import heapq
+import json
+import math
+import re
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .domain_health import host_of
+from .redirects import url_key
+from .state import SqliteStore
+
+DAY = 86400
+CAPACITY = 1_000_000
+ERROR_RATE = 0.01
+SAVE_EVERY = 1000     # new URLs between Bloom filter saves
+
+# Query parameters that identify a click or a visitor, not a page. A bare
+# ?sid= is left alone: as often as not it selects the page (a section or story id)
+TRACKING_PARAMS = {'gclid', 'gclsrc', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid',
+                   'igshid', 'twclid', 'ttclid', 'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi',
+                   'mkt_tok', 'ref_src', 'srsltid', 'phpsessid', 'jsessionid', 'sessionid'}
+TRACKING_PREFIXES = ('utm_', 'hsa_', 'pk_', 'mtm_')
+_PATH_SESSION = re.compile(r';jsessionid=[^/?#]*', re.IGNORECASE)
+
+
+def is_tracking(param):
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    """url to fetch: url_key() form, tracking / session parameters dropped, the others sorted."""
+    parts = urlsplit(url_key(url))
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not is_tracking(k)))
+    return urlunsplit((parts.scheme, parts.netloc, _PATH_SESSION.sub('', parts.path), query, ''))
+
+
+def seen_key(url):
+    """Identity of a page: canonical_url() without scheme or trailing slash."""
+    parts = urlsplit(canonical_url(url))
+    path = parts.path.rstrip('/')
+    return parts.netloc + path + (f'?{parts.query}' if parts.query else '')
+
+
+class BloomFilter:
+    """capacity keys at error_rate false positives; k bit positions by double hashing one blake2b digest."""
+
+    def __init__(self, capacity=CAPACITY, error_rate=ERROR_RATE, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class Frontier(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS frontier_seen (
+        frontier TEXT NOT NULL,
+        key      TEXT NOT NULL,
+        url      TEXT NOT NULL,
+        seen_at  REAL NOT NULL,
+        PRIMARY KEY (frontier, key)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS frontier_queue (
+        frontier TEXT NOT NULL,
+        key      TEXT NOT NULL,
+        url      TEXT NOT NULL,
+        host     TEXT NOT NULL,
+        priority REAL NOT NULL DEFAULT 0,
+        payload  TEXT,
+        added_at REAL NOT NULL,
+        PRIMARY KEY (frontier, key)
+    );
+    CREATE TABLE IF NOT EXISTS frontier_bloom (
+        frontier   TEXT PRIMARY KEY,
+        capacity   INTEGER NOT NULL,
+        error_rate REAL NOT NULL,
+        count      INTEGER NOT NULL,
+        bits       BLOB NOT NULL,
+        saved_at   REAL NOT NULL
+    );
+    """
+
+    def __init__(self, name, capacity=CAPACITY, error_rate=ERROR_RATE, revisit_days=None, db_path=None):
+        super().__init__(db_path)
+        self.name = name
+        self.revisit = revisit_days * DAY if revisit_days else None
+        self.bloom = self._load_bloom(capacity, error_rate)
+        self.unsaved = 0
+        self.hosts = {}          # host -> heap of (-priority, seq, key)
+        self.rotation = deque()  # hosts with queued pages, next turn first
+        self.queued = {}         # key -> (url, payload), until mark()
+        self.seq = 0
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT key, url, host, priority, payload FROM frontier_queue WHERE frontier = ? '
+                'ORDER BY added_at', (name,)).fetchall()
+        for key, url, host, priority, payload in rows:
+            self._enqueue(key, url, host, priority, json.loads(payload) if payload else None)
+        self.stats = {'duplicates': 0, 'disk_checks': 0, 'false_positives': 0}
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------ seen set
+
+    def _load_bloom(self, capacity, error_rate):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT capacity, error_rate, count, bits FROM frontier_bloom WHERE frontier = ?',
+                (self.name,)).fetchone()
+            exact = self.conn.execute('SELECT COUNT(*) FROM frontier_seen WHERE frontier = ?',
+                                      (self.name,)).fetchone()[0]
+        if row and row[2] == exact and exact <= row[0]:
+            return BloomFilter(row[0], row[1], row[3], row[2])
+        # Missing, stale or full: rebuild from the exact table (room to double)
+        bloom = BloomFilter(max(capacity, 2 * exact), error_rate)
+        with self.lock:
+            for key, in self.conn.execute('SELECT key FROM frontier_seen WHERE frontier = ?', (self.name,)):
+                bloom.add(key)
+        self._save_bloom(bloom)
+        return bloom
+
+    def _save_bloom(self, bloom):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO frontier_bloom VALUES (?, ?, ?, ?, ?, ?)',
+                              (self.name, bloom.capacity, bloom.error_rate, bloom.count,
+                               bytes(bloom.bits), time.time()))
+
+    def flush(self):
+        """Save the Bloom filter if URLs were added since the last save."""
+        if self.unsaved:
+            self._save_bloom(self.bloom)
+            self.unsaved = 0
+
+    def seen(self, url):
+        """True if url (any spelling of it) was marked, within revisit_days if set."""
+        key = seen_key(url)
+        if key not in self.bloom:
+            return False
+        self.stats['disk_checks'] += 1
+        with self.lock:
+            row = self.conn.execute('SELECT seen_at FROM frontier_seen WHERE frontier = ? AND key = ?',
+                                    (self.name, key)).fetchone()
+        if row is None:
+            self.stats['false_positives'] += 1
+            return False
+        return self.revisit is None or row[0] > time.time() - self.revisit
+
+    __contains__ = seen
+
+    def mark(self, url):
+        """url was fetched (or is not to be): remember it and take it off the queue."""
+        key = seen_key(url)
+        now = time.time()
+        with self.lock, self.conn:
+            new = self.conn.execute('INSERT OR IGNORE INTO frontier_seen VALUES (?, ?, ?, ?)',
+                                    (self.name, key, url, now)).rowcount == 1
+            if not new:
+                self.conn.execute('UPDATE frontier_seen SET seen_at = ? WHERE frontier = ? AND key = ?',
+                                  (now, self.name, key))
+            if self.queued.pop(key, None) is not None:
+                self.conn.execute('DELETE FROM frontier_queue WHERE frontier = ? AND key = ?', (self.name, key))
+            if new:
+                self.bloom.add(key)
+                self.unsaved += 1
+        if self.unsaved >= SAVE_EVERY:
+            self.flush()
+
+    # ------------------------------------------------------------ queue
+
+    def _enqueue(self, key, url, host, priority, payload):
+        if host not in self.hosts:
+            self.hosts[host] = []
+            self.rotation.append(host)
+        self.seq += 1
+        heapq.heappush(self.hosts[host], (-priority, self.seq, key))
+        self.queued[key] = (url, payload)
+
+    def push(self, url, payload=None, priority=0):
+        """Queue url (with a JSON-able payload) unless it was seen or is queued; True if it was added."""
+        url = canonical_url(url)
+        key = seen_key(url)
+        if key in self.queued or self.seen(url):
+            self.stats['duplicates'] += 1
+            return False
+        host = host_of(url)
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO frontier_queue VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (self.name, key, url, host, priority,
+                               json.dumps(payload, default=str) if payload is not None else None, time.time()))
+        self._enqueue(key, url, host, priority, payload)
+        return True
+
+    def pop(self):
+        """(url, payload) of the next page, one host after another; None when the queue is empty."""
+        while self.rotation:
+            host = self.rotation.popleft()
+            heap = self.hosts[host]
+            while heap:
+                _, _, key = heapq.heappop(heap)
+                if key in self.queued:
+                    if heap:
+                        self.rotation.append(host)
+                    else:
+                        del self.hosts[host]
+                    return self.queued[key]
+            del self.hosts[host]
+        return None
+
+    def pending(self):
+        """Pages queued and not yet marked."""
+        return len(self.queued)
+
+    def reset(self):
+        """Forget every seen and queued page of this frontier."""
+        with self.lock, self.conn:
+            for table in ('frontier_seen', 'frontier_queue', 'frontier_bloom'):
+                self.conn.execute(f'DELETE FROM {table} WHERE frontier = ?', (self.name,))
+        self.bloom = BloomFilter(self.bloom.capacity, self.bloom.error_rate)
+        self.unsaved = 0
+        self.hosts, self.rotation, self.queued = {}, deque(), {}
+
+    def summary(self):
+        return (f"{self.bloom.count:,} page(s) seen, {self.pending()} queued on {len(self.hosts)} host(s), "
+                f"{self.stats['duplicates']} duplicate(s) skipped; Bloom filter {len(self.bloom.bits) // 1024:,} KB, "
+                f"{self.stats['false_positives']} false positive(s) caught on disk")
+
+
+if __name__ == '__main__':
+    # python -m crawlkit.frontier NAME [--reset]
+    import sys
+    if len(sys.argv) < 2:
+        sys.exit('usage: python -m crawlkit.frontier NAME [--reset]')
+    frontier = Frontier(sys.argv[1])
+    if '--reset' in sys.argv:
+        frontier.reset()
+        print(f"Frontier '{frontier.name}' cleared")
+    else:
+        print(f"{frontier.name}: {frontier.summary()}")
@@ -0,0 +1,176 @@
+"""
+Static fetch first, headless browser only for pages that need it.
+
+Most church and provider sites are server-rendered: a plain GET returns all
+of their text in a fraction of a second. A few are JS-only shells (an empty
+<div id="root">, a "please enable JavaScript" noscript) and need a browser.
+HybridFetcher tries the static fetch through CrawlSession, checks the
+result with needs_browser(), and escalates only those pages to a
+BrowserPool page.
+
+FetchModeStore remembers per host which mode produced text, so a host that
+needed the browser goes straight to it next time (with an occasional static
+re-probe in case the site changed), and a static host never pays for a
+browser at all.
+"""
+
+import asyncio
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from .domain_health import host_of
+from .state import SqliteStore
+
+STATIC = 'static'
+BROWSER = 'browser'
+
+STATIC_TIMEOUT = 15
+MIN_TEXT_CHARS = 200     # less visible text than this from a page with scripts is a shell
+REPROBE_EVERY = 20       # browser hosts get a static try every N fetches
+BLOCKED_STATUS = {403, 429, 503}   # bot walls a real browser often gets past
+
+SPA_SHELLS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|svelte)["\'][^>]*>\s*</div>',
+        r'<app-root[^>]*>\s*</app-root>',
+        r'\bng-app\b|\bng-version=',
+        r'<body[^>]*>\s*<script',
+    )
+]
+NOSCRIPT_HINT = re.compile(
+    r'<noscript[^>]*>[^<]*(?:<[^>]+>[^<]*){0,5}?(?:enable|requires?|turn on)\s+javascript', re.IGNORECASE)
+
+
+def needs_browser(html, wait_selector=None):
+    """Why a statically fetched page looks JS-rendered, or None if its text is usable."""
+    if not html:
+        return 'empty response'
+    soup = BeautifulSoup(html, 'html.parser')
+    if wait_selector and not soup.select_one(wait_selector):
+        return f'no {wait_selector}'
+    has_scripts = soup.find('script') is not None
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    text_chars = len(soup.get_text(' ', strip=True))
+    if text_chars >= MIN_TEXT_CHARS:
+        return None
+    if NOSCRIPT_HINT.search(html):
+        return 'noscript asks for JavaScript'
+    if any(p.search(html) for p in SPA_SHELLS):
+        return 'SPA shell'
+    if has_scripts:
+        return f'{text_chars} chars of text'
+    return None   # a genuinely short static page
+
+
+class FetchModeStore(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS fetch_modes (
+        host        TEXT PRIMARY KEY,
+        mode        TEXT NOT NULL,
+        static_ok   INTEGER NOT NULL DEFAULT 0,
+        escalated   INTEGER NOT NULL DEFAULT 0,
+        browser_ok  INTEGER NOT NULL DEFAULT 0,
+        fetches     INTEGER NOT NULL DEFAULT 0,
+        reason      TEXT,
+        updated_at  REAL NOT NULL
+    );
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        with self.lock:
+            self.modes = {host: [mode, fetches] for host, mode, fetches in
+                          self.conn.execute('SELECT host, mode, fetches FROM fetch_modes')}
+
+    def mode(self, url):
+        """Mode to try first for url's host: BROWSER for known JS hosts, else STATIC."""
+        known = self.modes.get(host_of(url))
+        if not known or known[0] != BROWSER:
+            return STATIC
+        known[1] += 1
+        return STATIC if known[1] % REPROBE_EVERY == 0 else BROWSER
+
+    def record(self, url, mode, escalated=False, reason=None):
+        """mode produced usable text for url (escalated: static was tried first and failed)."""
+        host = host_of(url)
+        fetches = self.modes.get(host, [None, 0])[1]
+        self.modes[host] = [mode, fetches]
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO fetch_modes (host, mode, static_ok, escalated, browser_ok, fetches, reason, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, 1, ?, ?) ON CONFLICT (host) DO UPDATE SET '
+                'mode = excluded.mode, static_ok = static_ok + excluded.static_ok, '
+                'escalated = escalated + excluded.escalated, browser_ok = browser_ok + excluded.browser_ok, '
+                'fetches = fetches + 1, reason = COALESCE(excluded.reason, reason), updated_at = excluded.updated_at',
+                (host, mode, int(mode == STATIC), int(escalated), int(mode == BROWSER),
+                 reason, time.time()))
+
+    def summary(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT mode, COUNT(*) FROM fetch_modes GROUP BY mode').fetchall()
+        return dict(rows)
+
+
+class HybridFetcher:
+    """
+    fetch(url) -> (html, mode). browser_fetch(page, url, wait_selector, deadline)
+    is the caller's page loader (health checks, deadline clamping); pool is a
+    BrowserPool or None for static-only runs.
+    """
+
+    def __init__(self, session, pool=None, browser_fetch=None, store=None):
+        self.session = session
+        self.pool = pool
+        self.browser_fetch = browser_fetch
+        self.store = store if store is not None else FetchModeStore()
+        self.counts = {STATIC: 0, BROWSER: 0, 'escalated': 0, 'failed': 0}
+
+    def _static(self, url, deadline, wait_selector):
+        """(html, reason to escalate or None); html '' and no reason if the host is unreachable."""
+        timeout = deadline.clamp(STATIC_TIMEOUT) if deadline else STATIC_TIMEOUT
+        try:
+            response = self.session.get(url, timeout=timeout)
+        except Exception as e:
+            print(f" [static] {url}: {type(e).__name__}")
+            return '', None
+        if response.status_code in BLOCKED_STATUS:
+            return '', f'HTTP {response.status_code}'
+        if not response.ok:
+            return '', None
+        return response.text, needs_browser(response.text, wait_selector)
+
+    async def fetch(self, url, wait_selector=None, deadline=None):
+        if deadline and deadline.expired():
+            return '', None
+        reason = None
+        if self.store.mode(url) == STATIC or self.pool is None:
+            if self.pool is not None:
+                await self.pool.politeness.wait(url)
+            html, reason = await asyncio.to_thread(self._static, url, deadline, wait_selector)
+            if html and not reason:
+                self.counts[STATIC] += 1
+                self.store.record(url, STATIC)
+                return html, STATIC
+            if not reason or self.pool is None:
+                # Unreachable (or no browser to try): escalating would not help
+                self.counts['failed'] += 1
+                return html, STATIC if html else None
+            print(f" [escalate] {url}: {reason}")
+            self.counts['escalated'] += 1
+
+        async with self.pool.page(url) as page:
+            html = await self.browser_fetch(page, url, wait_selector, deadline)
+        if html and not needs_browser(html, wait_selector):
+            self.counts[BROWSER] += 1
+            self.store.record(url, BROWSER, escalated=reason is not None, reason=reason)
+        elif not html:
+            self.counts['failed'] += 1
+        return html, BROWSER
+
+    def summary(self):
+        c = self.counts
+        return (f"{c[STATIC]} static, {c[BROWSER]} browser ({c['escalated']} escalated from static), "
+                f"{c['failed']} failed")
@@ -0,0 +1,127 @@
+"""
+Subpage discovery without building a DOM.
+
+The crawlers parsed every page with BeautifulSoup and walked
+soup.find_all('a', href=True) just to pick a few "services" / "ministries"
+links, lowercasing and keyword-checking each href, and fetched the same
+link twice when a site repeated it in header and body. extract_links()
+does it in one pass of a tag tokenizer over the raw HTML: it pulls
+(href, anchor text) pairs, skips comments and script/style (and optionally
+nav/footer) content, normalizes and deduplicates URLs, and scores each link against a
+hint list so the most promising subpages come first.
+"""
+
+import html as htmllib
+import re
+from collections import namedtuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+Link = namedtuple('Link', 'url text score')
+
+# Comments and the opening/closing tags the tokenizer cares about; everything else is skipped
+_TAG = re.compile(r'<!--.*?(?:-->|\Z)|<(/?)(a|script|style|nav|footer|noscript|template)\b([^>]*)>',
+                  re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r'<!--.*?(?:-->|\Z)', re.DOTALL)
+# href itself, not data-href= or ng-href=
+_HREF = re.compile(r'''(?:^|\s)href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+_MARKUP = re.compile(r'<[^>]*>')
+_SPACE = re.compile(r'\s+')
+RAW_TEXT = {'script', 'style', 'noscript', 'template'}   # content is never markup we want
+_RAW_END = {tag: re.compile(rf'</{tag}\b', re.IGNORECASE) for tag in RAW_TEXT}
+SKIP_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', 'sms:', 'fax:')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Binary downloads are not subpages
+SKIP_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.mp4', '.mp3',
+                   '.zip', '.css', '.js')
+
+
+def normalize_url(base, href):
+    """Absolute, fragment-free URL with lower-case scheme/host and no default port; None if not a page."""
+    href = htmllib.unescape(href or '').strip()
+    if not href or href.startswith('#') or href.lower().startswith(SKIP_SCHEMES):
+        return None
+    parts = urlsplit(urljoin(base, href))
+    if parts.scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    if parts.path.lower().endswith(SKIP_EXTENSIONS):
+        return None
+    host = parts.hostname
+    if parts.port and parts.port != DEFAULT_PORTS[parts.scheme]:
+        host = f'{host}:{parts.port}'
+    return urlunsplit((parts.scheme, host, parts.path or '/', parts.query, ''))
+
+
+def iter_anchors(html, skip=()):
+    """Yield (href, anchor text) for every <a href> outside comments, raw-text and skip tags."""
+    skip = {tag.lower() for tag in skip}
+    skipping = 0          # nesting depth of skip tags
+    anchor = None         # (href, text start) of the open <a>
+    pos = 0
+    while True:
+        m = _TAG.search(html, pos)
+        if not m:
+            break
+        pos = m.end()
+        if m.group(2) is None:   # <!-- comment -->
+            continue
+        closing, tag, attrs = m.group(1), m.group(2).lower(), m.group(3)
+        if tag in RAW_TEXT:
+            if not closing:   # jump to the closing tag; the content is not markup
+                end = _RAW_END[tag].search(html, pos)
+                pos = end.start() if end else len(html)
+            continue
+        if tag in skip:
+            skipping = max(0, skipping - 1) if closing else skipping + 1
+            continue
+        if tag != 'a' or skipping:
+            continue
+        if closing:
+            if anchor:
+                yield anchor[0], _anchor_text(html[anchor[1]:m.start()])
+                anchor = None
+            continue
+        if anchor:   # unclosed <a> before this one
+            yield anchor[0], _anchor_text(html[anchor[1]:m.start()])
+            anchor = None
+        href = _HREF.search(attrs)
+        if href:
+            anchor = (next(g for g in href.groups() if g is not None), m.end())
+    if anchor:
+        yield anchor[0], ''
+
+
+def _anchor_text(fragment):
+    fragment = _COMMENT.sub(' ', fragment[:2000])
+    return _SPACE.sub(' ', htmllib.unescape(_MARKUP.sub(' ', fragment))).strip()
+
+
+def extract_links(html, base_url, hints=None, same_host=True, skip=(), limit=None):
+    """
+    Distinct links of a page as Link(url, text, score), best first.
+
+    With hints, only links whose href or anchor text contains a hint are kept;
+    score counts hint hits (2 per hint in the URL, 1 per hint in the text),
+    ties in document order. same_host keeps links on base_url's host.
+    """
+    if not html:
+        return []
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', 'replace')
+    hints = [h.lower() for h in hints or []]
+    host = urlsplit(base_url).hostname
+    found = {}
+    for href, text in iter_anchors(html, skip):
+        url = normalize_url(base_url, href)
+        if not url or (same_host and urlsplit(url).hostname != host):
+            continue
+        if hints:
+            target, label = url.lower(), text.lower()
+            score = sum(2 * (h in target) + (h in label) for h in hints)
+            if not score:
+                continue
+        else:
+            score = 0
+        if url not in found or score > found[url].score:
+            found[url] = Link(url, found[url].text if url in found else text, score)
+    links = sorted(found.values(), key=lambda link: -link.score)   # stable: document order on ties
+    return links[:limit] if limit else links
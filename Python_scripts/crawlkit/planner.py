@@ -0,0 +1,74 @@
+"""
+Page order and early exit for crawlers that probe a fixed list of paths.
+
+ABAVerificationCrawler used to fetch all ten of its page_paths even when the
+homepage already said "BCBA", which settles KEEP_AS_ABA. CrawlPlanner
+orders the paths by how often each one has produced the deciding hit in
+past crawls (Laplace-smoothed rate from the shared state file, so failed
+fetches count against a path) and stops as soon as the caller's decided()
+says no further page can change the outcome.
+
+Audit mode (extra=N) keeps going for N more pages after the decision, to
+collect evidence for the other verdicts without paying for the full list.
+"""
+
+from .state import SqliteStore
+
+
+class CrawlPlanner(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS planner_stats (
+        planner TEXT NOT NULL,
+        path    TEXT NOT NULL,
+        fetched INTEGER NOT NULL DEFAULT 0,
+        hits    INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (planner, path)
+    );
+    """
+
+    def __init__(self, name, db_path=None):
+        super().__init__(db_path)
+        self.name = name
+        with self.lock:
+            self.stats = {path: (fetched, hits) for path, fetched, hits in self.conn.execute(
+                'SELECT path, fetched, hits FROM planner_stats WHERE planner = ?', (name,))}
+
+    def prior(self, path):
+        """Smoothed chance that fetching path produces the deciding hit."""
+        fetched, hits = self.stats.get(path, (0, 0))
+        return (hits + 1) / (fetched + 2)
+
+    def order(self, paths, pinned=('',)):
+        """paths, pinned ones (the homepage) first, the rest by prior, ties in given order."""
+        first = [p for p in paths if p in pinned]
+        rest = [p for p in paths if p not in pinned]
+        return first + sorted(rest, key=lambda p: -self.prior(p))
+
+    def plan(self, paths, decided, extra=0, pinned=('',)):
+        """
+        Yield paths in order until decided() is true, then up to extra more.
+        decided is re-checked after the caller has handled each path.
+        """
+        remaining = extra
+        for path in self.order(paths, pinned):
+            if decided():
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            yield path
+
+    def record(self, path, hit):
+        """One attempt at path (fetched or not); hit if it produced the deciding evidence."""
+        fetched, hits = self.stats.get(path, (0, 0))
+        self.stats[path] = (fetched + 1, hits + bool(hit))
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO planner_stats (planner, path, fetched, hits) VALUES (?, ?, 1, ?) '
+                'ON CONFLICT (planner, path) DO UPDATE SET '
+                'fetched = fetched + 1, hits = hits + excluded.hits',
+                (self.name, path, int(bool(hit))))
+
+    def summary(self):
+        """[(path, fetched, hits, prior)] for reports, best first."""
+        return sorted(((p, f, h, self.prior(p)) for p, (f, h) in self.stats.items()),
+                      key=lambda row: -row[3])
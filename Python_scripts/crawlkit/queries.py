@@ -0,0 +1,242 @@
+"""
+Search queries in priority order, generated lazily.
+
+FloridaChurchCrawler.generate_search_queries() built the full cross product
+of its term lists up front (75 locations x 32 entities x 57 accommodations
+x 3 orderings plus the descriptor / program / question loops: several
+hundred thousand strings), deduplicated it through a set - which also threw
+away any order - and run_exhaustive_crawl took the first 500.
+
+QueryGenerator walks the same space best-first instead. A query's score is
+the product of its terms' weights, and a term's weight is
+
+    static weight (e.g. city population) x historical yield x novelty
+
+where yield is the smoothed number of search results the term's queries
+have returned and novelty falls with every query already issued with it.
+Each family's term lists are sorted by weight and the walk starts at the
+best corner of the lattice with a heap, pushing only the neighbours of what
+it yields; so startup costs nothing and memory grows with the number of
+queries taken, not the size of the space. Scores are re-checked when an
+entry comes off the heap (yields and novelty change as results come in),
+and a stale entry goes back on with its new score.
+
+Issued queries and per-term yields live in the shared state file: the next
+run skips what earlier runs already asked and starts from the best of the
+rest, so a multi-day crawl continues instead of starting over.
+
+Queries are compared by canonical_query(): the bag of their terms, lower
+case, without stopwords, plurals and a few synonyms folded. "church autism
+Miami", "autistic churches Miami" and "Miami church autism" are one query
+to a search engine, and the family templates produce all three orderings;
+only the first (best) of a class is issued. The others are remembered as
+its variants, so results can be attributed to all of them (variants()).
+"""
+
+import heapq
+import re
+import string
+import time
+from math import prod
+
+from .state import SqliteStore
+
+PRIOR_RESULTS = 10    # results a query with untried terms is assumed to return
+NOVELTY = 0.1         # each earlier query with a term costs it this much weight
+RANK_DECAY = 0.01     # list order is the curator's order: slight preference for earlier terms
+DAY = 86400
+
+
+# Words search engines ignore, and spellings they treat as the same term
+STOPWORDS = {'a', 'an', 'the', 'in', 'of', 'for', 'to', 'with', 'and', 'on', 'at'}
+SYNONYMS = {'autistic': 'autism', 'neurodiverse': 'neurodivergent'}
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+def fold_term(word):
+    """One word reduced to its canonical spelling: synonyms, then plurals."""
+    word = SYNONYMS.get(word, word)
+    if len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'y'
+    elif len(word) > 4 and word.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    return SYNONYMS.get(word, word)
+
+
+def canonical_query(query):
+    """
+    Order-free key of a query: its folded terms, deduplicated and sorted.
+    A "quoted phrase" is one term, kept as written (engines match it exactly).
+    """
+    query = query.lower()
+    terms = {'"' + ' '.join(_TOKEN.findall(p)) + '"' for p in _PHRASE.findall(query)}
+    terms |= {fold_term(w) for w in _TOKEN.findall(_PHRASE.sub(' ', query)) if w not in STOPWORDS}
+    terms.discard('""')
+    return ' '.join(sorted(terms))
+
+
+def template_slots(template):
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+class QueryGenerator(SqliteStore):
+    """
+    families: [(template, {slot: [terms]})], e.g.
+    ("{entity} {acc} {loc}", {'entity': ENTITIES, 'acc': ACCOMMODATIONS, 'loc': LOCATIONS}).
+    weights: {slot: {term: static weight}}; unlisted terms weigh 1.
+    revisit_days: queries issued longer ago than this become eligible again.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS query_log (
+        generator TEXT NOT NULL,
+        query     TEXT NOT NULL,
+        results   INTEGER NOT NULL,
+        issued_at REAL NOT NULL,
+        PRIMARY KEY (generator, query)
+    );
+    CREATE TABLE IF NOT EXISTS query_variants (
+        generator TEXT NOT NULL,
+        canonical TEXT NOT NULL,
+        variant   TEXT NOT NULL,
+        PRIMARY KEY (generator, variant)
+    );
+    CREATE TABLE IF NOT EXISTS query_terms (
+        generator TEXT NOT NULL,
+        slot      TEXT NOT NULL,
+        term      TEXT NOT NULL,
+        queries   INTEGER NOT NULL DEFAULT 0,
+        results   INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (generator, slot, term)
+    );
+    """
+
+    def __init__(self, name, families, weights=None, revisit_days=None, db_path=None):
+        super().__init__(db_path)
+        self.name = name
+        self.families = [(template, {slot: list(terms[slot]) for slot in template_slots(template)})
+                         for template, terms in families]
+        self.weights = weights or {}
+        since = time.time() - revisit_days * DAY if revisit_days else 0
+        with self.lock:
+            self.stats = {(slot, term): [queries, results] for slot, term, queries, results in self.conn.execute(
+                'SELECT slot, term, queries, results FROM query_terms WHERE generator = ?', (name,))}
+            self.issued = {canonical_query(q) for q, in self.conn.execute(
+                'SELECT query FROM query_log WHERE generator = ? AND issued_at >= ?', (name, since))}
+            self.known_variants = {v for v, in self.conn.execute(
+                'SELECT variant FROM query_variants WHERE generator = ?', (name,))}
+        self.pending = {}    # query yielded -> its (slot, term)s, until record()
+        self.yielded = 0
+        self.recorded = 0
+        self.collapsed = 0   # variants not issued because their class already was
+
+    def total(self):
+        """Size of the whole query space (before deduplication)."""
+        return sum(prod(len(terms) for terms in slots.values()) for _, slots in self.families)
+
+    # ------------------------------------------------------------ scoring
+
+    def term_weight(self, slot, term, rank=0):
+        queries, results = self.stats.get((slot, term), (0, 0))
+        static = self.weights.get(slot, {}).get(term, 1.0)
+        yields = (results + PRIOR_RESULTS) / (queries + 1) / PRIOR_RESULTS
+        novelty = 1 / (1 + NOVELTY * queries)
+        return static * yields * novelty / (1 + RANK_DECAY * rank)
+
+    def _score(self, terms):
+        return prod(self.term_weight(slot, term, rank) for slot, term, rank in terms)
+
+    # ------------------------------------------------------------ generating
+
+    def queries(self, limit=None):
+        """Yield up to limit new queries, best first. Call record() with each one's result count."""
+        lattices = []
+        for template, slots in self.families:
+            names = list(slots)
+            # (term, original rank) per slot, best weight first
+            axes = [sorted(((term, rank) for rank, term in enumerate(slots[name])),
+                           key=lambda tr, name=name: -self.term_weight(name, tr[0], tr[1]))
+                    for name in names]
+            lattices.append((template, names, axes))
+
+        def terms_at(family, index):
+            _, names, axes = lattices[family]
+            return [(name, *axes[k][i]) for k, (name, i) in enumerate(zip(names, index))]
+
+        heap, visited = [], set()
+        for family, (_, names, axes) in enumerate(lattices):
+            if all(axes):
+                start = (0,) * len(names)
+                visited.add((family, start))
+                heap.append((-self._score(terms_at(family, start)), family, start))
+        heapq.heapify(heap)
+
+        produced = 0
+        while heap and (limit is None or produced < limit):
+            negative, family, index = heapq.heappop(heap)
+            template, names, axes = lattices[family]
+            terms = terms_at(family, index)
+            query = template.format(**{name: term for name, term, _ in terms})
+            key = canonical_query(query)
+            done = key in self.issued   # a variant of a query already issued: skip, but walk on
+            if not done:
+                score = self._score(terms)
+                if heap and score < -negative and score < -heap[0][0]:
+                    heapq.heappush(heap, (-score, family, index))   # went stale; something else is better now
+                    continue
+            for k in range(len(index)):
+                if index[k] + 1 < len(axes[k]):
+                    after = index[:k] + (index[k] + 1,) + index[k + 1:]
+                    if (family, after) not in visited:
+                        visited.add((family, after))
+                        heapq.heappush(heap, (-self._score(terms_at(family, after)), family, after))
+            if done:
+                self._add_variant(key, query)
+                continue
+            self.issued.add(key)
+            self.pending[query] = [(name, term) for name, term, _ in terms]
+            produced += 1
+            self.yielded += 1
+            yield query
+
+    def record(self, query, results):
+        """query was issued and returned `results` results: log it and update its terms' yields."""
+        terms = self.pending.pop(query, ())
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO query_log VALUES (?, ?, ?, ?)',
+                              (self.name, query, results, time.time()))
+            for slot, term in terms:
+                self.conn.execute(
+                    'INSERT INTO query_terms (generator, slot, term, queries, results) VALUES (?, ?, ?, 1, ?) '
+                    'ON CONFLICT (generator, slot, term) DO UPDATE SET '
+                    'queries = queries + 1, results = results + excluded.results',
+                    (self.name, slot, term, results))
+                stats = self.stats.setdefault((slot, term), [0, 0])
+                stats[0] += 1
+                stats[1] += results
+        self.recorded += 1
+
+    def _add_variant(self, key, query):
+        self.collapsed += 1
+        if query in self.known_variants:
+            return
+        self.known_variants.add(query)
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO query_variants VALUES (?, ?, ?)',
+                              (self.name, key, query))
+
+    def variants(self, query):
+        """The other queries of query's class seen so far (they were not issued; its results are theirs)."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT variant FROM query_variants WHERE generator = ? AND canonical = ? ORDER BY rowid',
+                (self.name, canonical_query(query))).fetchall()
+        return [v for v, in rows if v != query]
+
+    def summary(self):
+        return (f"{self.recorded} quer(ies) issued this run, {self.collapsed} equivalent variant(s) "
+                f"not issued, {len(self.issued) - self.yielded} classes done in earlier runs, "
+                f"{self.total():,} in the space")
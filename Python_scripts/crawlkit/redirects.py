@@ -0,0 +1,199 @@
+"""
+Redirect map: original URL -> final canonical URL, learned while crawling.
+
+Many provider URLs in resources.website redirect (http -> https, bare ->
+www, an old domain to a new one, a chain's location page to its HQ site).
+Every crawler followed those hops on every request, and the domain-level
+joins in curation/psw_evidence_gaps_and_domain_decay_2026-08-20.md broke on
+them: the listing says example.org, the evidence was gathered on
+www.example-autism.com.
+
+RedirectStore records each chain a fetch followed (final URL, hop count,
+status codes) with an expiry: 30 days when every hop was permanent (301 /
+308), a day otherwise. CrawlSession asks resolve() before a GET and goes
+straight to the final URL; if that fails, the entry is dropped and the
+original URL is fetched again. The same store is the lookup API for dedupe
+and evidence joins:
+
+    store = RedirectStore()
+    store.canonical('http://example.org/services')   # final URL, or the URL itself
+    store.canonical_host('example.org')              # where the site's homepage lands
+
+python -m crawlkit.redirects [URL ...] prints lookups; --export out.csv
+writes the whole map.
+"""
+
+import json
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from .domain_health import host_of
+from .state import SqliteStore
+
+DAY = 86400
+PERMANENT = {301, 308}
+TTL = {'permanent': 30 * DAY, 'temporary': 1 * DAY}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def url_key(url):
+    """Map key for url: lower-case scheme and host, no default port or fragment, '/' for no path."""
+    parts = urlsplit(str(url).strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class RedirectStore(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS redirects (
+        url        TEXT PRIMARY KEY,
+        final_url  TEXT NOT NULL,
+        hops       INTEGER NOT NULL,
+        statuses   TEXT NOT NULL,
+        permanent  INTEGER NOT NULL,
+        checked_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS redirects_final ON redirects (final_url);
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        now = time.time()
+        with self.lock:
+            self.map = {url: (final, expires) for url, final, expires in self.conn.execute(
+                'SELECT url, final_url, expires_at FROM redirects WHERE expires_at > ?', (now,))}
+        self.shortcuts = 0   # fetches sent straight to a known final URL
+        self.learned = 0     # chains recorded this run
+
+    def resolve(self, url):
+        """The known final URL for url, or None (unknown, expired, or not a redirect)."""
+        entry = self.map.get(url_key(url))
+        if not entry:
+            return None
+        final, expires = entry
+        if expires <= time.time():
+            self.map.pop(url_key(url), None)
+            return None
+        return final
+
+    def record(self, url, response):
+        """Record the chain response followed from url (no-op if it was not redirected)."""
+        if not response.history:
+            return
+        final = url_key(response.url)
+        statuses = [hop.status_code for hop in response.history]
+        permanent = all(status in PERMANENT for status in statuses)
+        now = time.time()
+        expires = now + TTL['permanent' if permanent else 'temporary']
+        # Every hop of the chain leads to the same place: start -> hops left
+        starts = {url_key(url): len(statuses)}
+        for i, hop in enumerate(response.history):
+            starts.setdefault(url_key(hop.url), len(statuses) - i)
+        starts.pop(final, None)
+        if not starts:
+            return   # a loop back to where it started
+        with self.lock, self.conn:
+            for start, hops in starts.items():
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO redirects VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (start, final, hops, json.dumps(statuses[-hops:]), int(permanent), now, expires))
+                self.map[start] = (final, expires)
+        self.learned += 1
+
+    def forget(self, url):
+        """Drop url's entry (its final URL stopped working)."""
+        key = url_key(url)
+        self.map.pop(key, None)
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM redirects WHERE url = ?', (key,))
+
+    # ------------------------------------------------------------ lookup API
+
+    def lookup(self, url):
+        """The stored row for url as a dict (expired ones included), or None."""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT url, final_url, hops, statuses, permanent, checked_at, expires_at '
+                'FROM redirects WHERE url = ?', (url_key(url),)).fetchone()
+        if row is None:
+            return None
+        return {'url': row[0], 'final_url': row[1], 'hops': row[2], 'statuses': json.loads(row[3]),
+                'permanent': bool(row[4]), 'checked_at': row[5], 'expires_at': row[6],
+                'expired': row[6] <= time.time()}
+
+    def canonical(self, url, include_expired=True):
+        """Final URL for url if it is known to redirect, else url itself (normalized)."""
+        row = self.lookup(url)
+        if row and (include_expired or not row['expired']):
+            return row['final_url']
+        return url_key(url)
+
+    def canonical_host(self, url_or_host):
+        """Host the site's homepage (http or https, bare or www) redirects to, else the host itself."""
+        host = host_of(url_or_host)
+        if not host:
+            return ''
+        candidates = [f'{scheme}://{h}/' for h in (host, f'www.{host}') if h
+                      for scheme in ('https', 'http')]
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT final_url FROM redirects WHERE url IN ({','.join('?' * len(candidates))}) "
+                'ORDER BY checked_at DESC LIMIT 1', candidates).fetchone()
+        return host_of(row[0]) if row else host
+
+    def domain_map(self):
+        """{host: canonical host} for every host whose homepage redirects off it."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, final_url FROM redirects WHERE url LIKE '%://%/' "
+                'ORDER BY checked_at').fetchall()
+        mapping = {}
+        for url, final in rows:
+            if urlsplit(url).path == '/' and host_of(final) != host_of(url):
+                mapping[host_of(url)] = host_of(final)
+        return mapping
+
+    def rows(self):
+        with self.lock:
+            return self.conn.execute(
+                'SELECT url, final_url, hops, statuses, permanent, checked_at, expires_at '
+                'FROM redirects ORDER BY url').fetchall()
+
+    def summary(self):
+        return f"{self.shortcuts} fetch(es) went straight to a known final URL, {self.learned} new chain(s)"
+
+
+if __name__ == '__main__':
+    # python -m crawlkit.redirects [URL ...] [--export redirects.csv]
+    import csv
+    import sys
+    store = RedirectStore()
+    args = sys.argv[1:]
+    if '--export' in args:
+        out = args[args.index('--export') + 1]
+        rows = store.rows()
+        with open(out, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url', 'final_url', 'hops', 'statuses', 'permanent', 'checked_at',
+                             'expires_at', 'canonical_host'])
+            for row in rows:
+                writer.writerow(list(row) + [host_of(row[1])])
+        print(f"{len(rows)} redirect(s) written to {out}")
+    elif args:
+        for url in args:
+            row = store.lookup(url)
+            if row:
+                print(f"{url} -> {row['final_url']} ({row['hops']} hop(s) {row['statuses']}"
+                      f"{', expired' if row['expired'] else ''})")
+            else:
+                print(f"{url} -> {store.canonical_host(url)} (no redirect recorded for this URL)")
+    else:
+        rows = store.rows()
+        hosts = store.domain_map()
+        print(f"{len(rows)} redirect(s); {len(hosts)} host(s) with a different canonical host")
+        for host, final in sorted(hosts.items())[:20]:
+            print(f"  {host:<40} -> {final}")
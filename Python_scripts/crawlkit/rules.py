@@ -0,0 +1,168 @@
+"""
+Declarative rule packs: one crawl of a provider, many verdicts.
+
+A rule pack (rulepacks/*.json) describes one question - "is this ABA?",
+"do they take Medicaid?" - as data:
+
+    {
+      "name": "insurance",
+      "groups": {"public": {"weight": 4, "cap": 1, "patterns": ["\\bmedicaid\\b", ...]},
+                 ...},
+      "requires": ["pediatric"],          optional: groups that must hit on the
+                                          same page for that page to count
+      "exclude": {"label": "ANIMAL_REHAB", "patterns": [...]},   optional veto
+      "thresholds": [[4, "ACCEPTS_PUBLIC"], [2, "ACCEPTS_INSURANCE"]],
+      "default": "UNKNOWN"
+    }
+
+A group scores weight x (distinct patterns hit across the site), at most cap
+patterns. Patterns are case-insensitive regexes, or - for "A not followed by
+B" exclusions - {"term": A, "unless": B, "requires": C, "within": N} objects,
+run as linear-time windowed.WindowRule checks instead of lookaheads. The
+first threshold the score reaches names the verdict; an exclude hit
+overrides everything.
+
+RuleEngine loads any number of packs and compiles every distinct pattern
+once, so a page is scanned once per pattern no matter how many packs share
+it. The patterns are deliberately not joined into one alternation: re tries
+every alternative at every position, so one pass over the page costs as
+much as the separate searches (about 20% more on the packs here, measured
+on 30 pages), and overlapping hits then need a match() per pattern on top.
+Feed it pages with SiteRules.add_page and read all verdicts at the end.
+SiteRules.unsettled() names the packs a further page could still change,
+so a crawler that stops early can tell whether it would cut a verdict short.
+"""
+
+import json
+from pathlib import Path
+
+from .windowed import WindowRule, compile_rule
+
+RULEPACK_DIR = Path(__file__).with_name('rulepacks')
+
+
+def load_pack(path):
+    with open(path, encoding='utf-8') as f:
+        pack = json.load(f)
+    pack.setdefault('name', Path(path).stem)
+    pack.setdefault('requires', [])
+    pack.setdefault('exclude', {})
+    pack.setdefault('default', 'NONE')
+    pack['thresholds'] = sorted(pack.get('thresholds', []), key=lambda t: -t[0])
+    for name in pack['requires']:
+        if name not in pack['groups']:
+            raise ValueError(f"{pack['name']}: requires unknown group '{name}'")
+    return pack
+
+
+class RuleEngine:
+    def __init__(self, packs):
+        self.packs = packs
+        self.patterns = []   # distinct compiled patterns, scanned once per page
+        index = {}
+        for pack in packs:
+            pack['_groups'] = {}
+            for group, spec in list(pack['groups'].items()) + [('_exclude', pack['exclude'])]:
+                ids = []
+                for pattern in spec.get('patterns', []):
+                    if isinstance(pattern, dict):
+                        pattern = WindowRule(**pattern)
+                    key = str(pattern)
+                    if key not in index:
+                        index[key] = len(self.patterns)
+                        self.patterns.append(compile_rule(pattern))
+                    ids.append(index[key])
+                pack['_groups'][group] = ids
+
+    @classmethod
+    def load(cls, names=None, directory=RULEPACK_DIR):
+        """Packs by name (file stem) from directory; all of them if names is None."""
+        directory = Path(directory)
+        paths = ([directory / f'{name}.json' for name in names] if names
+                 else sorted(directory.glob('*.json')))
+        return cls([load_pack(path) for path in paths])
+
+    @property
+    def names(self):
+        return [pack['name'] for pack in self.packs]
+
+    def scan(self, text):
+        """Ids of every distinct pattern that occurs in text; one search per pattern (see the module docstring)."""
+        return {i for i, pattern in enumerate(self.patterns) if pattern.search(text)}
+
+    def new_site(self):
+        return SiteRules(self)
+
+    def classify(self, pages):
+        """Verdicts for [(url, text), ...] in one call (rescore, ad hoc checks)."""
+        site = self.new_site()
+        for url, text in pages:
+            site.add_page(url, text)
+        return site.verdicts()
+
+
+class SiteRules:
+    """Hits accumulated over one provider's pages, for every pack at once."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        # pack name -> group -> {pattern id: [page keys]}
+        self.hits = {pack['name']: {group: {} for group in pack['_groups']}
+                     for pack in engine.packs}
+        self.pages = 0
+
+    def add_page(self, page_key, text):
+        self.pages += 1
+        found = self.engine.scan(text or '')
+        if not found:
+            return
+        for pack in self.engine.packs:
+            groups = pack['_groups']
+            page_ok = all(found.intersection(groups[name]) for name in pack['requires'])
+            for group, ids in groups.items():
+                if not page_ok and group not in pack['requires'] and group != '_exclude':
+                    continue
+                for i in found.intersection(ids):
+                    self.hits[pack['name']][group].setdefault(i, []).append(page_key)
+
+    def unsettled(self):
+        """Names of the packs whose verdict a further page could still change."""
+        return [pack['name'] for pack in self.engine.packs if not self._settled(pack)]
+
+    def _settled(self, pack):
+        if self.hits[pack['name']]['_exclude']:
+            return True    # the veto overrides anything found later
+        if pack['_groups']['_exclude']:
+            return False   # a later page may still hit the exclusion
+        if not pack['thresholds']:
+            return True
+        if any(spec.get('weight', 1) < 0 for spec in pack['groups'].values()):
+            return False   # the score can still fall
+        # scores only rise from here, and the top band is already reached
+        return self._verdict(pack)['score'] >= pack['thresholds'][0][0]
+
+    def verdicts(self):
+        """{pack name: {'verdict', 'score', 'matches', 'pages'}} for the site so far."""
+        return {pack['name']: self._verdict(pack) for pack in self.engine.packs}
+
+    def _verdict(self, pack):
+        hits = self.hits[pack['name']]
+        patterns = self.engine.patterns
+        matches = {group: [patterns[i].pattern for i in ids]
+                   for group, ids in hits.items() if ids and group != '_exclude'}
+        pages = sorted({p for ids in hits.values() for keys in ids.values() for p in keys})
+
+        if hits['_exclude']:
+            excluded = [patterns[i].pattern for i in hits['_exclude']]
+            return {'verdict': pack['exclude'].get('label', 'EXCLUDED'), 'score': None,
+                    'matches': {'exclude': excluded}, 'pages': pages}
+
+        score = 0
+        for group, spec in pack['groups'].items():
+            count = len(hits[group])
+            if spec.get('cap'):
+                count = min(count, spec['cap'])
+            score += spec.get('weight', 1) * count
+        verdict = next((label for threshold, label in pack['thresholds'] if score >= threshold),
+                       pack['default'])
+        return {'verdict': verdict, 'score': score, 'matches': matches, 'pages': pages}
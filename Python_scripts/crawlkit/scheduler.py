@@ -0,0 +1,259 @@
+"""
+Staleness-priority re-verification: which providers to re-crawl next.
+
+Keeps one row per provider in the shared state file: when it was last
+verified, the verdict, an estimate of how often its site changes, and how
+much its listing matters (pSEO pages it appears on). The priority of a
+provider is
+
+    importance x P(site changed since last check) x verdict risk
+
+with P(changed) = 1 - exp(-rate x days since last check), so providers never
+verified come first, fast-changing and long-unchecked ones next, and quiet
+sites on no page last. stream() yields providers in that order through a
+token bucket, so a fixed nightly budget (N per hour) goes where it matters.
+
+The change rate learns only from complete crawls: one that failed, ran
+into its deadline or stopped early says nothing about the site, and its
+verdict or fingerprint differing from the last good one is a crawl
+artifact. Each observation spans at least MIN_RECHECK_DAYS, so two checks
+an hour apart cannot push the rate to several changes a day.
+"""
+
+import csv
+import json
+import math
+import re
+import time
+
+from .fingerprint import TOLERANCE, hamming, site_fingerprint
+from .state import SqliteStore
+
+DAY = 86400
+
+# A site changes about twice a year until we have observed otherwise
+PRIOR_RATE = 1 / 180    # changes per day
+RATE_ALPHA = 0.3        # EWMA weight of the newest observation
+MIN_RECHECK_DAYS = 7    # shortest interval a change observation is taken to span
+
+# Verdicts that mean the crawl never read the site: no evidence of change either way
+CRAWL_FAILURES = {'CRAWL_FAILED', 'FLAG_WEBSITE_DOWN', 'DEADLINE', 'NO_WEBSITE'}
+
+# pSEO band -> weight of one page for a provider listed on it. 25+ pages carry
+# the most traffic; on a 3-4 page every listing is a third of what keeps the
+# page published, so a wrong one costs nearly as much.
+BAND_WEIGHT = {'25+': 3.0, '10-24': 2.0, '5-9': 1.5, '3-4': 2.5}
+BASE_IMPORTANCE = 1.0   # providers on no pSEO page
+NEVER_VERIFIED = 1e6    # priority floor for providers with no verification yet
+
+# Verdicts that deserve a look sooner than their change rate alone suggests
+VERDICT_RISK = {
+    'FLAG_WEBSITE_DOWN': 2.0, 'FLAG_FOR_REVIEW': 1.5, 'REVIEW': 1.5,
+    'DEADLINE': 1.5, 'CRAWL_FAILED': 2.0,
+}
+
+# service_type text / boolean columns -> pSEO service slug
+SERVICE_PATTERNS = {
+    'aba': r'\bABA\b|applied behavior',
+    'speech-therapy': r'speech',
+    'occupational-therapy': r'occupational',
+    'physical-therapy': r'physical therap',
+    'animal-therapy': r'pet therapy|animal|equine|hippotherapy',
+    'respite-care': r'respite',
+    'life-skills': r'life skills',
+    'residential-program': r'residential',
+    'feeding-therapy': r'feeding',
+    'music-therapy': r'music',
+}
+SERVICE_FLAGS = {
+    'aba': 'aba', 'speech': 'speech-therapy', 'ot': 'occupational-therapy',
+    'pt': 'physical-therapy', 'pet_therapy': 'animal-therapy', 'respite_care': 'respite-care',
+    'life_skills': 'life-skills', 'residential': 'residential-program',
+}
+
+
+def canonical_city(city):
+    """Upper-case city as the manifest spells it (FT MYERS -> FORT MYERS, ST PETE... -> ST.)."""
+    city = re.sub(r'\s+', ' ', str(city or '')).strip().upper()
+    city = re.sub(r'^FT\.? ', 'FORT ', city)
+    return re.sub(r'^ST\.? ', 'ST. ', city)
+
+
+def provider_services(row):
+    text = str(row.get('service_type') or '')
+    services = {slug for slug, pattern in SERVICE_PATTERNS.items()
+                if re.search(pattern, text, re.IGNORECASE)}
+    services |= {slug for column, slug in SERVICE_FLAGS.items()
+                 if str(row.get(column, '')).lower() in ('true', '1', 't')}
+    return services
+
+
+def load_manifest(path):
+    """{(service, CITY): band} from a pSEO page manifest CSV."""
+    with open(path, encoding='utf-8') as f:
+        return {(r['service'], r['canonical_city'].upper()): r['band'] for r in csv.DictReader(f)}
+
+
+class TokenBucket:
+    """rate tokens per second, up to capacity banked; take() blocks for a token."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def take(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+class VerificationScheduler(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS verification (
+        provider_id   TEXT PRIMARY KEY,
+        provider      TEXT NOT NULL,
+        importance    REAL NOT NULL,
+        pages         TEXT NOT NULL,
+        last_verified REAL,
+        last_verdict  TEXT,
+        simhash       TEXT,
+        change_rate   REAL NOT NULL,
+        checks        INTEGER NOT NULL DEFAULT 0,
+        changes       INTEGER NOT NULL DEFAULT 0,
+        observed_at      REAL,
+        observed_verdict TEXT
+    );
+    """
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        # observed_*: the last complete crawl, the baseline for change observations.
+        # Rows from before these columns take their last good verification as it
+        with self.lock, self.conn:
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(verification)')}
+            if 'observed_at' not in columns:
+                self.conn.execute('ALTER TABLE verification ADD COLUMN observed_at REAL')
+                self.conn.execute('ALTER TABLE verification ADD COLUMN observed_verdict TEXT')
+                self.conn.execute(
+                    'UPDATE verification SET observed_at = last_verified, observed_verdict = last_verdict '
+                    f'WHERE last_verdict NOT IN ({", ".join("?" * len(CRAWL_FAILURES))})',
+                    sorted(CRAWL_FAILURES))
+
+    # ------------------------------------------------------------ providers
+
+    def load_providers(self, providers, manifest):
+        """Insert/refresh provider rows (dicts with id) and their pSEO importance."""
+        count = 0
+        with self.lock, self.conn:
+            for row in providers:
+                if not row.get('id'):
+                    continue
+                city = canonical_city(row.get('city'))
+                pages = sorted(f"{service}/{city}:{manifest[(service, city)]}"
+                               for service in provider_services(row) if (service, city) in manifest)
+                importance = (sum(BAND_WEIGHT.get(p.rsplit(':', 1)[1], 1.0) for p in pages)
+                              or BASE_IMPORTANCE)
+                self.conn.execute(
+                    'INSERT INTO verification (provider_id, provider, importance, pages, change_rate) '
+                    'VALUES (?, ?, ?, ?, ?) ON CONFLICT (provider_id) DO UPDATE SET '
+                    'provider = excluded.provider, importance = excluded.importance, pages = excluded.pages',
+                    (str(row['id']), json.dumps(row, default=str), importance,
+                     json.dumps(pages), PRIOR_RATE))
+                count += 1
+        return count
+
+    def record(self, provider_id, verdict, pages=None, now=None, complete=True):
+        """
+        Log a verification. complete: the crawl read the site in full (no
+        failure, deadline or early stop). Between two complete crawls the site
+        counts as changed if its text fingerprint moved beyond the fingerprint
+        tolerance or the verdict differs; other crawls only reset the clock.
+        """
+        now = now or time.time()
+        complete = complete and verdict not in CRAWL_FAILURES
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT observed_at, observed_verdict, simhash, change_rate FROM verification '
+                'WHERE provider_id = ?', (str(provider_id),)).fetchone()
+        if row is None:
+            return
+        observed_at, observed_verdict, old_hash, rate = row
+        new_hash = site_fingerprint(pages)[0] if complete and pages else None
+        changed = None
+        if complete and observed_at is not None:
+            changed = verdict != observed_verdict or (
+                old_hash is not None and new_hash is not None
+                and hamming(int(old_hash, 16), new_hash) > TOLERANCE)
+            days = max((now - observed_at) / DAY, MIN_RECHECK_DAYS)
+            rate = (1 - RATE_ALPHA) * rate + RATE_ALPHA * (float(changed) / days)
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE verification SET last_verified = ?, last_verdict = ?, simhash = ?, '
+                'change_rate = ?, checks = checks + 1, changes = changes + ?, '
+                'observed_at = ?, observed_verdict = ? WHERE provider_id = ?',
+                (now, verdict, f'{new_hash:016x}' if new_hash is not None else old_hash,
+                 max(rate, PRIOR_RATE / 10), int(bool(changed)),
+                 now if complete else observed_at, verdict if complete else observed_verdict,
+                 str(provider_id)))
+
+    # ------------------------------------------------------------ ranking
+
+    @staticmethod
+    def priority(importance, last_verified, last_verdict, change_rate, now):
+        if last_verified is None:
+            return NEVER_VERIFIED + importance
+        days = max(0.0, (now - last_verified) / DAY)
+        stale = 1 - math.exp(-change_rate * days)
+        return importance * stale * VERDICT_RISK.get(last_verdict, 1.0)
+
+    def ranked(self, limit=None, now=None, where=None):
+        """Provider rows by descending priority: dicts with the original CSV row under 'provider'."""
+        now = now or time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT provider_id, provider, importance, pages, last_verified, last_verdict, '
+                'change_rate, checks, changes FROM verification').fetchall()
+        out = []
+        for pid, provider, importance, pages, last_verified, verdict, rate, checks, changes in rows:
+            provider = json.loads(provider)
+            if where and not where(provider):
+                continue
+            out.append({
+                'provider_id': pid, 'provider': provider, 'importance': importance,
+                'pages': json.loads(pages), 'last_verified': last_verified,
+                'last_verdict': verdict, 'change_rate': rate, 'checks': checks,
+                'changes': changes,
+                'priority': self.priority(importance, last_verified, verdict, rate, now),
+            })
+        out.sort(key=lambda r: -r['priority'])
+        return out[:limit] if limit else out
+
+    def stream(self, per_hour, limit=None, refresh=900, where=None):
+        """
+        Yield the most urgent providers, at most per_hour of them per hour, up
+        to limit in total. The ranking is recomputed every refresh seconds, so
+        verifications recorded meanwhile are taken into account.
+        """
+        bucket = TokenBucket(per_hour / 3600.0)
+        served, seen = 0, set()
+        while limit is None or served < limit:
+            ranking = [r for r in self.ranked(where=where) if r['provider_id'] not in seen]
+            if not ranking:
+                return
+            started = time.monotonic()
+            for row in ranking:
+                if limit is not None and served >= limit:
+                    return
+                if time.monotonic() - started > refresh:
+                    break
+                bucket.take()
+                seen.add(row['provider_id'])
+                served += 1
+                yield row
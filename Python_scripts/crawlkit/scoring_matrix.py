@@ -0,0 +1,101 @@
+"""
+Provider x pattern hit matrix for batch re-scoring.
+
+The pet-therapy analyzers are linear: each pattern that hits adds a fixed
+weight, then thresholds turn the score into a decision. Building the hit
+matrix is the only expensive step (one regex pass per pattern per site);
+after that, scoring every provider under any weights is one sparse
+matrix-vector product and the thresholds are one np.select.
+
+Columns are (group, name, counter) triples. A counter returns how often its
+pattern hit in a site's text; regex columns return 0/1 so that scores match
+the analyzers' re.search semantics, proximity-style columns return counts.
+"""
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:  # dense fallback: 939 providers x ~60 patterns is tiny
+    sparse = None
+
+
+class ScoringMatrix:
+    def __init__(self, provider_ids, groups, names, matrix, text_lengths, source=''):
+        self.provider_ids = list(provider_ids)
+        self.groups = list(groups)
+        self.names = list(names)
+        self.matrix = matrix
+        self.text_lengths = np.asarray(text_lengths)
+        self.source = source   # what the matrix was built from; a cache is stale when it differs
+
+    @classmethod
+    def build(cls, sites, columns, source=''):
+        """sites: iterable of (provider_id, text); columns: [(group, name, counter)]."""
+        provider_ids, lengths, rows, cols, data = [], [], [], [], []
+        for i, (provider_id, text) in enumerate(sites):
+            provider_ids.append(provider_id)
+            lengths.append(len(text))
+            for j, (_, _, counter) in enumerate(columns):
+                hits = counter(text)
+                if hits:
+                    rows.append(i)
+                    cols.append(j)
+                    data.append(hits)
+        shape = (len(provider_ids), len(columns))
+        matrix = cls._assemble(np.array(data, dtype=np.float32),
+                               np.array(rows, dtype=np.int32),
+                               np.array(cols, dtype=np.int32), shape)
+        return cls(provider_ids, [c[0] for c in columns], [c[1] for c in columns],
+                   matrix, lengths, source)
+
+    @staticmethod
+    def _assemble(data, rows, cols, shape):
+        if sparse is not None:
+            return sparse.csr_matrix((data, (rows, cols)), shape=shape)
+        dense = np.zeros(shape, dtype=np.float32)
+        np.add.at(dense, (rows, cols), data)
+        return dense
+
+    # ------------------------------------------------------------ scoring
+
+    def weight_vector(self, weights):
+        """Per-column weights; a column name overrides its group's weight."""
+        return np.array([weights.get(name, weights.get(group, 0.0))
+                         for group, name in zip(self.groups, self.names)], dtype=np.float32)
+
+    def scores(self, weights):
+        """Score of every provider under weights, as one matrix-vector product."""
+        return np.asarray(self.matrix @ self.weight_vector(weights)).ravel()
+
+    def group_hits(self, group):
+        """Per-provider count of hitting columns in a group (e.g. a veto group)."""
+        mask = np.array([g == group for g in self.groups], dtype=np.float32)
+        return np.asarray((self.matrix > 0).astype(np.float32) @ mask).ravel()
+
+    # ------------------------------------------------------------ cache
+
+    def save(self, path):
+        """Cache the matrix (.npz) so a re-weighting run skips the regex pass."""
+        if sparse is not None:
+            coo = self.matrix.tocoo()
+            rows, cols, data = coo.row, coo.col, coo.data
+        else:
+            rows, cols = np.nonzero(self.matrix)
+            data = self.matrix[rows, cols]
+        np.savez_compressed(path, provider_ids=np.array(self.provider_ids, dtype=str),
+                            groups=np.array(self.groups, dtype=str),
+                            names=np.array(self.names, dtype=str),
+                            text_lengths=self.text_lengths,
+                            data=data, rows=rows, cols=cols,
+                            shape=np.array(self.matrix.shape),
+                            source=np.array(self.source))
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path)
+        matrix = cls._assemble(z['data'], z['rows'], z['cols'], tuple(z['shape']))
+        return cls(z['provider_ids'].tolist(), z['groups'].tolist(),
+                   z['names'].tolist(), matrix, z['text_lengths'],
+                   str(z['source']) if 'source' in z.files else '')
+
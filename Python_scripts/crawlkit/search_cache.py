@@ -0,0 +1,95 @@
+"""
+Parsed search-engine results, kept between runs.
+
+FloridaChurchCrawler and find_churches.py asked DuckDuckGo and Bing the
+same queries on every run: each one a 3-8 s smart_delay and another chance
+of a CAPTCHA, for results that rarely change within a week or two.
+SearchCache keeps the parsed results per (engine, canonical query) in the
+shared state file with an expiry, so a repeated query is answered locally
+and only new or expired ones reach the engines. The key is
+queries.canonical_query(), so "churches autism Miami" finds the results of
+"Miami church autism".
+
+Callers store only what an engine actually answered: a 429, a 403 or a
+CAPTCHA page (which Bing serves with a 200) raises SearchBlocked in
+search_dispatch.raise_for_block before anything is parsed, because a
+cached block would hide the query for the whole TTL. Empty result lists
+are not stored either, so a query that found nothing is tried again.
+"""
+
+import json
+import time
+
+from .queries import canonical_query
+from .state import SqliteStore
+
+DAY = 86400
+TTL_DAYS = 14
+
+
+class SearchCache(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS search_cache (
+        engine     TEXT NOT NULL,
+        query_key  TEXT NOT NULL,
+        query      TEXT NOT NULL,
+        results    TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        hits       INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (engine, query_key)
+    );
+    """
+
+    def __init__(self, ttl_days=TTL_DAYS, db_path=None):
+        super().__init__(db_path)
+        self.ttl = ttl_days * DAY
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, engine, query):
+        """Cached results of query on engine, or None if there are none or they expired."""
+        key = canonical_query(query)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT results FROM search_cache WHERE engine = ? AND query_key = ? AND expires_at > ?',
+                (engine, key, time.time())).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE search_cache SET hits = hits + 1 WHERE engine = ? AND query_key = ?',
+                              (engine, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, engine, query, results, ttl_days=None):
+        """Store results (a JSON-able list) for query on engine; empty lists are not stored."""
+        if not results:
+            return
+        now = time.time()
+        ttl = ttl_days * DAY if ttl_days is not None else self.ttl
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO search_cache (engine, query_key, query, results, fetched_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (engine, canonical_query(query), query, json.dumps(results, default=str), now, now + ttl))
+
+    def search(self, engine, query, fetch):
+        """fetch(query), unless engine's results for query are cached. Returns (results, cached)."""
+        results = self.get(engine, query)
+        if results is not None:
+            return results, True
+        results = fetch(query)
+        self.put(engine, query, results)
+        return results, False
+
+    def purge(self):
+        """Drop expired entries."""
+        with self.lock, self.conn:
+            return self.conn.execute('DELETE FROM search_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+
+    def summary(self):
+        asked = self.hits + self.misses
+        return (f"{self.hits}/{asked} search(es) served from cache"
+                + (f" ({100 * self.hits / asked:.0f}%)" if asked else ""))
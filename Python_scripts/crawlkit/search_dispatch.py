@@ -0,0 +1,310 @@
+"""
+Search queries fanned out to several engines at once, each on its own budget.
+
+run_exhaustive_crawl sent query i to DuckDuckGo when i % 3 == 0, to Bing
+when i % 3 == 1 and only slept on the third, and every search waited on
+the one smart_delay it shared with page scraping. The run went at a
+fraction of one engine's pace while the other sat idle, and a 429 from
+either engine stalled both behind its backoff.
+
+SearchDispatcher gives every engine its own lane:
+
+  * a rate budget (searches per minute, jittered gaps) drawn on only by
+    that engine's searches;
+  * backoff when the engine pushes back (the engine's search function
+    raises SearchBlocked for a 429, a 403 or a CAPTCHA page), doubling per
+    consecutive block;
+  * a circuit breaker: after trip_after consecutive failures the lane opens
+    for cooldown seconds, gives up its queued queries and takes no new
+    ones; the first search after that is a probe that closes it again or
+    re-opens it for twice as long.
+
+Queries are pulled lazily from the caller's iterator and queued on every
+lane that has room (at most `lookahead` waiting per lane), so a fast engine
+is never held to a slow one's pace: search throughput is the sum of the
+engines' allowances, and a blocked engine just stops taking queries while
+the others carry on. Search functions are ordinary blocking calls (a
+CrawlSession GET and a parse) and run in threads.
+
+Results are merged as they arrive, deduplicated by URL across engines and
+queries; every lane outcome is an Answer carrying only the results new to
+the run, and the first copy of a URL lists every engine that returned it
+in its 'source'. With a SearchCache, cached results are served without
+touching the engine's budget and fresh ones are stored.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque, namedtuple
+
+from .redirects import url_key
+
+LOOKAHEAD = 2       # queries waiting per lane (besides the one in flight)
+RETRIES = 1         # further tries of a query on the same engine after a block or error
+MAX_COOLDOWN = 3600
+
+# One lane's outcome for one query. results: the ones new to the run; error:
+# None if the engine answered; done: no other lane still has the query;
+# total / answered: distinct URLs and answering engines for the query so far.
+Answer = namedtuple('Answer', 'query engine results cached error done total answered')
+
+
+class SearchBlocked(Exception):
+    """The engine refused the search (429, 403, CAPTCHA): back off, and count towards the breaker."""
+
+
+def raise_for_block(response):
+    """SearchBlocked for a 429 / 403 / CAPTCHA response, HTTPError for any other error status."""
+    if response.status_code in (403, 429):
+        raise SearchBlocked(f'HTTP {response.status_code}')
+    if 'captcha' in response.text.lower():
+        raise SearchBlocked('CAPTCHA')
+    response.raise_for_status()
+
+
+class Engine:
+    """
+    One engine's lane. search(query) -> [result dicts with a 'url'] is a
+    blocking call. per_minute is the engine's own budget; backoff is the
+    first wait after a block (doubling per consecutive block, up to
+    max_backoff); trip_after consecutive failures open the circuit for
+    cooldown seconds. on_block() runs after every block (e.g. rotate headers).
+    """
+
+    def __init__(self, name, search, per_minute=10, jitter=0.3, backoff=60, max_backoff=900,
+                 trip_after=3, cooldown=600, on_block=None):
+        self.name = name
+        self.search = search
+        self.per_minute = per_minute
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.trip_after = trip_after
+        self.cooldown = cooldown
+        self.on_block = on_block
+        self.queue = deque()     # (query, attempt) waiting for this lane
+        self.wake = None         # asyncio.Event, set when the queue gets work
+        self.next_ok = 0.0       # monotonic time of the next allowed search
+        self.open_until = 0.0    # circuit open (no queries) until then
+        self.failures = 0        # consecutive blocks and errors
+        self.blocks = 0          # consecutive blocks
+        self.trips = 0           # consecutive openings of the circuit
+        self.stats = {'searches': 0, 'cached': 0, 'results': 0, 'blocked': 0, 'errors': 0, 'tripped': 0}
+
+    def gap(self):
+        mean = 60 / self.per_minute
+        return random.uniform(mean * (1 - self.jitter), mean * (1 + self.jitter))
+
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def has_room(self, lookahead):
+        return not self.is_open() and len(self.queue) < lookahead
+
+    def succeeded(self):
+        """True if this closed a circuit that had tripped."""
+        closed = self.trips > 0
+        self.failures = self.blocks = self.trips = 0
+        return closed
+
+    def failed(self, blocked):
+        """Book a block or error; returns the seconds the circuit opened for (0 if it did not)."""
+        now = time.monotonic()
+        self.failures += 1
+        if blocked:
+            self.blocks += 1
+            self.stats['blocked'] += 1
+            self.next_ok = max(self.next_ok, now + min(self.max_backoff, self.backoff * 2 ** (self.blocks - 1)))
+        else:
+            self.stats['errors'] += 1
+        if self.failures < self.trip_after:
+            return 0
+        self.trips += 1
+        self.stats['tripped'] += 1
+        opened = min(MAX_COOLDOWN, self.cooldown * 2 ** (self.trips - 1))
+        self.open_until = now + opened
+        self.next_ok = max(self.next_ok, self.open_until)
+        return opened
+
+
+class SearchDispatcher:
+    """
+    dispatcher = SearchDispatcher([Engine('duckduckgo', ddg, per_minute=8), Engine('bing', bing, 6)])
+    dispatcher.run(queries, handle)    # handle(answer) for every Answer, in arrival order
+    """
+
+    def __init__(self, engines, cache=None, lookahead=LOOKAHEAD, retries=RETRIES, log=print):
+        self.engines = list(engines)
+        self.cache = cache
+        self.lookahead = lookahead
+        self.retries = retries
+        self.log = log
+        self.seen = {}        # URL key -> first result dict with that URL
+        self.duplicates = 0
+        self.completed = 0
+
+    def run(self, queries, handle):
+        """Dispatch queries (any iterable, pulled lazily) and call handle(answer) as answers arrive."""
+        async def drain():
+            async for answer in self.answers(queries):
+                handle(answer)
+        asyncio.run(drain())
+
+    async def answers(self, queries):
+        """Async iterator of Answers for queries."""
+        self.source = iter(queries)
+        self.pending = {}     # query -> {'lanes': names still to answer, 'tried': names given it, 'urls', 'answered'}
+        self.orphans = deque()   # queries given up by every lane they were on, for an engine not yet tried
+        self.exhausted = self.finished = False
+        self.out = asyncio.Queue()
+        for engine in self.engines:
+            engine.queue.clear()
+            engine.wake = asyncio.Event()
+        lanes = [asyncio.create_task(self._lane(engine)) for engine in self.engines]
+        self._feed()
+        try:
+            while True:
+                item = await self.out.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for lane in lanes:
+                lane.cancel()
+            await asyncio.gather(*lanes, return_exceptions=True)
+
+    # ------------------------------------------------------------ internals
+
+    def _feed(self):
+        """Queue orphaned, then new queries on every lane with room; end the run once nothing is left."""
+        for query in list(self.orphans):
+            entry = self.pending[query]
+            lanes = [engine for engine in self.engines
+                     if engine.name not in entry['tried'] and engine.has_room(self.lookahead)]
+            if lanes:
+                self.orphans.remove(query)
+                self._assign(query, lanes)
+        while not self.exhausted:
+            lanes = [engine for engine in self.engines if engine.has_room(self.lookahead)]
+            if not lanes:
+                break
+            query = next(self.source, None)
+            if query is None:
+                self.exhausted = True
+                break
+            self.pending[query] = {'lanes': set(), 'tried': set(), 'urls': set(), 'answered': 0}
+            self._assign(query, lanes)
+        if self.exhausted and not self.pending and not self.finished:
+            self.finished = True
+            self.out.put_nowait(None)
+
+    def _assign(self, query, lanes):
+        entry = self.pending[query]
+        for engine in lanes:
+            entry['lanes'].add(engine.name)
+            entry['tried'].add(engine.name)
+            engine.queue.append((query, 0))
+            engine.wake.set()
+
+    async def _lane(self, engine):
+        try:
+            while True:
+                if not engine.queue:
+                    engine.wake.clear()
+                    await engine.wake.wait()
+                    continue
+                query, attempt = engine.queue.popleft()
+                self._feed()
+                if self.cache is not None:
+                    results = self.cache.get(engine.name, query)
+                    if results is not None:
+                        engine.stats['cached'] += 1
+                        self._settle(engine, query, results, cached=True)
+                        continue
+                delay = engine.next_ok - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                engine.next_ok = time.monotonic() + engine.gap()
+                engine.stats['searches'] += 1
+                blocked = False
+                try:
+                    results = await asyncio.to_thread(engine.search, query)
+                except SearchBlocked as e:
+                    blocked, error = True, f'blocked: {e}'
+                except Exception as e:
+                    error = f'{type(e).__name__}: {str(e)[:100]}'
+                else:
+                    if engine.succeeded():
+                        self.log(f"   ✅ {engine.name} answering again; circuit closed")
+                    if self.cache is not None:
+                        self.cache.put(engine.name, query, results)
+                    self._settle(engine, query, results)
+                    continue
+                opened = engine.failed(blocked)
+                if blocked:
+                    self.log(f"   ⚠️  {engine.name} {error}; next search in "
+                             f"{max(0, engine.next_ok - time.monotonic()):.0f}s")
+                    if engine.on_block:
+                        engine.on_block()
+                if opened:
+                    dropped = [query] + [q for q, _ in engine.queue]
+                    engine.queue.clear()
+                    self.log(f"   🛑 {engine.name}: {engine.failures} failures in a row; circuit open for "
+                             f"{opened:.0f}s, {len(dropped)} quer(ies) left to the other engines")
+                    for q in dropped:
+                        self._settle(engine, q, [], error=error)
+                    while engine.is_open():
+                        await asyncio.sleep(engine.open_until - time.monotonic())
+                    self._feed()
+                elif attempt < self.retries:
+                    engine.queue.appendleft((query, attempt + 1))
+                else:
+                    self._settle(engine, query, [], error=error)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.out.put_nowait(e)
+
+    def _settle(self, engine, query, results, cached=False, error=None):
+        """Merge one lane's outcome for query and queue its Answer."""
+        entry = self.pending[query]
+        entry['lanes'].discard(engine.name)
+        orphaned = error and not entry['lanes'] and not entry['answered'] and any(
+            e.name not in entry['tried'] for e in self.engines)
+        if orphaned:
+            self.orphans.append(query)   # no other engine had it: one that has not tried it gets it
+        new = []
+        if error is None:
+            entry['answered'] += 1
+            engine.stats['results'] += len(results)
+            for result in results:
+                if not result.get('url'):
+                    continue
+                key = url_key(result['url'])
+                entry['urls'].add(key)
+                first = self.seen.get(key)
+                if first is None:
+                    self.seen[key] = result
+                    new.append(result)
+                    continue
+                self.duplicates += 1
+                source = result.get('source')
+                if source and source not in first.get('source', '').split(', '):
+                    first['source'] = f"{first['source']}, {source}" if first.get('source') else source
+        done = not entry['lanes'] and not orphaned
+        if done:
+            del self.pending[query]
+            self.completed += 1
+        self.out.put_nowait(Answer(query, engine.name, new, cached, error, done,
+                                   len(entry['urls']), entry['answered']))
+        if done or orphaned:
+            self._feed()
+
+    def summary(self):
+        lanes = '; '.join(
+            f"{e.name}: {e.stats['searches']} searched, {e.stats['cached']} cached, {e.stats['blocked']} "
+            f"blocked, {e.stats['errors']} error(s), {e.stats['tripped']} circuit trip(s)" for e in self.engines)
+        return f"{lanes}; {len(self.seen)} unique URL(s), {self.duplicates} duplicate(s) merged"
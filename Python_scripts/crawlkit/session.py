@@ -0,0 +1,292 @@
+"""
+The shared fetch layer: a requests.Session that every crawler uses.
+
+Drop-in for requests.Session(). Before each request it consults the
+domain-health store and refuses known-dead hosts; after each request it
+records sticky failures (DNS, TLS, parked pages, repeated timeouts).
+
+Bodies are streamed and capped: non-HTML content types are refused before
+download (or handed to a registered route), each page is cut at
+max_page_bytes and each site at max_site_bytes. A 40 MB brochure PDF or an
+endless chunked response therefore costs at most the cap, never the file.
+The site budget starts with new_site(url): a host never opened that way
+(a directory paged through for a whole run) only has the page cap.
+
+With site_seconds / run_seconds set, every request's timeout is clamped to
+the time left and bodies stop between chunks when it runs out
+(DeadlineExceeded); crawl_status then reports DEADLINE.
+
+Each request's DNS / connect / TLS / TTFB / download times land in
+self.telemetry (crawlkit/telemetry.py); crawlers sleep through
+session.sleep(seconds, reason) so waiting is accounted apart from work.
+
+ASD_CRAWL_RECORD / ASD_CRAWL_REPLAY record every exchange to WARC files or
+serve them back from a local replay server (crawlkit/warc.py).
+
+PDF and DOCX bodies become text through crawlkit/documents.py when a
+crawler registers it (documents.register(session)).
+
+Redirect chains are remembered (crawlkit/redirects.py): a URL that
+redirected before is fetched at its final URL directly, and fetched the
+long way again if that fails.
+"""
+
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from .deadline import DEADLINE, DeadlineExceeded, run_deadline
+from .domain_health import (
+    DomainHealthStore, NEVER_SKIP, PARKED, classify_exception, host_of, looks_parked)
+from .redirects import RedirectStore
+from .telemetry import Telemetry, TimedAdapter
+from .warc import WarcRecorder, from_replay, replay_base, to_replay
+
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+MAX_SITE_BYTES = 8 * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+
+# Content types handed to the caller as-is. Anything else needs a route.
+TEXT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain',
+              'application/xml', 'text/xml')
+
+
+class DeadDomainError(requests.exceptions.ConnectionError):
+    """Raised instead of fetching a host the health store has marked dead."""
+
+    def __init__(self, record):
+        self.host = record['host']
+        self.status = record['status']
+        super().__init__(f"{self.host} skipped: {self.status} "
+                         f"({record.get('reason') or 'cached'})")
+
+
+class SkippedContent(requests.RequestException):
+    """Raised when a body is not downloaded (wrong type or budget spent)."""
+
+    def __init__(self, url, reason):
+        self.reason = reason
+        super().__init__(f"{url}: {reason}")
+
+
+class CrawlSession(requests.Session):
+    def __init__(self, health=None, max_page_bytes=MAX_PAGE_BYTES,
+                 max_site_bytes=MAX_SITE_BYTES, site_seconds=None, run_seconds=None,
+                 name='crawl', telemetry=None, recorder=None, replay=None, redirects=None):
+        super().__init__()
+        self.mount('http://', TimedAdapter())
+        self.mount('https://', TimedAdapter())
+        self.telemetry = telemetry if telemetry is not None else Telemetry(name)
+        self.recorder = recorder if recorder is not None else WarcRecorder.from_env(name)
+        self.replay = replay or replay_base()   # base URL of a warc_replay.py server
+        self.health = health if health is not None else DomainHealthStore()
+        self.redirects = redirects if redirects is not None else RedirectStore()
+        self.max_page_bytes = max_page_bytes
+        self.max_site_bytes = max_site_bytes
+        self.site_seconds = site_seconds
+        self.run_deadline = run_deadline(run_seconds)
+        self.deadline = self.run_deadline   # replaced per site by new_site
+        self.routes = {}   # content-type prefix -> (handler(url, body, type), max bytes or None)
+        self.sites = {}    # host -> {'bytes', 'pages', 'truncated', 'skipped', 'deadline', 'budget'}
+
+    # ------------------------------------------------------------ per site
+
+    def new_site(self, url):
+        """Start a fresh byte budget and deadline for url's host; return its stats."""
+        stats = self.sites[host_of(url)] = self._blank_stats(budget=True)
+        self.deadline = self.run_deadline.child(self.site_seconds)
+        return stats
+
+    def site_stats(self, url):
+        """Stats of url's site; a host not opened with new_site() gets them without a byte budget."""
+        return self.sites.setdefault(host_of(url), self._blank_stats(budget=False))
+
+    @staticmethod
+    def _blank_stats(budget):
+        return {'bytes': 0, 'pages': 0, 'truncated': 0, 'skipped': 0, 'deadline': False, 'budget': budget}
+
+    def out_of_time(self, url=None):
+        """True once the site (or run) deadline has passed; marks url's site cut short."""
+        if not self.deadline.expired():
+            return False
+        if url:
+            self.site_stats(url)['deadline'] = True
+        return True
+
+    def run_expired(self):
+        return self.run_deadline.expired()
+
+    def crawl_status(self, url, status='Success'):
+        """status, annotated with any truncation/skips seen on url's site.
+
+        A site cut short by its deadline reports DEADLINE instead of Success.
+        """
+        stats = self.site_stats(url)
+        if stats['deadline'] and status == 'Success':
+            status = DEADLINE
+        notes = []
+        if stats['truncated']:
+            notes.append(f"truncated {stats['truncated']} page(s)")
+        if stats['skipped']:
+            notes.append(f"skipped {stats['skipped']} download(s)")
+        return f"{status} ({', '.join(notes)})" if notes else status
+
+    def sleep(self, seconds, reason='delay'):
+        """A deliberate pause (politeness, backoff, cooldown), booked in telemetry.
+
+        Never past the site or run deadline: a 60 s cooldown ends with the run.
+        """
+        left = self.deadline.remaining()
+        if left is not None:
+            seconds = min(seconds, max(0.0, left))
+        self.telemetry.sleep(seconds, reason)
+
+    def route(self, content_type, handler, max_bytes=None):
+        """Send bodies of content_type to handler(url, body, type) -> text.
+
+        max_bytes replaces max_page_bytes for them (a truncated PDF is unreadable);
+        the site budget still applies.
+        """
+        self.routes[content_type.lower()] = (handler, max_bytes)
+
+    # ------------------------------------------------------------ fetching
+
+    def request(self, method, url, *args, **kwargs):
+        final = None
+        if not self.replay and kwargs.get('allow_redirects', True) and method.upper() == 'GET':
+            final = self.redirects.resolve(url)
+        if final and final != url:
+            try:
+                response = self._fetch(method, url, final, *args, **dict(kwargs))
+                if response.status_code < 400:
+                    self.redirects.shortcuts += 1
+                    return response
+            except requests.ConnectionError:
+                pass
+            # The shortcut broke (site moved again, final URL gone): take the long way
+            self.redirects.forget(url)
+        return self._fetch(method, url, url, *args, **kwargs)
+
+    def _fetch(self, method, url, target, *args, **kwargs):
+        """One request for url, sent to target (url itself or its known final URL)."""
+        dead = self.health.check(target)
+        if dead:
+            raise DeadDomainError(dead)
+        if self.out_of_time(url):
+            raise DeadlineExceeded(self.deadline.binding_scope(), url)
+        asked = kwargs.get('timeout')
+        kwargs['timeout'] = self.deadline.clamp(asked)
+        caller_streams = kwargs.get('stream', False)
+        kwargs['stream'] = True
+        started = time.perf_counter()
+        sent = to_replay(self.replay, target) if self.replay else target
+        try:
+            response = super().request(method, sent, *args, **kwargs)
+        except requests.RequestException as e:
+            if isinstance(e, requests.Timeout) and kwargs['timeout'] != asked:
+                # Our clamp, not the host, ran out: no TIMEOUT strike
+                self.site_stats(url)['deadline'] = True
+                self.telemetry.record(host_of(url), DEADLINE, {'total': time.perf_counter() - started})
+                raise DeadlineExceeded(self.deadline.binding_scope(), url) from e
+            kind = classify_exception(e)
+            if kind:
+                self.health.record_failure(target, kind, str(e))
+            self.telemetry.record(host_of(url), kind or type(e).__name__,
+                                  {'total': time.perf_counter() - started})
+            raise
+        if self.replay:
+            for hop in response.history + [response]:
+                hop.url = from_replay(self.replay, hop.url)
+        for hop in response.history:
+            self.record_timing(hop)
+            if self.recorder is not None:
+                self.recorder.record(hop)
+        downloaded = time.perf_counter()
+        try:
+            if not caller_streams and method.upper() != 'HEAD':
+                self.read_capped(url, response)
+        finally:
+            download = time.perf_counter() - downloaded if response._content_consumed else None
+            self.record_timing(response, download)
+            if self.recorder is not None and not caller_streams:
+                # A refused or cut-off body is archived empty/partial, so a replay
+                # refuses or cuts it the same way
+                body = getattr(response, 'raw_body', None)
+                self.recorder.record(response, body or b'', getattr(
+                    response, 'truncated', body is None and method.upper() != 'HEAD'))
+        self.observe(target, response)
+        if response.history and response.status_code < 400:
+            self.redirects.record(url, response)
+        return response
+
+    def record_timing(self, response, download=None):
+        """Telemetry for one HTTP exchange (a redirect hop or the final response)."""
+        timings = dict(getattr(response, 'connection_timings', None) or {})
+        setup = sum(timings.values())
+        timings['ttfb'] = max(0.0, response.elapsed.total_seconds() - setup)
+        timings['download'] = download
+        timings['total'] = setup + timings['ttfb'] + (download or 0.0)
+        nbytes = len(response._content) if response._content_consumed and response._content else 0
+        self.telemetry.record(host_of(response.url), response.status_code, timings, nbytes)
+
+    def read_capped(self, url, response):
+        """Download the body within the page and site budgets."""
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        handler, page_bytes = next((route for prefix, route in self.routes.items()
+                                    if content_type.startswith(prefix)), (None, None))
+        stats = self.site_stats(url)
+        if content_type and handler is None and not content_type.startswith(TEXT_TYPES):
+            response.close()
+            stats['skipped'] += 1
+            raise SkippedContent(url, f"content-type {content_type}")
+
+        budget = page_bytes or self.max_page_bytes
+        if stats['budget'] and urlparse(response.url).hostname not in NEVER_SKIP:
+            budget = min(budget, self.max_site_bytes - stats['bytes'])
+        if budget <= 0:
+            response.close()
+            stats['skipped'] += 1
+            raise SkippedContent(url, 'site byte budget spent')
+
+        chunks, total = [], 0
+        try:
+            for chunk in response.iter_content(CHUNK_BYTES):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total > budget:
+                    break
+                if self.out_of_time(url):
+                    raise DeadlineExceeded(self.deadline.binding_scope(), url)
+        finally:
+            response.close()
+        body = b''.join(chunks)
+        response.truncated = len(body) > budget
+        body = body[:budget]
+        stats['bytes'] += len(body)
+        stats['pages'] += 1
+        stats['truncated'] += response.truncated
+        response.raw_body = body
+
+        if handler is not None:
+            text = handler(url, body, content_type)
+            if text is None:
+                stats['skipped'] += 1
+                raise SkippedContent(url, f"no text from {content_type}")
+            body = text.encode('utf-8')
+            # The headers stay as the server sent them (the WARC recorder archives
+            # them with the raw body, so a replay extracts again); the type the
+            # text came from is kept apart
+            response.extracted_from = content_type
+            response.encoding = 'utf-8'
+        response._content = body
+        response._content_consumed = True
+
+    def observe(self, url, response):
+        """Update the health record of url's host from a completed response."""
+        content_type = response.headers.get('Content-Type', '')
+        if (response.ok and 'html' in content_type and response._content_consumed
+                and looks_parked(response.text)):
+            self.health.record_failure(url, PARKED, 'parked-domain page')
+        elif response.status_code < 500:
+            self.health.record_success(url)
@@ -0,0 +1,47 @@
+"""
+Shared on-disk state for the crawlers.
+
+Every crawlkit store (domain health, redirects, corpus index, ...) keeps its
+tables in one SQLite file so a crawl run started from any folder sees what
+earlier runs learned. Override the location with ASD_CRAWL_STATE.
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_DB = Path.home() / '.asd-directory' / 'crawl_state.db'
+
+
+def default_db_path():
+    """Path of the shared state database (ASD_CRAWL_STATE wins)."""
+    path = Path(os.environ.get('ASD_CRAWL_STATE') or DEFAULT_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def connect(db_path=None):
+    """Open the state database in WAL mode, usable from several threads."""
+    conn = sqlite3.connect(str(db_path or default_db_path()),
+                           timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SqliteStore:
+    """Base for the small stores: one connection, one lock, one schema."""
+
+    SCHEMA = ''
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        self.conn = connect(self.db_path)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,350 @@
+"""
+Keyword scoring that runs while a site is being crawled.
+
+The pet-therapy crawlers joined every page into one string
+(full_text = text + ' ' + ' '.join(subpage_texts)) and only then ran
+their keyword lists over it: the whole site's text was held twice, nothing
+was scored until the last subpage arrived, and every subpage was fetched
+even when the homepage had already settled the verdict.
+
+StreamMatcher takes the pages one at a time (feed()), in fixed-size chunks,
+and keeps the same answers as a search over the joined text:
+
+  * a short tail of each chunk is carried into the next (HOLD chars held
+    back, LOOKBEHIND chars of context), so a phrase or \\b boundary split
+    across chunks or pages still matches;
+  * WindowRule state ("A unless B later on the line", "A with C within N")
+    is kept per line across chunks instead of re-searching the text;
+  * ProximityCounter counts animal-near-therapy words over a sliding word
+    window, exactly as the crawlers' check_animal_therapy_proximity.
+
+After each page, decided() says whether any further text could still
+change the outcome. With a veto group (fixed_strict's animal rehab) only a
+veto hit does: a veto could turn up on any later page and overrides the
+score. Without one, score bounds (confirmed hits vs. everything that could
+still match) that fall into one decision band also settle it; a counter
+with a positive weight has no upper bound until the end, so only the top
+band can be reached early then. The crawler stops fetching subpages there
+and records the site as cut short; finish() then closes the stream and
+analyze_content reads the hits.
+"""
+
+import re
+from collections import deque
+
+from .windowed import WindowRule
+
+CHUNK_SIZE = 64 * 1024
+HOLD = 256         # longest match the scanner guarantees across a chunk boundary
+LOOKBEHIND = 64    # context kept before the scan point, for \b and lookbehinds
+
+
+class _RuleState:
+    """Whether one keyword (regex string or WindowRule) matched, fed region by region."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.name = str(rule)
+        self.windowed = isinstance(rule, WindowRule)
+        self.pattern = None if self.windowed else re.compile(rule, re.IGNORECASE)
+        self.certain = False   # matched, and no later text can undo it
+        self._reset_line()
+
+    def _reset_line(self):
+        self.ends = []         # unbounded: ends of A after the last B on this line
+        self.last_c = None     # unbounded: start of the last C on this line
+        self.pending = []      # bounded: [end, cancelled, satisfied] awaiting their window
+
+    def scan(self, buffer, offset, lo, hi, newlines):
+        """Process matches starting at stream positions [lo, hi); buffer starts at offset."""
+        if self.certain:
+            return
+        if not self.windowed:
+            m = self.pattern.search(buffer, lo - offset)
+            self.certain = bool(m and m.start() + offset < hi)
+            return
+        found = self.rule.events(buffer, lo - offset, hi - offset, kinds=('term',))
+        open_line = self.ends or self.pending
+        if not (found or open_line):
+            return   # B and C change nothing before an A
+        start = lo - offset if open_line else found[0][0]
+        found += self.rule.events(buffer, start, hi - offset, kinds=('unless', 'requires'))
+        events = [(offset + start, kind, end and offset + end) for start, kind, end in found]
+        events += [(p, 'line', None) for p in newlines]
+        events.sort(key=lambda event: event[0])
+        for position, kind, end in events:
+            if kind == 'line':
+                self.close_line()
+            else:
+                self._event(position, kind, end)
+            if self.certain:
+                return
+        self._resolve(hi)
+
+    def _event(self, position, kind, end):
+        within = self.rule.within
+        if within is None:
+            if kind == 'term':
+                self.ends.append(end)
+            elif kind == 'unless':
+                self.ends = [e for e in self.ends if e > position]
+            else:
+                self.last_c = position
+            if self.rule.unless is None and self.line_value():
+                self.certain = True   # nothing later on the line can undo it
+        elif kind == 'term':
+            self.pending.append([end, False, False])
+        else:
+            for entry in self.pending:
+                if entry[0] <= position <= entry[0] + within:
+                    entry[1 if kind == 'unless' else 2] = True
+
+    def _resolve(self, done):
+        """Bounded rules: settle occurrences whose window lies before stream position done."""
+        if self.rule.within is None:
+            return
+        still = []
+        for entry in self.pending:
+            if entry[0] + self.rule.within < done:
+                self.certain = self.certain or self._passes(entry)
+            else:
+                still.append(entry)
+        self.pending = still
+
+    def _passes(self, entry):
+        return not entry[1] and (self.rule.requires is None or entry[2])
+
+    def line_value(self):
+        """Would the current line match if it ended here."""
+        if self.rule.within is not None:
+            return any(self._passes(entry) for entry in self.pending)
+        if self.rule.requires is not None:
+            return self.last_c is not None and any(e <= self.last_c for e in self.ends)
+        return bool(self.ends)
+
+    def close_line(self):
+        if self.windowed and self.line_value():
+            self.certain = True
+        self._reset_line()
+
+
+class ProximityCounter:
+    """
+    Words matching an anchor pattern with a `near` word among the `words`
+    words before or words-1 after it - the crawlers' proximity check, one
+    count (and label "anchor + near") per matching anchor pattern per word.
+    Patterns are case-sensitive and single-word, as there.
+    """
+
+    def __init__(self, anchors, near, words=25, keep=3):
+        self.anchors = [(p, re.compile(p)) for p in anchors]
+        self.near = [(p, re.compile(p)) for p in near]
+        # Most words match nothing: one alternation rules them out before the per-pattern checks
+        self.any_anchor = re.compile('|'.join(f'(?:{p})' for p in anchors))
+        self.any_near = re.compile('|'.join(f'(?:{p})' for p in near))
+        self.before = words
+        self.after = words - 1
+        self.keep = keep
+        self.count = 0
+        self.labels = []       # first `keep` labels, in text order
+        self.window = deque()  # (anchor names, near indexes) per word, from word self.base on
+        self.base = 0
+        self.pending = deque() # word indexes with an anchor hit, waiting for their window
+        self.seen = 0
+
+    def feed_words(self, words):
+        for word in words:
+            hits = [name for name, p in self.anchors if p.search(word)] if self.any_anchor.search(word) else ()
+            near = {i for i, (_, p) in enumerate(self.near) if p.search(word)} if self.any_near.search(word) else ()
+            self.window.append((hits, near))
+            if hits:
+                self.pending.append(self.seen)
+            self.seen += 1
+            while self.pending and self.pending[0] + self.after < self.seen:
+                self._settle(self.pending.popleft())
+            self._trim()
+
+    def finish(self):
+        while self.pending:
+            self._settle(self.pending.popleft())
+
+    def minimum(self):
+        """The final count can be no lower: pending anchors that already have a near word count."""
+        extra = 0
+        for index in self.pending:
+            start = max(self.base, index - self.before) - self.base
+            if any(self.window[j][1] for j in range(start, self.seen - self.base)):
+                extra += len(self.window[index - self.base][0])
+        return self.count + extra
+
+    def _settle(self, index):
+        start = max(self.base, index - self.before)
+        stop = min(self.seen, index + self.after + 1)
+        near = set()
+        for j in range(start - self.base, stop - self.base):
+            near.update(self.window[j][1])
+        if not near:
+            return
+        label = self.near[min(near)][0]
+        for name in self.window[index - self.base][0]:
+            self.count += 1
+            if len(self.labels) < self.keep:
+                self.labels.append(f"{name} + {label}")
+
+    def _trim(self):
+        oldest = self.pending[0] if self.pending else self.seen
+        while self.base < oldest - self.before:
+            self.window.popleft()
+            self.base += 1
+
+
+class StreamMatcher:
+    """
+    groups: {group: [keyword rules]}, each rule counted once if it matches.
+    counters: {group: ProximityCounter}. weights: points per hit per group.
+    bands: [(min score, outcome)] high to low, default below them all;
+    veto: (group, outcome) - any hit in that group decides the outcome;
+    after one, only the veto group is still tracked.
+    """
+
+    def __init__(self, groups, counters=None, weights=None, bands=(), default=None, veto=None,
+                 chunk_size=CHUNK_SIZE):
+        self.rules = {group: [_RuleState(rule) for rule in rules] for group, rules in groups.items()}
+        self.counters = counters or {}
+        self.weights = weights or {}
+        self.bands = list(bands)
+        self.default = default
+        self.veto = veto
+        self.chunk_size = chunk_size
+        self.pages = 0
+        self.chars = 0         # stream length so far
+        self.done = 0          # stream position up to which matches are settled
+        self.tail = ''         # text from done - LOOKBEHIND on
+        self.partial = ''      # unfinished last word, for the counters
+        self.vetoed = False
+        self.finished = False
+
+    # ------------------------------------------------------------ feeding
+
+    def feed(self, text):
+        """Add one page; pages are separated by a space, as in the joined site text."""
+        if self.finished:
+            raise ValueError('StreamMatcher already finished')
+        if self.pages:
+            self._consume(' ')
+        self.pages += 1
+        text = text or ''
+        for i in range(0, len(text), self.chunk_size):
+            self._consume(text[i:i + self.chunk_size])
+        self._page_end()
+        return self
+
+    def _page_end(self):
+        """
+        The held-back text is followed by a separator or the end of the stream,
+        so a plain keyword matched in it is final; settle those now, so that
+        decided() sees the whole page.
+        """
+        offset = self.chars - len(self.tail)
+        for group, states in self.rules.items():
+            if self.vetoed and group != self.veto[0]:
+                continue
+            for state in states:
+                if not (state.certain or state.windowed):
+                    state.certain = state.pattern.search(self.tail, self.done - offset) is not None
+        if self.veto:
+            self.vetoed = any(s.certain for s in self.rules[self.veto[0]])
+
+    def finish(self):
+        """No more pages: settle everything still held back. Returns self."""
+        if not self.finished:
+            self._consume('', final=True)
+            for states in self.rules.values():
+                for state in states:
+                    state.close_line()
+            for counter in self.counters.values():
+                counter.finish()
+            self.finished = True
+        return self
+
+    def _consume(self, piece, final=False):
+        offset = self.chars - len(self.tail)
+        buffer = self.tail + piece
+        self.chars += len(piece)
+        hi = self.chars if final else self.chars - HOLD
+        if hi > self.done:
+            region = buffer[self.done - offset:hi - offset]
+            newlines = [self.done + m.start() for m in re.finditer('\n', region)]
+            # Veto group first: once it hits, nothing else needs scanning
+            groups = sorted(self.rules, key=lambda group: not self.veto or group != self.veto[0])
+            for group in groups:
+                if self.vetoed and group != self.veto[0]:
+                    break
+                for state in self.rules[group]:
+                    state.scan(buffer, offset, self.done, hi, newlines)
+                if self.veto and group == self.veto[0]:
+                    self.vetoed = any(s.certain for s in self.rules[group])
+            self.done = hi
+        self.tail = buffer[max(0, self.done - LOOKBEHIND - offset):]
+
+        if self.counters and not self.vetoed:
+            text = self.partial + piece
+            words = text.split()
+            self.partial = words.pop() if words and not final and not text[-1].isspace() else ''
+            for counter in self.counters.values():
+                counter.feed_words(words)
+
+    # ------------------------------------------------------------ results
+
+    def matched(self, group):
+        """Names of the group's rules confirmed so far (all matches once finished), in list order."""
+        return [s.name for s in self.rules.get(group, ()) if s.certain]
+
+    def count(self, group):
+        return self.counters[group].count
+
+    def labels(self, group):
+        return self.counters[group].labels
+
+    def bounds(self):
+        """(lowest, highest) score the finished stream can still have, veto group aside."""
+        lo = hi = 0
+        for group, states in self.rules.items():
+            w = self.weights.get(group, 0)
+            if not w or (self.veto and group == self.veto[0]):
+                continue
+            for s in states:
+                possible = not self.finished or s.certain
+                if w > 0:
+                    lo += w if s.certain else 0
+                    hi += w if possible else 0
+                else:
+                    lo += w if possible else 0
+                    hi += w if s.certain else 0
+        for group, counter in self.counters.items():
+            w = self.weights.get(group, 0)
+            if w > 0:
+                lo += w * counter.minimum()
+                hi = hi + w * counter.count if self.finished else float('inf')
+            elif w < 0:
+                hi += w * counter.minimum()
+                lo = lo + w * counter.count if self.finished else float('-inf')
+        return lo, hi
+
+    def outcome(self, score):
+        for floor, outcome in self.bands:
+            if score >= floor:
+                return outcome
+        return self.default
+
+    def decided(self):
+        """The outcome if no further text can change it, else None."""
+        if self.veto:
+            group, outcome = self.veto
+            if self.vetoed or any(s.certain for s in self.rules[group]):
+                return outcome
+            if not self.finished:
+                return None   # a veto hit could still turn up on any page
+        lo, hi = self.bounds()
+        low, high = self.outcome(lo), self.outcome(hi)
+        return low if low == high else None
@@ -0,0 +1,288 @@
+"""
+Crawl telemetry: where the time of a run goes.
+
+Every CrawlSession carries a Telemetry. Its transport adapter times each new
+connection (DNS, TCP connect, TLS handshake); the session adds time to first
+byte (requests' elapsed minus connection setup) and body download, bytes and
+status, into per-host histograms. Deliberate waits go through
+session.sleep(seconds, reason) and are booked separately, so a snapshot
+splits wall time into sleeping, network and everything else (parsing,
+analysis).
+
+Snapshots are written as JSON and Prometheus text exposition beside the
+state file (telemetry/<name>.json, telemetry/<name>.prom; ASD_CRAWL_TELEMETRY
+picks another directory) every `interval` seconds during a run and once at
+exit. `python -m crawlkit.telemetry <name>` prints a summary.
+"""
+
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .state import default_db_path
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'total')
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+EXPORT_INTERVAL = 60
+
+
+def telemetry_dir():
+    path = Path(os.environ.get('ASD_CRAWL_TELEMETRY') or default_db_path().parent / 'telemetry')
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ------------------------------------------------------------ transport
+
+# urllib3 resolves inside create_connection() and then tries every address in
+# turn; getaddrinfo is wrapped once so that a connection being opened on this
+# thread can book the lookup it already does, without resolving a second time
+_resolving = threading.local()
+_getaddrinfo = socket.getaddrinfo
+
+
+def _timed_getaddrinfo(*args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return _getaddrinfo(*args, **kwargs)
+    finally:
+        timings = getattr(_resolving, 'timings', None)
+        if timings is not None:
+            timings['dns'] += time.perf_counter() - started
+
+
+if getattr(socket.getaddrinfo, '__name__', '') != '_timed_getaddrinfo':
+    socket.getaddrinfo = _timed_getaddrinfo
+
+
+class _TimedConnection:
+    """Records DNS / connect / TLS seconds of the connection in self.timings."""
+
+    timings = None
+
+    def _new_conn(self):
+        timings = {'dns': 0.0}
+        _resolving.timings = timings
+        started = time.perf_counter()
+        try:
+            sock = super()._new_conn()
+        finally:
+            _resolving.timings = None
+        timings['connect'] = max(0.0, time.perf_counter() - started - timings['dns'])
+        self.timings = timings
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if self.timings is not None:
+            setup = self.timings['dns'] + self.timings['connect']
+            self.timings['tls'] = max(0.0, time.perf_counter() - started - setup)
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter that leaves response.connection_timings (empty on a reused connection)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        conn = getattr(response.raw, 'connection', None)
+        response.connection_timings = (getattr(conn, 'timings', None) or {}) if conn else {}
+        if conn is not None:
+            conn.timings = None
+        return response
+
+
+# ------------------------------------------------------------ recording
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.sum += seconds
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty)."""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return bound
+        return BUCKETS[-1]
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': round(self.sum, 4), 'buckets': self.counts,
+                'p50': self.quantile(0.5), 'p90': self.quantile(0.9), 'p99': self.quantile(0.99)}
+
+
+class Telemetry:
+    def __init__(self, name='crawl', directory=None, interval=EXPORT_INTERVAL):
+        self.name = name
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_export = time.monotonic()
+        self.hosts = defaultdict(lambda: {'requests': 0, 'bytes': 0, 'status': defaultdict(int),
+                                          'phases': defaultdict(Histogram)})
+        self.network = 0.0
+        self.sleeps = defaultdict(float)
+        atexit.register(self.export)
+
+    def record(self, host, status, seconds, nbytes=0):
+        """One request. seconds: {phase: seconds}; status: HTTP code or failure kind."""
+        with self.lock:
+            stats = self.hosts[host or '-']
+            stats['requests'] += 1
+            stats['bytes'] += nbytes
+            stats['status'][str(status)] += 1
+            for phase, value in seconds.items():
+                if value is not None:
+                    stats['phases'][phase].observe(value)
+            self.network += seconds.get('total') or 0.0
+        self.maybe_export()
+
+    def sleep(self, seconds, reason='delay'):
+        """time.sleep, booked as deliberate waiting under reason."""
+        seconds = max(0.0, seconds)
+        time.sleep(seconds)
+        with self.lock:
+            self.sleeps[reason] += seconds
+        self.maybe_export()
+
+    # ------------------------------------------------------------ export
+
+    def snapshot(self):
+        with self.lock:
+            wall = time.time() - self.started
+            slept = sum(self.sleeps.values())
+            hosts = {host: {'requests': s['requests'], 'bytes': s['bytes'],
+                            'status': dict(s['status']),
+                            'phases': {p: h.to_dict() for p, h in s['phases'].items()}}
+                     for host, s in self.hosts.items()}
+            return {
+                'name': self.name, 'started': self.started, 'wall_seconds': round(wall, 3),
+                'sleep_seconds': round(slept, 3), 'sleep_by_reason': {k: round(v, 3) for k, v in self.sleeps.items()},
+                # network is summed over threads, so with a pool it can exceed wall time
+                'network_seconds': round(self.network, 3),
+                'other_seconds': round(max(0.0, wall - slept - self.network), 3),
+                'requests': sum(s['requests'] for s in hosts.values()),
+                'bytes': sum(s['bytes'] for s in hosts.values()),
+                'buckets': [b if b != float('inf') else '+Inf' for b in BUCKETS],
+                'hosts': hosts,
+            }
+
+    def maybe_export(self):
+        if self.interval and time.monotonic() - self.last_export >= self.interval:
+            self.export()
+
+    def export(self):
+        """Write <name>.json and <name>.prom; returns the JSON path."""
+        self.last_export = time.monotonic()
+        snap = self.snapshot()
+        if not snap['requests'] and not snap['sleep_seconds']:
+            return None
+        directory = self.directory or telemetry_dir()
+        path = directory / f'{self.name}.json'
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(snap, indent=1), encoding='utf-8')
+        os.replace(tmp, path)
+        prom = directory / f'{self.name}.prom'
+        tmp = prom.with_suffix('.prom.tmp')
+        tmp.write_text(prometheus_text(snap), encoding='utf-8')
+        os.replace(tmp, prom)
+        return path
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{str(v)}"' for k, v in labels.items()) + '}'
+
+
+def prometheus_text(snap):
+    run = snap['name']
+    lines = [
+        '# TYPE crawl_wall_seconds gauge', f"crawl_wall_seconds{_labels(run=run)} {snap['wall_seconds']}",
+        '# TYPE crawl_network_seconds_total counter',
+        f"crawl_network_seconds_total{_labels(run=run)} {snap['network_seconds']}",
+        '# TYPE crawl_sleep_seconds_total counter',
+    ]
+    lines += [f"crawl_sleep_seconds_total{_labels(run=run, reason=r)} {v}"
+              for r, v in snap['sleep_by_reason'].items()]
+    lines += ['# TYPE crawl_requests_total counter']
+    lines += [f"crawl_requests_total{_labels(run=run, host=h, status=s)} {n}"
+              for h, stats in snap['hosts'].items() for s, n in stats['status'].items()]
+    lines += ['# TYPE crawl_bytes_total counter']
+    lines += [f"crawl_bytes_total{_labels(run=run, host=h)} {stats['bytes']}"
+              for h, stats in snap['hosts'].items()]
+    lines += ['# TYPE crawl_request_seconds histogram']
+    for host, stats in snap['hosts'].items():
+        for phase, hist in stats['phases'].items():
+            cumulative = 0
+            for bound, n in zip(snap['buckets'], hist['buckets']):
+                cumulative += n
+                lines.append(f"crawl_request_seconds_bucket{_labels(run=run, host=host, phase=phase, le=bound)} {cumulative}")
+            lines.append(f"crawl_request_seconds_sum{_labels(run=run, host=host, phase=phase)} {hist['sum']}")
+            lines.append(f"crawl_request_seconds_count{_labels(run=run, host=host, phase=phase)} {hist['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    # python -m crawlkit.telemetry <name or path.json> [--top 15]
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else 'crawl'
+    top = int(sys.argv[sys.argv.index('--top') + 1]) if '--top' in sys.argv else 15
+    path = Path(target) if target.endswith('.json') else telemetry_dir() / f'{target}.json'
+    snap = json.loads(path.read_text(encoding='utf-8'))
+    wall = snap['wall_seconds'] or 1
+    print(f"{snap['name']}: {snap['requests']} requests, {snap['bytes'] / 1e6:.1f} MB in {wall:.0f}s")
+    for label, key in (('sleeping', 'sleep_seconds'), ('network', 'network_seconds'), ('other work', 'other_seconds')):
+        print(f"  {label:<11} {snap[key]:>9.1f}s  {100 * snap[key] / wall:5.1f}%")
+    for reason, seconds in sorted(snap['sleep_by_reason'].items(), key=lambda kv: -kv[1]):
+        print(f"    sleep/{reason:<16} {seconds:>9.1f}s")
+    print(f"\n  {'host':<40} {'reqs':>5} {'total s':>8} {'p50 ttfb':>9} {'p99 total':>10}")
+    hosts = sorted(snap['hosts'].items(), key=lambda kv: -kv[1]['phases'].get('total', {}).get('sum', 0))
+    for host, stats in hosts[:top]:
+        total = stats['phases'].get('total', {})
+        ttfb = stats['phases'].get('ttfb', {})
+        print(f"  {host[:40]:<40} {stats['requests']:>5} {total.get('sum', 0):>8.1f} "
+              f"{ttfb.get('p50') or '-':>9} {total.get('p99') or '-':>10}")
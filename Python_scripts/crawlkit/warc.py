@@ -0,0 +1,198 @@
+"""
+WARC recording and replay of crawl traffic.
+
+With ASD_CRAWL_RECORD=<dir> every CrawlSession writes the HTTP exchanges it
+makes (request + response record per hop, redirects included) to
+<dir>/<name>-<timestamp>.warc.gz, one gzip member per record as in any web
+archive. Bodies are stored as the crawler saw them: decoded, and capped by
+the session's byte budget (WARC-Truncated: length).
+
+With ASD_CRAWL_REPLAY=<base URL> (a warc_replay.py server) the session sends
+every request to <base>/<original URL> instead; the server answers from the
+archive and rewrites redirects the same way, and the session puts the
+original URLs back on the responses. Crawlers run unchanged, offline and
+against exactly the same pages every time.
+"""
+
+import gzip
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urljoin
+
+# Headers that describe the transfer, not the (decoded) body we store
+HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+
+def _warc_date():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _record(warc_type, uri, block, content_type, extra=None):
+    record_id = f'<urn:uuid:{uuid.uuid4()}>'
+    headers = [('WARC-Type', warc_type), ('WARC-Record-ID', record_id),
+               ('WARC-Date', _warc_date()), ('WARC-Target-URI', uri),
+               ('Content-Type', content_type)]
+    headers += list((extra or {}).items())
+    headers.append(('Content-Length', str(len(block))))
+    head = 'WARC/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers) + '\r\n'
+    return record_id, head.encode('utf-8') + block + b'\r\n\r\n'
+
+
+def http_request_block(prepared):
+    target = prepared.path_url or '/'
+    lines = [f'{prepared.method} {target} HTTP/1.1']
+    lines += [f'{k}: {v}' for k, v in prepared.headers.items()]
+    body = prepared.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace') + body
+
+
+def http_response_block(response, body):
+    reason = response.reason or ''
+    lines = [f'HTTP/1.1 {response.status_code} {reason}']
+    lines += [f'{k}: {v}' for k, v in response.headers.items() if k.lower() not in HOP_HEADERS]
+    lines.append(f'Content-Length: {len(body)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace') + body
+
+
+class WarcRecorder:
+    """Appends request/response record pairs to one .warc.gz file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.records = 0   # the warcinfo header goes in with the first record
+
+    @classmethod
+    def from_env(cls, name):
+        directory = os.environ.get('ASD_CRAWL_RECORD')
+        if not directory:
+            return None
+        return cls(Path(directory) / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.warc.gz")
+
+    def write(self, warc_type, uri, block, content_type, extra=None):
+        record_id, data = _record(warc_type, uri, block, content_type, extra)
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                if not self.records:
+                    _, info = _record('warcinfo', '', b'software: crawlkit\r\nformat: WARC File Format 1.1\r\n',
+                                      'application/warc-fields')
+                    f.write(gzip.compress(info))
+                    self.records += 1
+                f.write(gzip.compress(data))
+            self.records += 1
+        return record_id
+
+    def record(self, response, body=None, truncated=False):
+        """One exchange: response (a requests.Response) and the body bytes the crawler read."""
+        body = body if body is not None else (response._content if response._content_consumed else b'') or b''
+        extra = {'WARC-Truncated': 'length'} if truncated else {}
+        response_id = self.write('response', response.url, http_response_block(response, body),
+                                 'application/http;msgtype=response', extra)
+        self.write('request', response.url, http_request_block(response.request),
+                   'application/http;msgtype=request', {'WARC-Concurrent-To': response_id})
+
+
+# ------------------------------------------------------------ reading
+
+def read_records(path):
+    """Yield (warc headers dict, block bytes) for every record in a .warc or .warc.gz."""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            headers = {}
+            for line in iter(f.readline, b'\r\n'):
+                if not line:
+                    return
+                key, _, value = line.decode('utf-8').partition(':')
+                headers[key.strip()] = value.strip()
+            yield headers, f.read(int(headers.get('Content-Length', 0)))
+
+
+def parse_http_response(block):
+    """(status, reason, [(name, value)], body) from an application/http response block."""
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    _, status, reason = (lines[0].split(' ', 2) + [''])[:3]
+    headers = [tuple(s.strip() for s in line.split(':', 1)) for line in lines[1:] if ':' in line]
+    return int(status), reason, headers, body
+
+
+class WarcArchive:
+    """In-memory index of recorded responses: (method, url) -> latest exchange."""
+
+    def __init__(self, paths):
+        self.responses = {}
+        pending = {}
+        for path in paths:
+            for headers, block in read_records(path):
+                kind = headers.get('WARC-Type')
+                if kind == 'response':
+                    pending[headers['WARC-Record-ID']] = (headers['WARC-Target-URI'], block)
+                elif kind == 'request' and headers.get('WARC-Concurrent-To') in pending:
+                    url, response = pending.pop(headers['WARC-Concurrent-To'])
+                    method = block.split(b' ', 1)[0].decode('latin-1')
+                    self.responses[(method, url)] = parse_http_response(response)
+        for url, response in pending.values():   # responses without a request record
+            self.responses.setdefault(('GET', url), parse_http_response(response))
+
+    def __len__(self):
+        return len(self.responses)
+
+    def lookup(self, method, url):
+        """The recorded exchange for url (GET stands in for HEAD; trailing slash ignored)."""
+        methods = [method, 'GET'] if method == 'HEAD' else [method]
+        variants = [url, url.rstrip('/'), url + '/'] if not url.endswith('/') else [url, url.rstrip('/')]
+        for m in methods:
+            for candidate in variants:
+                if (m, candidate) in self.responses:
+                    return self.responses[(m, candidate)]
+        return None
+
+
+# ------------------------------------------------------------ replay URLs
+
+def replay_base():
+    return (os.environ.get('ASD_CRAWL_REPLAY') or '').rstrip('/') or None
+
+
+def to_replay(base, url):
+    return f'{base}/{url}'
+
+
+def from_replay(base, url):
+    prefix = base + '/'
+    return url[len(prefix):] if url.startswith(prefix) else url
+
+
+def rewrite_location(original_url, location):
+    """Location header of a replayed redirect, pointing back into the replay server."""
+    return '/' + urljoin(original_url, location)
+
+
+def replay_response(archive, method, url):
+    """(status, headers, body) the replay server sends for url."""
+    found = archive.lookup(method, url)
+    if found is None:
+        return 504, [('X-Replay', 'miss'), ('Content-Type', 'text/plain')], b'not in archive: ' + url.encode()
+    status, _, headers, body = found
+    out = []
+    for name, value in headers:
+        if name.lower() == 'location':
+            value = rewrite_location(url, value)
+        if name.lower() not in HOP_HEADERS:
+            out.append((name, value))
+    out.append(('X-Replay', 'hit'))
+    return status, out, b'' if method == 'HEAD' else body
+
@@ -0,0 +1,169 @@
+"""
+"Term A, not followed by B (within N chars)" rules in linear time.
+
+The pet-therapy exclusion lists used patterns like
+
+    physical therapy(?!.*(?:horse|equine|dog|animal|pet))
+    chiropractic(?!.*(?:horse|...)).*(?:for people|human)
+
+against whole-site text. For every occurrence of the term the regex engine
+re-scans the rest of the line, so a long page with many occurrences and no
+B costs O(n^2) and can pin a core for minutes.
+
+WindowRule answers the same question from match positions instead: find
+every start of A, B (unless) and C (requires) once - each a plain scan -
+then decide with the last positions (within=None, the exact semantics of
+the `.*` patterns above) or a bisect per occurrence of A (within=N chars).
+Total work is linear in the text for the short literal alternations these
+lists use.
+
+Both plain regex strings and WindowRule objects can sit in the same keyword
+list; search() and compile_rule() accept either.
+"""
+
+import re
+import time
+from bisect import bisect_left
+
+
+class WindowRule:
+    def __init__(self, term, unless=None, requires=None, within=None):
+        self.term = term
+        self.unless = unless
+        self.requires = requires
+        self.within = within
+        self._term = re.compile(f'(?=({term}))', re.IGNORECASE)
+        self._unless = re.compile(f'(?=(?:{unless}))', re.IGNORECASE) if unless else None
+        self._requires = re.compile(f'(?=(?:{requires}))', re.IGNORECASE) if requires else None
+        self.pattern = self._as_regex()
+
+    def _as_regex(self):
+        """The equivalent lookahead regex; used as the rule's name in evidence and reports."""
+        gap = '.*' if self.within is None else f'.{{0,{self.within}}}'
+        group = lambda alternatives: f'(?:{alternatives})' if '|' in alternatives else alternatives
+        pattern = self.term
+        if self.unless:
+            pattern += f'(?!{gap}{group(self.unless)})'
+        if self.requires:
+            pattern += f'{gap}{group(self.requires)}'
+        return pattern
+
+    def __str__(self):
+        return self.pattern
+
+    def __repr__(self):
+        return f'WindowRule({self.pattern!r})'
+
+    def events(self, text, pos=0, endpos=None, kinds=('term', 'unless', 'requires')):
+        """
+        (start, kind, end) of every A ('term'), B ('unless') and C ('requires')
+        starting in text[pos:endpos], by position; end is only set for A. The
+        patterns still see text past endpos, so matches are not cut short.
+        """
+        found = []
+        for kind, pattern in (('term', self._term), ('unless', self._unless), ('requires', self._requires)):
+            if pattern is None or kind not in kinds:
+                continue
+            for m in pattern.finditer(text, pos):
+                if endpos is not None and m.start() >= endpos:
+                    break
+                found.append((m.start(), kind, m.end(1) if kind == 'term' else None))
+        found.sort(key=lambda event: event[0])
+        return found
+
+    def search(self, text):
+        """True if the rule matches anywhere in text (lines are separate, as with '.')."""
+        if not text:
+            return False
+        lines = text.split('\n') if '\n' in text else (text,)
+        return any(self._search_line(line) for line in lines)
+
+    def _search_line(self, text):
+        ends = [m.end(1) for m in self._term.finditer(text)]
+        if not ends:
+            return False
+        unless = [m.start() for m in self._unless.finditer(text)] if self._unless else []
+        requires = [m.start() for m in self._requires.finditer(text)] if self._requires else None
+        if requires == []:
+            return False
+
+        if self.within is None:
+            # Some occurrence of A must end after every B starts, and no later
+            # than the last C starts
+            after = unless[-1] if unless else -1
+            until = requires[-1] if requires else len(text)
+            return any(after < end <= until for end in ends)
+
+        for end in ends:
+            i = bisect_left(unless, end)
+            if i < len(unless) and unless[i] <= end + self.within:
+                continue
+            if requires is not None:
+                j = bisect_left(requires, end)
+                if not (j < len(requires) and requires[j] <= end + self.within):
+                    continue
+            return True
+        return False
+
+
+def compile_rule(rule):
+    """A WindowRule as-is, or a regex string compiled case-insensitively."""
+    return rule if isinstance(rule, WindowRule) else re.compile(rule, re.IGNORECASE)
+
+
+def search(rule, text):
+    """re.search(rule, text, re.IGNORECASE) for strings, rule.search(text) for WindowRules."""
+    if isinstance(rule, WindowRule):
+        return rule.search(text)
+    return re.search(rule, text, re.IGNORECASE) is not None
+
+
+# ---------------------------------------------------------------- self-check
+
+def check_rules(rules, size=200_000, budget=0.5):
+    """
+    Compare each rule with its lookahead regex on small random pages, and time
+    it on an adversarial page: the term repeated with B only at the very end,
+    which makes the lookahead rescan the rest of the text for every
+    occurrence. Returns failures.
+    """
+    import random
+    rng = random.Random(7)
+    words = ['therapy', 'physical', 'horse', 'dog', 'for', 'people', 'human', 'service',
+             'chiropractic', 'counseling', 'assisted', 'rehabilitation', 'animal', 'care']
+    failures = []
+    for rule in rules:
+        regex = re.compile(rule.pattern, re.IGNORECASE)
+        for _ in range(300):
+            parts = [rng.choice(words + [rule.term.replace('\\b', '')]) for _ in range(rng.randint(0, 40))]
+            text = ' '.join(parts)
+            if rule.search(text) != bool(regex.search(text)):
+                failures.append(f"{rule.pattern}: differs from regex on {text[:80]!r}")
+                break
+        adversarial = adversarial_text(rule, size)
+        started = time.perf_counter()
+        rule.search(adversarial)
+        elapsed = time.perf_counter() - started
+        if elapsed > budget:
+            failures.append(f"{rule.pattern}: {elapsed:.2f}s on {len(adversarial)} adversarial chars")
+    return failures
+
+
+def adversarial_text(rule, size=200_000):
+    """Worst case for the lookahead form of rule, about size chars long."""
+    term = rule.term.replace('\\b', '') + ' '
+    tail = rule.unless.split('|')[0] if rule.unless else ''
+    return term * (size // len(term)) + tail
+
+
+if __name__ == '__main__':
+    # python -m crawlkit.windowed: check every windowed rule in the rule packs
+    # Import through the package: under -m this module is __main__, a second copy
+    from crawlkit.rules import RuleEngine
+    from crawlkit.windowed import WindowRule as PackRule
+    rules = [p for p in RuleEngine.load().patterns if isinstance(p, PackRule)]
+    failures = check_rules(rules)
+    for failure in failures:
+        print(f"❌ {failure}")
+    print(f"{len(rules) - len(failures)}/{len(rules)} windowed rules OK")
+    raise SystemExit(1 if failures else 0)
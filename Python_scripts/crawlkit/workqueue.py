@@ -0,0 +1,260 @@
+"""
+Leased work queue, so any number of crawler processes can share one run.
+
+Every crawler iterates its CSV in a single process; scaling a big
+verification run meant splitting the CSV by hand and merging the outputs.
+WorkQueue holds the tasks (one per provider/site) in the shared state file
+instead, and worker processes pull them:
+
+  * lease() hands out the next available task with a visibility timeout.
+    The task is invisible to other workers until the lease runs out;
+    heartbeat() extends it while a slow site is still being crawled;
+  * a worker that crashes or is killed simply stops heartbeating, and its
+    task is leased again once the timeout passes;
+  * fail() puts a task back with exponential backoff, or marks it dead
+    after max_attempts (an expired lease counts as an attempt);
+  * complete() commits the result once: the first result for a task wins
+    and later ones (a worker whose lease had expired and whose task was
+    picked up again) are ignored, so re-delivery never double-counts.
+
+The backend contract is just put / lease / heartbeat / complete / fail /
+release / counts / results; crawl_worker.py uses nothing else, so a
+Redis-like server (a sorted set of lease deadlines per queue) can stand in
+for SQLite when workers run on several machines. The SQLite backend is for
+workers on one machine: WAL mode does not work over network filesystems.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from .state import SqliteStore
+
+VISIBILITY = 300     # seconds a lease lasts without a heartbeat
+MAX_ATTEMPTS = 3
+BACKOFF = 60         # seconds before the first retry; doubles per attempt
+POLL = 5             # seconds between lease attempts on an empty queue
+
+QUEUED, LEASED, DONE, DEAD = 'queued', 'leased', 'done', 'dead'
+
+Task = namedtuple('Task', 'task_id payload attempts token')
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class WorkQueue(SqliteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS work_tasks (
+        queue        TEXT NOT NULL,
+        task_id      TEXT NOT NULL,
+        payload      TEXT NOT NULL,
+        priority     REAL NOT NULL DEFAULT 0,
+        state        TEXT NOT NULL,
+        attempts     INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at REAL NOT NULL,
+        lease_token  TEXT,
+        leased_by    TEXT,
+        lease_until  REAL,
+        result       TEXT,
+        error        TEXT,
+        updated_at   REAL NOT NULL,
+        PRIMARY KEY (queue, task_id)
+    );
+    CREATE INDEX IF NOT EXISTS work_tasks_ready ON work_tasks (queue, state, available_at);
+    """
+
+    def __init__(self, name, db_path=None, visibility=VISIBILITY):
+        super().__init__(db_path)
+        self.name = name
+        self.visibility = visibility
+
+    # ------------------------------------------------------------ producers
+
+    def put(self, task_id, payload, priority=0, max_attempts=MAX_ATTEMPTS):
+        """Enqueue a task; a task_id already in the queue (in any state) is left alone."""
+        return self.put_many([(task_id, payload, priority)], max_attempts)
+
+    def put_many(self, tasks, max_attempts=MAX_ATTEMPTS):
+        """Enqueue (task_id, payload, priority) tuples. Returns how many were new."""
+        now = time.time()
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT INTO work_tasks (queue, task_id, payload, priority, state, max_attempts, '
+                'available_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (queue, task_id) DO NOTHING',
+                ((self.name, str(task_id), json.dumps(payload, default=str), priority, QUEUED,
+                  max_attempts, now, now) for task_id, payload, priority in tasks))
+            return self.conn.total_changes - before
+
+    def requeue(self, states=(DEAD,)):
+        """Make tasks in states (dead ones by default) available again with fresh attempts."""
+        marks = ','.join('?' * len(states))
+        with self.lock, self.conn:
+            return self.conn.execute(
+                f'UPDATE work_tasks SET state = ?, attempts = 0, available_at = ?, error = NULL, '
+                f'lease_token = NULL, updated_at = ? WHERE queue = ? AND state IN ({marks})',
+                (QUEUED, time.time(), time.time(), self.name, *states)).rowcount
+
+    # ------------------------------------------------------------ workers
+
+    def lease(self, worker=None, visibility=None):
+        """The next available task as a Task, leased to worker; None if nothing is ready."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self.lock, self.conn:
+            # Expired leases of tasks out of attempts are dead, not re-leased
+            self.conn.execute(
+                "UPDATE work_tasks SET state = ?, error = 'lease expired', lease_token = NULL, "
+                'updated_at = ? WHERE queue = ? AND state = ? AND lease_until < ? '
+                'AND attempts >= max_attempts', (DEAD, now, self.name, LEASED, now))
+            # One statement claims the task, so two workers can never get the same one
+            self.conn.execute(
+                'UPDATE work_tasks SET state = ?, attempts = attempts + 1, lease_token = ?, '
+                'leased_by = ?, lease_until = ?, updated_at = ? WHERE rowid = ('
+                '  SELECT rowid FROM work_tasks WHERE queue = ? AND ('
+                '    (state = ? AND available_at <= ?) OR (state = ? AND lease_until < ?))'
+                '  ORDER BY priority DESC, available_at LIMIT 1)',
+                (LEASED, token, worker or worker_name(), now + (visibility or self.visibility), now,
+                 self.name, QUEUED, now, LEASED, now))
+            row = self.conn.execute(
+                'SELECT task_id, payload, attempts FROM work_tasks WHERE queue = ? AND lease_token = ?',
+                (self.name, token)).fetchone()
+        if row is None:
+            return None
+        return Task(row[0], json.loads(row[1]), row[2], token)
+
+    def heartbeat(self, task, visibility=None):
+        """Extend task's lease; False if it was lost (expired and leased to another worker)."""
+        now = time.time()
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'UPDATE work_tasks SET lease_until = ?, updated_at = ? '
+                'WHERE queue = ? AND task_id = ? AND lease_token = ? AND state = ?',
+                (now + (visibility or self.visibility), now, self.name, task.task_id,
+                 task.token, LEASED)).rowcount == 1
+
+    def complete(self, task, result):
+        """Commit task's result. False if a result was already committed (this one is dropped)."""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'UPDATE work_tasks SET state = ?, result = ?, error = NULL, lease_token = NULL, '
+                'lease_until = NULL, updated_at = ? WHERE queue = ? AND task_id = ? AND state != ?',
+                (DONE, json.dumps(result, default=str), time.time(), self.name, task.task_id,
+                 DONE)).rowcount == 1
+
+    def fail(self, task, error, backoff=BACKOFF):
+        """Retry task later (backoff doubles per attempt), or mark it dead when out of attempts."""
+        now = time.time()
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'UPDATE work_tasks SET state = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, '
+                'available_at = ? * (1 << (attempts - 1)) + ?, error = ?, lease_token = NULL, '
+                'lease_until = NULL, updated_at = ? WHERE queue = ? AND task_id = ? AND lease_token = ?',
+                (DEAD, QUEUED, backoff, now, str(error)[:500], now, self.name, task.task_id,
+                 task.token)).rowcount == 1
+
+    def release(self, task):
+        """Give task back unprocessed (worker shutting down); the attempt is not counted."""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'UPDATE work_tasks SET state = ?, attempts = attempts - 1, available_at = ?, '
+                'lease_token = NULL, lease_until = NULL, updated_at = ? '
+                'WHERE queue = ? AND task_id = ? AND lease_token = ?',
+                (QUEUED, time.time(), time.time(), self.name, task.task_id, task.token)).rowcount == 1
+
+    # ------------------------------------------------------------ reporting
+
+    def counts(self):
+        """{state: tasks}; leased tasks whose lease ran out count as queued."""
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT CASE WHEN state = ? AND lease_until < ? THEN ? ELSE state END, COUNT(*) '
+                'FROM work_tasks WHERE queue = ? GROUP BY 1', (LEASED, now, QUEUED, self.name)).fetchall()
+        return dict(rows)
+
+    def pending(self):
+        """Tasks not yet done or dead."""
+        counts = self.counts()
+        return counts.get(QUEUED, 0) + counts.get(LEASED, 0)
+
+    def results(self, states=(DONE, DEAD)):
+        """(task_id, state, payload, result, error, attempts) rows, in enqueue order."""
+        marks = ','.join('?' * len(states))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT task_id, state, payload, result, error, attempts FROM work_tasks '
+                f'WHERE queue = ? AND state IN ({marks}) ORDER BY rowid', (self.name, *states)).fetchall()
+        return [(task_id, state, json.loads(payload), json.loads(result) if result else None, error, attempts)
+                for task_id, state, payload, result, error, attempts in rows]
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps a lease alive from a background thread while the task runs."""
+
+    def __init__(self, queue, task, every):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.task = task
+        self.every = every
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.every):
+            if not self.queue.heartbeat(self.task):
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def work(queue, handle, worker=None, wait=False, limit=None, poll=POLL):
+    """
+    Lease tasks from queue and run handle(payload) -> result (JSON-able) on
+    each until the queue is drained (or, with wait, forever). An exception
+    from handle fails the task (retried later); Ctrl-C gives the current
+    task back. Returns {'done', 'duplicate', 'failed'} counts.
+    """
+    worker = worker or worker_name()
+    counts = {'done': 0, 'duplicate': 0, 'failed': 0}
+    processed = 0
+    while limit is None or processed < limit:
+        task = queue.lease(worker)
+        if task is None:
+            if not wait and not queue.pending():
+                break
+            time.sleep(poll)   # tasks leased elsewhere may still come back
+            continue
+        processed += 1
+        beat = _Heartbeat(queue, task, max(1, queue.visibility / 3))
+        beat.start()
+        try:
+            result = handle(task.payload)
+        except KeyboardInterrupt:
+            beat.stop()
+            queue.release(task)
+            raise
+        except Exception as e:
+            beat.stop()
+            queue.fail(task, f'{type(e).__name__}: {e}')
+            counts['failed'] += 1
+            print(f"  ⚠️  {task.task_id} attempt {task.attempts}: {type(e).__name__}: {e}")
+            continue
+        beat.stop()
+        if queue.complete(task, result):
+            counts['done'] += 1
+        else:
+            counts['duplicate'] += 1
+            print(f"  ↩️  {task.task_id}: result already committed by another worker, dropped")
+    return counts
@@ -8,7 +8,9 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import csv
-import time
+
+from crawlkit import CrawlSession
+from crawlkit.links import extract_links
 
 # Churches to look up - from Ability Ministry directory
 CHURCHES = [
@@ -143,6 +145,11 @@ ADDRESS_PATTERNS = [
     r'(\d{1,5}\s+[\w\s\.]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Circle|Cir|Court|Ct|Parkway|Pkwy|Highway|Hwy)\.?)',
 ]
 
+# Pages likely to carry the street address (matched in link URL and text)
+CONTACT_HINTS = ['contact', 'location', 'visit', 'about']
+
+SESSION = CrawlSession(name='find_church_addresses')
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
@@ -214,7 +221,7 @@ def fetch_and_extract_address(url):
     
     try:
         # Try main page first
-        response = requests.get(url, headers=HEADERS, timeout=15, allow_redirects=True)
+        response = SESSION.get(url, headers=HEADERS, timeout=15, allow_redirects=True)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -235,35 +242,26 @@ def fetch_and_extract_address(url):
             return address, "regex"
         
         # Try to find and fetch contact page
-        contact_links = soup.find_all('a', href=True)
-        for link in contact_links:
-            href = link.get('href', '').lower()
-            text = link.get_text().lower()
-            if 'contact' in href or 'contact' in text or 'location' in href or 'about' in href:
-                contact_url = link['href']
-                if not contact_url.startswith('http'):
-                    from urllib.parse import urljoin
-                    contact_url = urljoin(url, contact_url)
+        contact = extract_links(response.text, response.url, CONTACT_HINTS, limit=1)
+        if contact:
+            try:
+                resp2 = SESSION.get(contact[0].url, headers=HEADERS, timeout=10)
+                soup2 = BeautifulSoup(resp2.text, 'html.parser')
+                
+                address = extract_address_from_schema(soup2)
+                if address:
+                    return address, "contact page schema"
+                
+                address = extract_address_from_meta(soup2)
+                if address:
+                    return address, "contact page element"
                 
-                try:
-                    resp2 = requests.get(contact_url, headers=HEADERS, timeout=10)
-                    soup2 = BeautifulSoup(resp2.text, 'html.parser')
-                    
-                    address = extract_address_from_schema(soup2)
-                    if address:
-                        return address, "contact page schema"
-                    
-                    address = extract_address_from_meta(soup2)
-                    if address:
-                        return address, "contact page element"
-                    
-                    page_text = soup2.get_text(separator=' ')
-                    address = extract_address_from_text(page_text)
-                    if address:
-                        return address, "contact page regex"
-                except:
-                    pass
-                break
+                page_text = soup2.get_text(separator=' ')
+                address = extract_address_from_text(page_text)
+                if address:
+                    return address, "contact page regex"
+            except:
+                pass
         
         return None, "Not found"
         
@@ -302,7 +300,7 @@ def main():
             'source': source
         })
         
-        time.sleep(1)  # Be polite
+        SESSION.sleep(1, 'polite')
     
     # Save results
     output_file = 'florida_churches_with_addresses.csv'
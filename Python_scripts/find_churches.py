@@ -4,13 +4,18 @@ Florida Special Needs Church Finder
 Searches multiple sources for churches with autism/special needs programs
 """
 
-import requests
 from bs4 import BeautifulSoup
 import csv
-import time
 import re
 from urllib.parse import quote_plus
 
+from crawlkit import CrawlSession
+from crawlkit.search_cache import SearchCache
+from crawlkit.search_dispatch import SearchBlocked, raise_for_block
+
+SESSION = CrawlSession(name='find_churches')
+SEARCH_CACHE = SearchCache()  # repeat runs answer the fixed searches locally until they expire
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
@@ -19,11 +24,19 @@ results = []
 
 def search_bing(query, num_results=20):
     """Search Bing and return URLs"""
+    # Every outbound link on the page, unlike the result-block parse of the
+    # faith_based crawler, so cached under an engine name of its own
+    cached = SEARCH_CACHE.get('bing_links', query)
+    if cached is not None:
+        print(f"  Cached: {query[:60]}")
+        return cached[:num_results]
     search_url = f"https://www.bing.com/search?q={quote_plus(query)}&count={num_results}"
     print(f"  Searching: {query[:60]}...")
     
     try:
-        response = requests.get(search_url, headers=HEADERS, timeout=15)
+        response = SESSION.get(search_url, headers=HEADERS, timeout=15)
+        # Bing serves its CAPTCHA with a 200: never parse (or cache) one
+        raise_for_block(response)
         soup = BeautifulSoup(response.text, 'html.parser')
         
         urls = []
@@ -32,15 +45,22 @@ def search_bing(query, num_results=20):
             if href.startswith('http') and 'bing.com' not in href and 'microsoft.com' not in href:
                 urls.append(href)
         
-        return list(set(urls))[:num_results]
+        urls = list(set(urls))
+        SEARCH_CACHE.put('bing_links', query, urls)
+        return urls[:num_results]
+    except SearchBlocked as e:
+        print(f"    ⚠️  Bing blocked the search ({e}); not cached, asked again next run")
+        return []
     except Exception as e:
         print(f"    Error: {e}")
         return []
+    finally:
+        SESSION.sleep(2, 'delay')   # only live searches pay it
 
 def check_page_for_church(url):
     """Visit URL and extract church info if it has special needs program"""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = SESSION.get(url, headers=HEADERS, timeout=10)
         soup = BeautifulSoup(response.text, 'html.parser')
         text = soup.get_text().lower()
         
@@ -140,7 +160,6 @@ def main():
     
     for query in searches:
         urls = search_bing(query, 15)
-        time.sleep(2)  # Rate limiting
         
         for url in urls:
             if url in seen_urls:
@@ -154,11 +173,12 @@ def main():
                     results.append(info)
                     print(f"    ✓ Found: {info['name'][:50]}")
             
-            time.sleep(0.5)
+            SESSION.sleep(0.5, 'polite')
     
     # Save results
     print("\n" + "=" * 60)
     print(f"COMPLETE - Found {len(results)} churches")
+    print(f"Search cache: {SEARCH_CACHE.summary()}")
     print("=" * 60)
     
     if results:
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Concurrent liveness sweep over every provider website.
+
+HEADs (or conditional-GETs) each distinct host in a resources export and
+updates the shared domain-health store, so the crawlers skip dead domains
+without spending their own timeouts on them. Redirect chains go into the
+redirect map (crawlkit/redirects.py), so the crawlers start at the final
+URL and the report shows each site's canonical host.
+
+Usage:
+    python liveness_sweep.py resources_export.csv [--workers 32] [--report liveness_report.csv]
+
+The input needs a `website` column (the Supabase `resources` table export
+works as-is). Dead hosts are re-checked too, so a revived domain comes back.
+"""
+
+import argparse
+import csv
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from crawlkit.domain_health import (
+    DomainHealthStore, PARKED, classify_exception, host_of, looks_parked)
+from crawlkit.redirects import RedirectStore
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+TIMEOUT = 8
+SNIFF_BYTES = 16384   # enough of the body to recognise a parking page
+
+_local = threading.local()
+
+
+def session():
+    """One requests.Session per worker thread."""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+        _local.session.headers.update(HEADERS)
+    return _local.session
+
+
+def load_websites(path):
+    with open(path, encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    sites = {}
+    for row in rows:
+        website = (row.get('website') or row.get('Website') or '').strip()
+        if not website or website.lower() in ('none', 'null', 'nan'):
+            continue
+        if not website.startswith(('http://', 'https://')):
+            website = 'https://' + website
+        sites.setdefault(host_of(website), website)
+    sites.pop('', None)
+    return sites
+
+
+def check(url, store, redirects):
+    """Probe one site and record the outcome. Returns (status, detail)."""
+    etag, last_modified = store.validators(url)
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        r = session().head(url, headers=headers, timeout=TIMEOUT, allow_redirects=True)
+        if r.status_code in (403, 405, 501) or 'html' in r.headers.get('Content-Type', ''):
+            # HEAD refused, or HTML worth sniffing for a parking page
+            r = session().get(url, headers=headers, timeout=TIMEOUT,
+                              allow_redirects=True, stream=True)
+            head = r.raw.read(SNIFF_BYTES, decode_content=True) if r.status_code == 200 else b''
+            r.close()
+            if looks_parked(head.decode('utf-8', 'ignore')):
+                store.record_failure(url, PARKED, 'parked-domain page')
+                return PARKED, r.url
+    except requests.RequestException as e:
+        kind = classify_exception(e)
+        if kind:
+            store.record_failure(url, kind, str(e))
+            return kind, str(e)[:100]
+        return 'ERROR', str(e)[:100]
+    if r.status_code >= 500:
+        return f'HTTP_{r.status_code}', r.url
+    if r.status_code < 400:
+        redirects.record(url, r)
+    store.record_success(url, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+    return 'ALIVE' if r.status_code != 304 else 'ALIVE_304', r.url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input_csv')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--report', help='optional CSV of per-host outcomes')
+    args = parser.parse_args()
+
+    sites = load_websites(args.input_csv)
+    store = DomainHealthStore()
+    redirects = RedirectStore()
+    print(f"Sweeping {len(sites)} distinct hosts with {args.workers} workers...")
+
+    started = time.time()
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(check, url, store, redirects): (host, url) for host, url in sites.items()}
+        for i, future in enumerate(as_completed(futures), 1):
+            host, url = futures[future]
+            status, detail = future.result()
+            outcomes.append({'host': host, 'website': url, 'status': status, 'detail': detail,
+                             'canonical_host': redirects.canonical_host(url)})
+            if i % 100 == 0:
+                print(f"  [{i}/{len(sites)}] {time.time() - started:.0f}s")
+
+    counts = Counter(o['status'] for o in outcomes)
+    print(f"\nDone in {time.time() - started:.0f}s")
+    for status, n in counts.most_common():
+        print(f"  {status:<12} {n:5d}")
+    moved = sum(1 for o in outcomes if o['canonical_host'] != o['host'])
+    print(f"  {moved} host(s) redirect to a different canonical host")
+
+    if args.report:
+        with open(args.report, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['host', 'website', 'status', 'detail', 'canonical_host'])
+            writer.writeheader()
+            writer.writerows(sorted(outcomes, key=lambda o: o['status']))
+        print(f"\nReport: {args.report}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
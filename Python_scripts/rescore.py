@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Re-run a text analyzer over the stored crawl corpus - no network.
+
+Every crawl saves the text it read to the corpus (see crawlkit/corpus.py),
+so after changing keyword lists or thresholds you can see the effect on the
+whole provider set in seconds instead of re-crawling it.
+
+Usage:
+    python rescore.py fixed_strict [--out rescored.csv] [--corpus path/to/corpus.db]
+    python rescore.py fixed_strict --batch [--matrix fs.npz] [--weight human=4 ...]
+    python rescore.py --list
+
+Analyzers:
+    fixed_strict     FixedStrictCrawler.analyze_content      (pet therapy)
+    strict           StrictTherapyCrawler.analyze_content    (pet therapy)
+    aggressive       TherapyCrawler.analyze_content          (pet therapy)
+    website_checker  website_checker.analyze_website_content (pet therapy)
+    aba              ABAVerificationCrawler page checks + recommendation
+    rules            every rule pack in crawlkit/rulepacks (one column each)
+
+--batch (fixed_strict only) builds a provider x pattern hit matrix once and
+scores everyone with one matrix-vector product (crawlkit/scoring_matrix.py).
+With --matrix the matrix is cached, so trying new --weight values skips the
+regex pass entirely; the cache is rebuilt once the corpus or the patterns
+change.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from crawlkit.corpus import Corpus
+from crawlkit.fingerprint import analyzer_version
+from crawlkit.scoring_matrix import ScoringMatrix
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE = os.path.join(HERE, '..', '_archive')
+sys.path[:0] = [os.path.join(ARCHIVE, 'pet_therapy'), os.path.join(ARCHIVE, 'scripts')]
+
+
+def fixed_strict():
+    from fixed_strict_crawler import FixedStrictCrawler
+    crawler = FixedStrictCrawler()
+    return lambda pid, pages: crawler.analyze_content(site_text(pages), pid)
+
+
+def strict():
+    from strict_pet_therapy_recheck import StrictTherapyCrawler
+    crawler = StrictTherapyCrawler()
+    return lambda pid, pages: crawler.analyze_content(site_text(pages), pid)
+
+
+def aggressive():
+    from aggressive_therapy_crawler import TherapyCrawler
+    crawler = TherapyCrawler()
+    return lambda pid, pages: crawler.analyze_content(site_text(pages), pid)
+
+
+def website_checker():
+    from website_checker import analyze_website_content
+
+    def analyze(pid, pages):
+        analysis = analyze_website_content(site_text(pages))
+        verdict = {True: 'THERAPY', False: 'NOT_THERAPY'}.get(analysis['is_therapy'], 'UNCLEAR')
+        return {**analysis, 'decision': verdict}
+    return analyze
+
+
+def aba():
+    from aba_verification_crawler import ABAVerificationCrawler
+    crawler = ABAVerificationCrawler()
+
+    def analyze(pid, pages):
+        result = crawler.new_result(pages[0][0] if pages else '')
+        result['has_valid_website'] = True
+        for url, text in pages:
+            crawler.analyze_page(result, urlparse(url).path.rstrip('/') or 'home', text)
+        crawler.recommend(result)
+        return {**result, 'decision': result['recommendation'], 'reason': result['notes']}
+    return analyze
+
+
+def rules():
+    from crawlkit.rules import RuleEngine
+    engine = RuleEngine.load()
+
+    def analyze(pid, pages):
+        verdicts = engine.classify(pages)
+        return {'decision': ' '.join(f"{name}={v['verdict']}" for name, v in verdicts.items()),
+                **{f'verdict_{name}': v['verdict'] for name, v in verdicts.items()}}
+    return analyze
+
+
+ANALYZERS = {
+    'fixed_strict': fixed_strict,
+    'strict': strict,
+    'aggressive': aggressive,
+    'website_checker': website_checker,
+    'aba': aba,
+    'rules': rules,
+}
+
+
+def batch_fixed_strict(corpus, matrix_path=None, weights=None):
+    """fixed_strict over the whole corpus as one matrix product; returns rows."""
+    import fixed_strict_crawler as fs
+    crawler = fs.FixedStrictCrawler()
+    # The corpus and everything the columns count; weights are applied later
+    source = corpus.state() + ' ' + analyzer_version(
+        fs.FixedStrictCrawler.matrix_columns, fs.FixedStrictCrawler.check_animal_therapy_proximity,
+        fs.ANIMAL_ASSISTED_THERAPY_KEYWORDS, fs.HUMAN_BENEFIT_KEYWORDS, fs.ANIMAL_REHAB_EXCLUSIONS,
+        fs.NON_ANIMAL_THERAPY, fs.ANIMAL_WORDS, fs.THERAPY_WORDS)
+    matrix = None
+    if matrix_path and os.path.exists(matrix_path):
+        matrix = ScoringMatrix.load(matrix_path)
+        if matrix.source == source:
+            print(f"Loaded {matrix.matrix.shape[0]} x {matrix.matrix.shape[1]} matrix from {matrix_path}")
+        else:
+            print(f"{matrix_path} is stale (corpus or patterns changed); rebuilding")
+            matrix = None
+    if matrix is None:
+        started = time.time()
+        sites = ((pid, site_text(pages)) for pid, pages in corpus.iter_sites())
+        matrix = ScoringMatrix.build(sites, crawler.matrix_columns(), source)
+        print(f"Built {matrix.matrix.shape[0]} x {matrix.matrix.shape[1]} matrix "
+              f"in {time.time() - started:.2f}s")
+        if matrix_path:
+            matrix.save(matrix_path)
+    scores, decisions, confidences = crawler.batch_decide(matrix, weights)
+    return [{'provider_id': pid, 'pages': '', 'decision': d, 'confidence': c,
+             'score': round(float(s), 2), 'reason': ''}
+            for pid, s, d, c in zip(matrix.provider_ids, scores, decisions, confidences)]
+
+
+def parse_weights(pairs):
+    weights = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        weights[name] = float(value)
+    return weights
+
+
+def site_text(pages):
+    """Pages joined the way the pet-therapy crawl_website joins them."""
+    return ' '.join(text for _, text in pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score the crawl corpus offline.')
+    parser.add_argument('analyzer', nargs='?', choices=sorted(ANALYZERS))
+    parser.add_argument('--corpus', help='corpus.db (default: beside crawl_state.db)')
+    parser.add_argument('--out', help='write one row per provider to this CSV')
+    parser.add_argument('--list', action='store_true', help='show corpus size and exit')
+    parser.add_argument('--batch', action='store_true',
+                        help='vectorized scoring (fixed_strict only)')
+    parser.add_argument('--matrix', help='cache file (.npz) for the --batch hit matrix')
+    parser.add_argument('--weight', action='append', metavar='GROUP=N',
+                        help='override a --batch weight: rehab, assisted, human, '
+                             'proximity, non_animal or a single pattern')
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus)
+    if args.list or not args.analyzer:
+        stats = corpus.stats()
+        print(f"Corpus: {corpus.db_path}")
+        print(f"  {stats['providers']} providers, {stats['pages']} pages, "
+              f"{stats['text_bytes'] / 1e6:.1f} MB text in {stats['stored_bytes'] / 1e6:.1f} MB")
+        return
+
+    if args.batch and args.analyzer != 'fixed_strict':
+        parser.error('--batch is only implemented for fixed_strict')
+
+    started = time.time()
+    rows = []
+    if args.batch:
+        rows = batch_fixed_strict(corpus, args.matrix, parse_weights(args.weight))
+        sites = []
+    else:
+        analyze = ANALYZERS[args.analyzer]()
+        sites = corpus.iter_sites()
+    partial = corpus.partial_sites()   # crawls that stopped early: their text is incomplete
+    for provider_id, pages in sites:
+        analysis = analyze(provider_id, pages)
+        rows.append({
+            'provider_id': provider_id,
+            'pages': len(pages),
+            'partial': partial.get(provider_id, ''),
+            'decision': analysis.get('decision', ''),
+            'confidence': analysis.get('confidence', ''),
+            'score': analysis.get('score', ''),
+            'reason': analysis.get('reason', ''),
+            **{k: v for k, v in analysis.items() if k.startswith('verdict_')},
+        })
+    elapsed = time.time() - started
+
+    print(f"Re-scored {len(rows)} providers with '{args.analyzer}' in {elapsed:.2f}s")
+    if any(r.get('partial') for r in rows):
+        print(f"  {sum(1 for r in rows if r.get('partial'))} of them from partial crawls (stopped early; "
+              f"see the partial column)")
+    verdict_columns = [k for k in (rows[0] if rows else {}) if k.startswith('verdict_')]
+    for column in verdict_columns or ['decision']:
+        if verdict_columns:
+            print(f"  {column[len('verdict_'):]}:")
+        for decision, n in Counter(r[column] for r in rows).most_common():
+            print(f"  {decision:<40} {n:5d}")
+
+    if args.out:
+        with open(args.out, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['provider_id'])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nSaved: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Re-verify providers most in need of it, within a fixed crawl budget.
+
+Keeps a per-provider record (crawlkit/scheduler.py) of the last verification,
+its verdict, how often the site has been seen to change, and how much the
+listing matters (pSEO pages it appears on, by band). Instead of re-checking
+a whole CSV in file order, each night spends its budget on the providers
+with the highest staleness priority.
+
+Usage:
+    python reverify.py load providers.csv [--manifest ../curation/pseo_page_manifest_2026-08-20.csv]
+    python reverify.py plan [--limit 200] [--out reverify_plan.csv]
+    python reverify.py stream --rate 120 [--limit 500] [--verifier aba|fixed_strict]
+
+`plan` writes the top providers as a CSV the existing crawlers accept as
+input. `stream` verifies them itself, at most --rate per hour, recording
+each result so the next ranking reflects it.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+
+from crawlkit.deadline import DEADLINE
+from crawlkit.scheduler import VerificationScheduler, load_manifest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE = os.path.join(HERE, '..', '_archive')
+MANIFEST = os.path.join(HERE, '..', 'curation', 'pseo_page_manifest_2026-08-20.csv')
+sys.path[:0] = [os.path.join(ARCHIVE, 'pet_therapy'), os.path.join(ARCHIVE, 'scripts')]
+
+
+def aba_verifier():
+    from aba_verification_crawler import ABAVerificationCrawler
+    crawler = ABAVerificationCrawler()
+
+    def verify(provider):
+        result = crawler.crawl_website(provider.get('website'))
+        # The planner's early stop and a dead host skip paths: not a full read either
+        complete = not result['pages_skipped'] and not str(result.get('crawl_status', '')).startswith(DEADLINE)
+        return result['recommendation'], crawler.last_pages, complete
+    return verify
+
+
+def fixed_strict_verifier():
+    from fixed_strict_crawler import FixedStrictCrawler
+    crawler = FixedStrictCrawler()
+
+    def verify(provider):
+        website = crawler.clean_url(provider.get('website', ''))
+        if not website:
+            return 'NO_WEBSITE', [], False
+        site = crawler.site_matcher()
+        pages, status = crawler.crawl_website(website, site=site)
+        if not pages:
+            return 'CRAWL_FAILED', crawler.last_pages, False
+        complete = not crawler.cut_short and not status.startswith(DEADLINE)
+        return crawler.analyze_content(site, provider.get('provider_name', ''))['decision'], pages, complete
+    return verify
+
+
+# verify(provider) -> (verdict, pages, complete); complete: the site was read in full,
+# so the scheduler may compare it with the last complete crawl
+VERIFIERS = {'aba': aba_verifier, 'fixed_strict': fixed_strict_verifier}
+
+# Which providers each verifier is meant for
+SCOPES = {
+    'aba': lambda p: 'aba' in str(p.get('service_type', '')).lower() or str(p.get('aba', '')).lower() == 'true',
+    'fixed_strict': None,
+}
+
+
+def describe(row):
+    age = ('never' if row['last_verified'] is None
+           else f"{(time.time() - row['last_verified']) / 86400:.0f}d ago")
+    return (f"{row['priority']:>9.3g}  {row['importance']:>4.1f}  {age:>10}  "
+            f"{str(row['last_verdict'] or '-'):<20} {row['provider'].get('provider_name', '')[:40]}")
+
+
+def cmd_load(args, scheduler):
+    with open(args.providers, encoding='utf-8-sig') as f:
+        providers = list(csv.DictReader(f))
+    count = scheduler.load_providers(providers, load_manifest(args.manifest))
+    ranked = scheduler.ranked()
+    on_pages = sum(1 for r in ranked if r['pages'])
+    print(f"✅ Loaded {count} providers ({on_pages} listed on at least one pSEO page)")
+
+
+def cmd_plan(args, scheduler):
+    rows = scheduler.ranked(limit=args.limit, where=SCOPES.get(args.verifier))
+    print(f"{'priority':>9}  {'imp':>4}  {'verified':>10}  {'last verdict':<20} provider")
+    for row in rows[:20]:
+        print(describe(row))
+    if args.out:
+        fields = list(dict.fromkeys(k for row in rows for k in row['provider']))
+        with open(args.out, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields + ['reverify_priority'])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row['provider'], 'reverify_priority': row['priority']})
+        print(f"\n💾 {len(rows)} providers written to {args.out}")
+
+
+def cmd_stream(args, scheduler):
+    verify = VERIFIERS[args.verifier]()
+    verdicts = Counter()
+    print(f"▶️  Verifying up to {args.limit or 'all'} providers at {args.rate}/hour with {args.verifier}\n")
+    for i, row in enumerate(scheduler.stream(args.rate, limit=args.limit,
+                                             where=SCOPES.get(args.verifier)), 1):
+        print(f"[{i}] {describe(row)}")
+        try:
+            verdict, pages, complete = verify(row['provider'])
+        except Exception as e:
+            print(f"  ⚠️  {type(e).__name__}: {e}")
+            verdict, pages, complete = 'CRAWL_FAILED', [], False
+        scheduler.record(row['provider_id'], verdict, pages, complete=complete)
+        verdicts[verdict] += 1
+        print(f"  → {verdict}")
+    print("\n" + ", ".join(f"{v}: {n}" for v, n in verdicts.most_common()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    load = sub.add_parser('load', help='add/refresh providers and their pSEO importance')
+    load.add_argument('providers')
+    load.add_argument('--manifest', default=MANIFEST)
+    plan = sub.add_parser('plan', help='show / export the current priority order')
+    plan.add_argument('--limit', type=int, default=200)
+    plan.add_argument('--out')
+    plan.add_argument('--verifier', choices=sorted(VERIFIERS))
+    stream = sub.add_parser('stream', help='verify providers in priority order, rate-limited')
+    stream.add_argument('--rate', type=float, default=120, help='providers per hour')
+    stream.add_argument('--limit', type=int)
+    stream.add_argument('--verifier', choices=sorted(VERIFIERS), default='aba')
+    args = parser.parse_args()
+
+    scheduler = VerificationScheduler()
+    {'load': cmd_load, 'plan': cmd_plan, 'stream': cmd_stream}[args.command](args, scheduler)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# crawlkit lives beside this directory, not on an installed path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,64 @@
+"""WindowRule: same answers as its lookahead regex, in linear time."""
+
+import random
+import re
+import time
+
+import pytest
+
+from crawlkit.rules import RuleEngine
+from crawlkit.windowed import WindowRule, adversarial_text, check_rules
+
+RULES = [
+    WindowRule('physical therapy', unless='horse|equine|dog|animal|pet'),
+    WindowRule('chiropractic', unless='horse|dog', requires='for people|human'),
+    WindowRule(r'\btherapy', unless='dog', within=20),
+    WindowRule('counseling', requires='human|people', within=15),
+    WindowRule('rehabilitation', unless='animal', requires='care', within=30),
+]
+WORDS = ['therapy', 'physical', 'horse', 'dog', 'for', 'people', 'human', 'service', 'pet',
+         'chiropractic', 'counseling', 'assisted', 'rehabilitation', 'animal', 'care', '\n']
+
+
+def pack_rules():
+    return [p for p in RuleEngine.load().patterns if isinstance(p, WindowRule)]
+
+
+def best_time(rule, text, repeat=3):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rule.search(text)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+@pytest.mark.parametrize('rule', RULES, ids=str)
+def test_matches_lookahead_regex(rule):
+    rng = random.Random(31)
+    regex = re.compile(rule.pattern, re.IGNORECASE)
+    for _ in range(2000):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+        assert rule.search(text) == bool(regex.search(text)), text
+
+
+@pytest.mark.parametrize('rule', RULES, ids=str)
+def test_matches_lookahead_regex_on_adversarial_input(rule):
+    # Small enough for the quadratic regex to finish
+    text = adversarial_text(rule, 4000)
+    assert rule.search(text) == bool(re.search(rule.pattern, text, re.IGNORECASE))
+
+
+@pytest.mark.parametrize('rule', RULES, ids=str)
+def test_linear_on_adversarial_input(rule):
+    small = best_time(rule, adversarial_text(rule, 50_000))
+    large = best_time(rule, adversarial_text(rule, 400_000))
+    # 8x the text: about 8x the time when linear, 64x when quadratic
+    assert large < 0.5
+    assert large < 24 * max(small, 1e-4)
+
+
+def test_rule_packs_pass_self_check():
+    rules = pack_rules()
+    assert rules
+    assert check_rules(rules) == []
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Serve recorded crawl traffic back to the crawlers - no network.
+
+Record a crawl once with ASD_CRAWL_RECORD set, then replay it as often as
+needed; verdicts and throughput are measured against identical pages.
+
+Usage:
+    ASD_CRAWL_RECORD=warcs python ../_archive/pet_therapy/fixed_strict_crawler.py providers.csv
+    python warc_replay.py warcs/*.warc.gz [--port 8090]
+    ASD_CRAWL_REPLAY=http://127.0.0.1:8090 ASD_CRAWL_STATE=/tmp/replay.db \\
+        python ../_archive/pet_therapy/fixed_strict_crawler.py providers.csv
+
+The server answers GET/HEAD for http://127.0.0.1:8090/<original URL> (the
+form CrawlSession uses in replay mode) and also plain-HTTP proxy requests.
+URLs that were never recorded get 504 with X-Replay: miss. Use a separate
+ASD_CRAWL_STATE for replays so the live domain-health cache is not touched.
+"""
+
+import argparse
+import glob
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawlkit.warc import WarcArchive, replay_response
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    archive = None
+    counts = Counter()
+    lock = threading.Lock()
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def original_url(self):
+        # /<original URL> from CrawlSession, or an absolute URI from a proxy client
+        return self.path if self.path.startswith('http') else self.path[1:]
+
+    def reply(self, method):
+        url = self.original_url()
+        status, headers, body = replay_response(self.archive, method, url)
+        with self.lock:
+            self.counts['hit' if status != 504 else 'miss'] += 1
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)) if method != 'HEAD' else '0')
+        self.end_headers()
+        if method != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self.reply('GET')
+
+    def do_HEAD(self):
+        self.reply('HEAD')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay WARC-recorded crawl traffic')
+    parser.add_argument('warcs', nargs='+')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.warcs for p in glob.glob(pattern)})
+    if not paths:
+        sys.exit('No WARC files matched')
+    ReplayHandler.archive = WarcArchive(paths)
+    ReplayHandler.verbose = args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), ReplayHandler)
+    base = f'http://{args.host}:{server.server_port}'
+    print(f"📼 {len(ReplayHandler.archive)} recorded responses from {len(paths)} file(s)")
+    print(f"▶️  Replaying on {base}  (export ASD_CRAWL_REPLAY={base})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    counts = ReplayHandler.counts
+    print(f"\n{counts['hit']} served from the archive, {counts['miss']} missed")
+
+
+if __name__ == '__main__':
+    main()
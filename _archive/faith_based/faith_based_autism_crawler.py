@@ -11,11 +11,14 @@ Dependencies:
   pip install requests beautifulsoup4 pandas tldextract
 """
 
-import requests, time, random, json, csv, os, re
+import random, json, csv, os, re, sys
 from bs4 import BeautifulSoup
 import pandas as pd
 from urllib.parse import urljoin
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession
+
 # -----------------------------------
 # CONFIGURATION
 # -----------------------------------
@@ -35,6 +38,8 @@ KEYWORDS = [
     "adaptive", "sensory friendly", "autistic", "aspi"
 ]
 
+SESSION = CrawlSession(name='faith_based')
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; ASDDirectoryCrawler/1.0; +https://example.com)"
 }
@@ -46,7 +51,7 @@ HEADERS = {
 def safe_pause(min_s=2.5, max_s=6.0, why=""):
     t = random.uniform(min_s, max_s)
     print(f" [pause] {why} ({t:.1f}s)")
-    time.sleep(t)
+    SESSION.sleep(t, why or 'pause')
 
 def load_checkpoint():
     if os.path.exists(CHECKPOINT_FILE):
@@ -60,7 +65,7 @@ def save_checkpoint(checkpoint):
 
 def get_soup(url):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=20)
+        r = SESSION.get(url, headers=HEADERS, timeout=20)
         if r.status_code != 200:
             print(f" [warn] {url} returned {r.status_code}")
             return None
@@ -6,17 +6,23 @@ Faith-Based ASD Resource Crawler (Florida only, 2 levels deep)
 • Follows each church link and scans both main and ministry subpages
 • Detects autism, special needs, inclusion, disability, etc.
 • No Google API, no cost
-• Resumable with checkpoint.json
+• Resumable with checkpoint.json; scanned churches are kept in a frontier
+  (crawlkit.frontier), so URL variants of one church are scanned once
+• --fresh starts over: clears the checkpoint and the scanned churches
 • Safe randomized delays between requests
 
 Dependencies:
   pip install requests beautifulsoup4 pandas tldextract
 """
 
-import requests, time, random, json, os, re
+import random, json, os, re, sys
 from bs4 import BeautifulSoup
-import pandas as pd
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, documents
+from crawlkit.frontier import Frontier
+from crawlkit.links import extract_links
 
 OUTPUT_CSV = "faith_based_autism_resources.csv"
 CHECKPOINT_FILE = "checkpoint.json"
@@ -52,6 +58,11 @@ SUBPAGE_HINTS = [
     "abilities", "family", "kids", "youth"
 ]
 
+# Made in main(): the document workers import this module again, and must not
+# open sessions, the frontier or another worker pool of their own
+SESSION = None   # CrawlSession
+FRONTIER = None  # churches scanned, shared with the Playwright version
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; ASDDirectoryCrawler/2.0; +https://example.com)"
 }
@@ -63,28 +74,44 @@ HEADERS = {
 def safe_pause(min_s=2.5, max_s=6.0, why=""):
     t = random.uniform(min_s, max_s)
     print(f" [pause] {why} ({t:.1f}s)")
-    time.sleep(t)
+    SESSION.sleep(t, why or 'pause')
 
-def get_soup(url):
+def get_html(url):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=25)
+        r = SESSION.get(url, headers=HEADERS, timeout=25)
         if r.status_code != 200:
             print(f" [warn] {url} → {r.status_code}")
             return None
-        return BeautifulSoup(r.text, "html.parser")
+        return r.text
     except Exception as e:
         print(f" [error] {url}: {e}")
         return None
 
+def get_soup(url):
+    html = get_html(url)
+    return BeautifulSoup(html, "html.parser") if html else None
+
 def keyword_hit(text):
     t = re.sub(r"[^a-z0-9\s-]", " ", text.lower())
     return any(k in t for k in KEYWORDS)
 
-def load_checkpoint():
+def load_checkpoint(fresh=False):
+    if fresh:
+        # --fresh: start over, forgetting the churches scanned by either crawler
+        FRONTIER.reset()
+        cp = {"completed": []}
+        save_checkpoint(cp)
+        return cp
     if os.path.exists(CHECKPOINT_FILE):
         with open(CHECKPOINT_FILE, "r") as f:
-            return json.load(f)
-    return {"completed": [], "visited": []}
+            cp = json.load(f)
+        # Older checkpoints listed the scanned churches; they move to the frontier
+        for url in cp.pop("visited", []):
+            FRONTIER.mark(url)
+        return cp
+    # No checkpoint here (another working directory, say): the directory pages
+    # are crawled again, but the churches already scanned stay skipped
+    return {"completed": []}
 
 def save_checkpoint(cp):
     with open(CHECKPOINT_FILE, "w") as f:
@@ -98,7 +125,7 @@ def crawl_churchfinder(page=1):
     url = CHURCH_SITES["churchfinder"].format(page)
     soup = get_soup(url)
     if not soup:
-        return []
+        return None   # not loaded: left out of "completed", tried again next run
     cards = soup.select(".church-item, .cf-church-item")
     out = []
     for c in cards:
@@ -118,7 +145,7 @@ def crawl_faithstreet():
     url = CHURCH_SITES["faithstreet"]
     soup = get_soup(url)
     if not soup:
-        return []
+        return None   # not loaded: left out of "completed", tried again next run
     out = []
     for a in soup.select("a[href*='/churches/']"):
         full = urljoin(url, a["href"])
@@ -130,7 +157,7 @@ def crawl_churchangel(page=1):
     url = CHURCH_SITES["churchangel"].format(page)
     soup = get_soup(url)
     if not soup:
-        return []
+        return None   # not loaded: left out of "completed", tried again next run
     out = []
     blocks = soup.select(".listing, .church-item")
     for b in blocks:
@@ -151,24 +178,19 @@ def crawl_churchangel(page=1):
 # DETAIL PAGE SCANNING (2 levels deep)
 # -------------------------------------------------------------------
 
-def get_subpage_links(base_url, soup):
-    links = []
-    base = urlparse(base_url).netloc
-    for a in soup.find_all("a", href=True):
-        href = a["href"].lower()
-        if any(h in href for h in SUBPAGE_HINTS):
-            full = urljoin(base_url, href)
-            if urlparse(full).netloc == base:
-                links.append(full)
-    return list(set(links))
+def get_subpage_links(base_url, html, limit=10):
+    """Same-site links matching SUBPAGE_HINTS, most hint hits first."""
+    return [link.url for link in extract_links(html, base_url, SUBPAGE_HINTS, limit=limit)]
 
 def deep_scan(church):
     """Visit church URL and 1 layer of relevant subpages."""
     main_url = church["URL"]
     matches = []
-    soup = get_soup(main_url)
-    if not soup:
+    SESSION.new_site(main_url)   # this church's byte budget; directory hosts have none
+    html = get_html(main_url)
+    if not html:
         return matches
+    soup = BeautifulSoup(html, "html.parser")
     page_text = soup.get_text(" ", strip=True)
     if keyword_hit(page_text):
         matches.append({
@@ -178,8 +200,7 @@ def deep_scan(church):
             "MatchSnippet": page_text[:500]
         })
     # follow subpages
-    sublinks = get_subpage_links(main_url, soup)
-    for sub in sublinks[:10]:
+    for sub in get_subpage_links(main_url, html):
         sub_soup = get_soup(sub)
         if not sub_soup:
             continue
@@ -199,7 +220,12 @@ def deep_scan(church):
 # -------------------------------------------------------------------
 
 def main():
-    checkpoint = load_checkpoint()
+    global SESSION, FRONTIER
+    import pandas as pd
+    SESSION = CrawlSession(name='faith_based_deep')
+    documents.register(SESSION)  # ministry PDFs / Word files -> text, out of process
+    FRONTIER = Frontier('faith_based')
+    checkpoint = load_checkpoint(fresh="--fresh" in sys.argv)
     results = []
 
     print("[start] Deep faith-based ASD crawler (2-level scan, no Google API)…")
@@ -213,6 +239,10 @@ def main():
         if ident in checkpoint["completed"]:
             continue
         batch = crawl_churchfinder(page)
+        if batch is None:
+            print(f" [churchfinder] page {page} not loaded; retried next run")
+            safe_pause(3, 6, "churchfinder")
+            continue
         listings.extend(batch)
         checkpoint["completed"].append(ident)
         save_checkpoint(checkpoint)
@@ -222,10 +252,13 @@ def main():
     # FaithStreet
     if "faithstreet" not in checkpoint["completed"]:
         batch = crawl_faithstreet()
-        listings.extend(batch)
-        checkpoint["completed"].append("faithstreet")
-        save_checkpoint(checkpoint)
-        print(f" [faithstreet]: {len(batch)} churches")
+        if batch is None:
+            print(" [faithstreet] not loaded; retried next run")
+        else:
+            listings.extend(batch)
+            checkpoint["completed"].append("faithstreet")
+            save_checkpoint(checkpoint)
+            print(f" [faithstreet]: {len(batch)} churches")
         safe_pause(3, 6, "faithstreet")
 
     # ChurchAngel (up to 40 pages)
@@ -234,6 +267,10 @@ def main():
         if ident in checkpoint["completed"]:
             continue
         batch = crawl_churchangel(page)
+        if batch is None:
+            print(f" [churchangel] page {page} not loaded; retried next run")
+            safe_pause(3, 6, "churchangel")
+            continue
         listings.extend(batch)
         checkpoint["completed"].append(ident)
         save_checkpoint(checkpoint)
@@ -245,7 +282,7 @@ def main():
 
     for i, church in enumerate(listings, start=1):
         url = church["URL"]
-        if url in checkpoint["visited"]:
+        if FRONTIER.seen(url):
             continue
         print(f"\n[{i}/{len(listings)}] Scanning {url}")
         hits = deep_scan(church)
@@ -254,8 +291,7 @@ def main():
             results.extend(hits)
         else:
             print("  [none] No match keywords found.")
-        checkpoint["visited"].append(url)
-        save_checkpoint(checkpoint)
+        FRONTIER.mark(url)
         safe_pause(3, 7, "between churches")
 
     # Save results
@@ -266,6 +302,10 @@ def main():
         print(f"\n[done] Saved {len(df)} matches → {OUTPUT_CSV}")
     else:
         print("[done] No matches found.")
+    FRONTIER.flush()
+    print(f"[frontier] {FRONTIER.summary()}")
+    if documents.shared_summary():
+        print(f"[documents] {documents.shared_summary()}")
 
 if __name__ == "__main__":
     main()
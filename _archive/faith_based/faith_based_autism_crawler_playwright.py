@@ -6,19 +6,33 @@ Faith-Based ASD Resource Crawler (Florida, Playwright version)
 - Crawls ChurchFinder, FaithStreet, and ChurchAngel listings.
 - Follows each church link + 1 level of subpages.
 - Searches for autism/special-needs/disability ministry keywords.
-- Resumable via checkpoint.json.
+- Resumable via checkpoint.json; scanned churches are kept in a frontier
+  (crawlkit.frontier), so URL variants of one church are scanned once.
+- --fresh starts over: clears the checkpoint and the scanned churches.
+- Pages are spread over a pool of browser contexts (crawlkit.browser_pool)
+  that blocks images, media, fonts and trackers; politeness is per host.
+- Each page is fetched statically first and only JS-only pages go to the
+  browser (crawlkit.hybrid); the mode that worked is remembered per host.
 
 Dependencies:
   pip install playwright pandas beautifulsoup4 tldextract
   playwright install
 """
 
-import asyncio, json, os, random, re, time
+import asyncio, json, os, re, sys
 import pandas as pd
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from playwright.async_api import async_playwright
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, DomainHealthStore
+from crawlkit.browser_pool import BrowserPool
+from crawlkit.hybrid import HybridFetcher
+from crawlkit.deadline import DEADLINE, run_deadline
+from crawlkit.domain_health import TIMEOUT, classify_browser_error
+from crawlkit.frontier import Frontier
+
 OUTPUT_CSV = "faith_based_autism_resources.csv"
 CHECKPOINT_FILE = "checkpoint.json"
 
@@ -43,6 +57,14 @@ KEYWORDS = [
     "learning differences", "speech delay", "social skills group"
 ]
 
+HEALTH = DomainHealthStore()  # shared with the requests-based crawlers
+SESSION = CrawlSession(health=HEALTH, name='faith_based_playwright')  # static fetches
+FRONTIER = Frontier('faith_based')  # churches scanned, shared with the deep crawler
+
+GOTO_TIMEOUT = 60      # seconds per page load
+SITE_DEADLINE = 120    # seconds per church: main page + subpages + pauses
+POOL_SIZE = 6          # browser contexts; churches on different hosts load in parallel
+
 SUBPAGE_HINTS = [
     "minist", "serve", "outreach", "autism", "disab", "special", "inclusion",
     "abilities", "family", "kids", "youth"
@@ -56,16 +78,23 @@ def keyword_hit(text):
     t = re.sub(r"[^a-z0-9\s-]", " ", text.lower())
     return any(k in t for k in KEYWORDS)
 
-def safe_pause(min_s=2.5, max_s=6.0, why=""):
-    t = random.uniform(min_s, max_s)
-    print(f" [pause] {why} ({t:.1f}s)")
-    time.sleep(t)
-
-def load_checkpoint():
+def load_checkpoint(fresh=False):
+    if fresh:
+        # --fresh: start over, forgetting the churches scanned by either crawler
+        FRONTIER.reset()
+        cp = {"completed": []}
+        save_checkpoint(cp)
+        return cp
     if os.path.exists(CHECKPOINT_FILE):
         with open(CHECKPOINT_FILE, "r") as f:
-            return json.load(f)
-    return {"completed": [], "visited": []}
+            cp = json.load(f)
+        # Older checkpoints listed the scanned churches; they move to the frontier
+        for url in cp.pop("visited", []):
+            FRONTIER.mark(url)
+        return cp
+    # No checkpoint here (another working directory, say): the directory pages
+    # are crawled again, but the churches already scanned stay skipped
+    return {"completed": []}
 
 def save_checkpoint(cp):
     with open(CHECKPOINT_FILE, "w") as f:
@@ -75,149 +104,180 @@ def save_checkpoint(cp):
 # Core async crawl logic
 # -------------------------------------------
 
-async def fetch_html(page, url, wait_selector=None):
+async def fetch_html(page, url, wait_selector=None, deadline=None):
+    dead = HEALTH.check(url)
+    if dead:
+        print(f" [skip] {url}: dead domain ({dead['status']})")
+        return ""
+    if deadline and deadline.expired():
+        print(f" [skip] {url}: {deadline.binding_scope()} deadline passed")
+        return ""
+    goto_timeout = deadline.clamp(GOTO_TIMEOUT) if deadline else GOTO_TIMEOUT
     try:
-        await page.goto(url, timeout=60000)
+        await page.goto(url, timeout=goto_timeout * 1000)
         if wait_selector:
             try:
-                await page.wait_for_selector(wait_selector, timeout=15000)
+                wait = deadline.clamp(15) if deadline else 15
+                await page.wait_for_selector(wait_selector, timeout=wait * 1000)
             except Exception:
                 pass
         html = await page.content()
+        HEALTH.record_success(url)
         return html
     except Exception as e:
+        kind = classify_browser_error(e)
+        # A timeout we shortened to fit the deadline says nothing about the host
+        if kind and not (kind == TIMEOUT and goto_timeout < GOTO_TIMEOUT):
+            HEALTH.record_failure(url, kind, str(e))
         print(f" [warn] failed to load {url}: {e}")
         return ""
 
-async def scrape_listings(playwright):
-    browser = await playwright.chromium.launch(headless=True)
-    context = await browser.new_context()
-    page = await context.new_page()
-
-    all_listings = []
-
-    # --- ChurchFinder ---
-    for i in range(1, 51):
-        url = CHURCH_SITES["churchfinder"].format(i)
-        html = await fetch_html(page, url, ".church-item")
-        soup = BeautifulSoup(html, "html.parser")
-        cards = soup.select(".church-item, .cf-church-item")
-        if not cards:
-            print(f" [churchfinder] page {i}: no results")
-            continue
-        for c in cards:
-            name_el = c.find("h2")
-            link = c.find("a", href=True)
-            desc = c.get_text(" ", strip=True)
-            if name_el and link:
-                all_listings.append({
-                    "Name": name_el.get_text(strip=True),
-                    "URL": urljoin(url, link["href"]),
-                    "Description": desc,
-                    "Source": "churchfinder"
-                })
-        print(f" [churchfinder] page {i}: {len(cards)} listings")
-        safe_pause(3, 6, "churchfinder")
-
-    # --- FaithStreet ---
+async def scrape_churchfinder_page(fetcher, i, run):
+    url = CHURCH_SITES["churchfinder"].format(i)
+    html, _ = await fetcher.fetch(url, ".church-item", run)
+    soup = BeautifulSoup(html, "html.parser")
+    cards = soup.select(".church-item, .cf-church-item")
+    if not cards:
+        print(f" [churchfinder] page {i}: no results")
+        return []
+    listings = []
+    for c in cards:
+        name_el = c.find("h2")
+        link = c.find("a", href=True)
+        desc = c.get_text(" ", strip=True)
+        if name_el and link:
+            listings.append({
+                "Name": name_el.get_text(strip=True),
+                "URL": urljoin(url, link["href"]),
+                "Description": desc,
+                "Source": "churchfinder"
+            })
+    print(f" [churchfinder] page {i}: {len(cards)} listings")
+    return listings
+
+async def scrape_faithstreet(fetcher, run):
     url = CHURCH_SITES["faithstreet"]
-    html = await fetch_html(page, url, "a[href*='/churches/']")
+    html, _ = await fetcher.fetch(url, "a[href*='/churches/']", run)
     soup = BeautifulSoup(html, "html.parser")
     links = soup.select("a[href*='/churches/']")
+    listings = []
     for a in links:
         full = urljoin(url, a["href"])
         text = a.get_text(" ", strip=True)
         if "/churches/" in full:
-            all_listings.append({
+            listings.append({
                 "Name": text,
                 "URL": full,
                 "Description": text,
                 "Source": "faithstreet"
             })
     print(f" [faithstreet] {len(links)} listings")
+    return listings
 
-    # --- ChurchAngel ---
+async def scrape_churchangel(fetcher, run):
     url = CHURCH_SITES["churchangel"]
-    html = await fetch_html(page, url, ".listing")
+    html, _ = await fetcher.fetch(url, ".listing", run)
     soup = BeautifulSoup(html, "html.parser")
     blocks = soup.select(".listing, .church-item")
+    listings = []
     for b in blocks:
         name_el = b.find(["h3", "h2", "a"])
         if not name_el:
             continue
         link = name_el.find("a", href=True)
         desc = b.get_text(" ", strip=True)
-        all_listings.append({
+        listings.append({
             "Name": name_el.get_text(strip=True),
             "URL": urljoin(url, link["href"]) if link else url,
             "Description": desc,
             "Source": "churchangel"
         })
     print(f" [churchangel] {len(blocks)} listings")
+    return listings
 
-    await context.close()
-    await browser.close()
-    return all_listings
+async def scrape_listings(fetcher, run):
+    # ChurchFinder pages queue behind each other on the host's politeness;
+    # FaithStreet and ChurchAngel load on other contexts meanwhile
+    churchfinder, faithstreet, churchangel = await asyncio.gather(
+        fetcher.pool.run(range(1, 51), lambda i: scrape_churchfinder_page(fetcher, i, run)),
+        scrape_faithstreet(fetcher, run),
+        scrape_churchangel(fetcher, run))
+    all_listings = [l for page in churchfinder if page for l in page]
+    return all_listings + faithstreet + churchangel
 
-async def deep_scan(playwright, listings, checkpoint):
+async def scan_church(fetcher, church, run, position):
+    url = church["URL"]
+    if run.expired():
+        return []
+    print(f"\n[{position}] Scanning {url}")
+    deadline = run.child(SITE_DEADLINE)
+    SESSION.new_site(url)   # this church's byte budget for static fetches; directory hosts have none
     results = []
-    browser = await playwright.chromium.launch(headless=True)
-    context = await browser.new_context()
-    page = await context.new_page()
 
-    for i, church in enumerate(listings, start=1):
-        url = church["URL"]
-        if url in checkpoint["visited"]:
-            continue
-        print(f"\n[{i}/{len(listings)}] Scanning {url}")
+    # main page
+    html, _ = await fetcher.fetch(url, deadline=deadline)
+    if not html:
+        return results
+    soup = BeautifulSoup(html, "html.parser")
+    text = soup.get_text(" ", strip=True)
+    if keyword_hit(text):
+        snippet = text[:500]
+        results.append({**church, "MatchPage": url, "MatchType": "main", "MatchSnippet": snippet})
+        print(f"  [match] main page {url}")
 
-        # main page
-        html = await fetch_html(page, url)
-        if not html:
-            continue
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(" ", strip=True)
-        if keyword_hit(text):
-            snippet = text[:500]
-            results.append({**church, "MatchPage": url, "MatchType": "main", "MatchSnippet": snippet})
-            print("  [match] main page")
-
-        # subpages
-        sublinks = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"].lower()
-            if any(h in href for h in SUBPAGE_HINTS):
-                full = urljoin(url, href)
-                if urlparse(full).netloc == urlparse(url).netloc:
-                    sublinks.append(full)
-        sublinks = list(set(sublinks))[:10]
-
-        for sub in sublinks:
-            html_sub = await fetch_html(page, sub)
-            soup_sub = BeautifulSoup(html_sub, "html.parser")
-            text_sub = soup_sub.get_text(" ", strip=True)
-            if keyword_hit(text_sub):
-                snippet = text_sub[:500]
-                results.append({**church, "MatchPage": sub, "MatchType": "subpage", "MatchSnippet": snippet})
-                print(f"  [match] {sub}")
-            safe_pause(2, 4, "subpage")
-
-        checkpoint["visited"].append(url)
-        save_checkpoint(checkpoint)
-        safe_pause(3, 6, "between churches")
-
-    await context.close()
-    await browser.close()
+    # subpages
+    sublinks = []
+    for a in soup.find_all("a", href=True):
+        href = a["href"].lower()
+        if any(h in href for h in SUBPAGE_HINTS):
+            full = urljoin(url, href)
+            if urlparse(full).netloc == urlparse(url).netloc:
+                sublinks.append(full)
+    sublinks = list(set(sublinks))[:10]
+
+    for sub in sublinks:
+        if deadline.expired():
+            # Keep the matches so far; the church is not marked, so a later run scans it again
+            print(f"  [{DEADLINE}] site deadline reached, {url} partially scanned; left for the next run")
+            return results
+        html_sub, _ = await fetcher.fetch(sub, deadline=deadline)
+        soup_sub = BeautifulSoup(html_sub, "html.parser")
+        text_sub = soup_sub.get_text(" ", strip=True)
+        if keyword_hit(text_sub):
+            snippet = text_sub[:500]
+            results.append({**church, "MatchPage": sub, "MatchType": "subpage", "MatchSnippet": snippet})
+            print(f"  [match] {sub}")
+
+    FRONTIER.mark(url)
     return results
 
+async def deep_scan(fetcher, listings, run):
+    todo = [c for c in listings if not FRONTIER.seen(c["URL"])]
+    numbered = [(f"{i}/{len(todo)}", church) for i, church in enumerate(todo, start=1)]
+    found = await fetcher.pool.run(numbered, lambda item: scan_church(fetcher, item[1], run, item[0]))
+    if run.expired():
+        left = sum(1 for c in todo if not FRONTIER.seen(c["URL"]))
+        print(f"\n[deadline] run budget spent - {left} churches left for next run")
+    return [match for matches in found if matches for match in matches]
+
 async def main():
-    checkpoint = load_checkpoint()
+    checkpoint = load_checkpoint(fresh="--fresh" in sys.argv)
     results = []
 
+    run = run_deadline()   # ASD_CRAWL_RUN_MINUTES, if set
     async with async_playwright() as p:
-        listings = await scrape_listings(p)
-        print(f"[info] Found {len(listings)} total church listings.")
-        results = await deep_scan(p, listings, checkpoint)
+        pool = await BrowserPool.start(p, size=POOL_SIZE, politeness=(3, 6))
+        fetcher = HybridFetcher(SESSION, pool, fetch_html)
+        try:
+            listings = await scrape_listings(fetcher, run)
+            print(f"[info] Found {len(listings)} total church listings.")
+            results = await deep_scan(fetcher, listings, run)
+        finally:
+            print(f"[fetch] {fetcher.summary()}")
+            print(f"[pool] {pool.summary()}")
+            FRONTIER.flush()
+            print(f"[frontier] {FRONTIER.summary()}")
+            await pool.close()
 
     if results:
         df = pd.DataFrame(results)
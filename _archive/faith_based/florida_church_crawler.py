@@ -9,13 +9,112 @@ from bs4 import BeautifulSoup
 import pandas as pd
 import time
 import random
-from urllib.parse import quote_plus, urljoin
+from urllib.parse import parse_qs, quote_plus, urljoin, urlsplit
 from datetime import datetime
 import re
 import json
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession
+from crawlkit.frontier import Frontier
+from crawlkit.queries import QueryGenerator
+from crawlkit.search_cache import TTL_DAYS, SearchCache
+from crawlkit.search_dispatch import Engine, SearchDispatcher, raise_for_block
+
+# Florida population (2020 census, rounded) of every location searched; a
+# city's queries weigh sqrt(population / POPULATION_REF), capped at 1
+CITY_POPULATION = {
+    "Florida": 21538000, "Miami": 442000, "Tampa": 385000, "Orlando": 308000,
+    "Jacksonville": 950000, "St Petersburg": 258000, "Hialeah": 223000, "Tallahassee": 196000,
+    "Fort Lauderdale": 183000, "Port St Lucie": 205000, "Cape Coral": 194000,
+    "Pembroke Pines": 171000, "Hollywood": 153000, "Miramar": 135000, "Gainesville": 141000,
+    "Coral Springs": 134000, "Miami Gardens": 112000, "Clearwater": 117000, "Palm Bay": 120000,
+    "Pompano Beach": 112000, "West Palm Beach": 117000, "Lakeland": 113000, "Davie": 106000,
+    "Miami Beach": 83000, "Plantation": 92000, "Sunrise": 97000, "Boca Raton": 97000,
+    "Deltona": 94000, "Largo": 82000, "Deerfield Beach": 87000, "Palm Coast": 89000,
+    "Melbourne": 85000, "Boynton Beach": 80000, "Lauderhill": 74000, "Weston": 68000,
+    "Fort Myers": 86000, "Kissimmee": 79000, "Homestead": 81000, "Tamarac": 72000,
+    "Delray Beach": 67000, "Daytona Beach": 73000, "North Miami": 60000, "Wellington": 62000,
+    "North Port": 75000, "Jupiter": 61000, "Ocala": 64000, "Port Orange": 63000,
+    "Margate": 59000, "Coconut Creek": 58000, "Sanford": 61000, "Sarasota": 55000,
+    "Pensacola": 54000, "Bradenton": 56000, "Palm Beach Gardens": 59000, "Pinellas Park": 53000,
+    "Coral Gables": 49000, "Doral": 76000, "Bonita Springs": 54000, "Apopka": 55000,
+    "Titusville": 49000, "Naples": 19000, "Fort Pierce": 47000, "Oakland Park": 44000,
+    "North Miami Beach": 44000, "Altamonte Springs": 46000, "St Cloud": 59000,
+    "Greenacres": 44000, "Ormond Beach": 43000, "Ocoee": 47000, "Hallandale Beach": 41000,
+    "Winter Garden": 47000, "Aventura": 40000, "Clermont": 43000, "Panama City": 33000,
+    "Riverview": 107000,
+}
+POPULATION_REF = 950000
+LOCATIONS = list(CITY_POPULATION)
+
+ENTITIES = [
+    "church", "churches", "parish", "congregation", "chapel", "ministry",
+    "catholic church", "baptist church", "methodist church", "lutheran church",
+    "presbyterian church", "episcopal church", "pentecostal church",
+    "non-denominational church", "evangelical church", "assemblies of god",
+    "church of christ", "seventh-day adventist", "nazarene church",
+    "wesleyan church", "reformed church", "orthodox church", "synagogue",
+    "temple", "mosque", "christian church", "protestant church", "megachurch",
+    "community church", "bible church", "worship center", "faith community"
+]
+
+ACCOMMODATIONS = [
+    "autism friendly", "autism", "autistic", "ASD", "autism spectrum",
+    "sensory friendly", "sensory sensitive", "sensory room", "quiet room",
+    "special needs", "neurodivergent", "neurodiverse", "disability accommodations",
+    "inclusive", "accessibility", "adaptive", "modified service",
+    "low sensory", "calm environment", "noise reducing", "sensory processing",
+    "SPD", "ADHD friendly", "developmental disabilities", "cognitive disabilities",
+    "buddy program", "peer support", "one-on-one support", "respite care",
+    "visual schedule", "social story", "communication devices", "AAC",
+    "wheelchair accessible", "mobility accommodations", "assistive technology",
+    "therapeutic support", "behavioral support", "calm space", "break room",
+    "headphones available", "fidget toys", "weighted blankets", "dimmed lights",
+    "flexible seating", "early service", "separate room", "quiet worship",
+    "streaming service", "online worship", "alternative format",
+    "individualized support", "trained staff", "autism trained",
+    "sensory integration", "overstimulation", "stimming friendly"
+]
+
+DESCRIPTORS = [
+    "ministry for", "program for", "services for", "supports",
+    "welcoming", "accepting", "inclusive of", "accommodating",
+    "specialized", "adapted", "modified", "tailored to"
+]
+
+PROGRAMS = [
+    "buddy ministry", "special needs ministry", "sensory worship",
+    "autism sunday school", "adaptive worship", "inclusion ministry",
+    "disability ministry", "accessible worship", "calm service"
+]
+
+QUESTIONS = [
+    "which churches have autism programs in",
+    "churches with sensory rooms in",
+    "autism friendly worship in",
+    "where can I find special needs church in",
+    "best churches for autism in",
+    "sensory friendly services in"
+]
+
+# Same families (and location subsets) as the old exhaustive cross product
+QUERY_FAMILIES = [
+    ("{entity} {acc} {loc}", {'entity': ENTITIES, 'acc': ACCOMMODATIONS, 'loc': LOCATIONS}),
+    ("{acc} {entity} {loc}", {'entity': ENTITIES, 'acc': ACCOMMODATIONS, 'loc': LOCATIONS}),
+    ("{loc} {entity} {acc}", {'entity': ENTITIES, 'acc': ACCOMMODATIONS, 'loc': LOCATIONS}),
+    ("{loc} {entity} {desc} {acc}",
+     {'loc': LOCATIONS[:20], 'entity': ENTITIES[:10], 'desc': DESCRIPTORS, 'acc': ACCOMMODATIONS[:15]}),
+    ("{prog} {loc} Florida", {'prog': PROGRAMS, 'loc': LOCATIONS[:30]}),
+    ("{loc} {prog}", {'prog': PROGRAMS, 'loc': LOCATIONS[:30]}),
+    ("{q} {loc} Florida", {'q': QUESTIONS, 'loc': LOCATIONS[:25]}),
+]
+LOCATION_WEIGHTS = {'loc': {city: min(1.0, (pop / POPULATION_REF) ** 0.5) for city, pop in CITY_POPULATION.items()}}
+
+
 class FloridaChurchCrawler:
     def __init__(self):
         # Set up directory structure
@@ -30,8 +129,13 @@ class FloridaChurchCrawler:
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         
         self.results = []
-        self.visited_urls = set()
-        self.session = requests.Session()
+        # Pages scraped (any spelling of their URL) and pages still to scrape, kept between runs
+        self.frontier = Frontier('florida_church', revisit_days=TTL_DAYS)
+        self.session = CrawlSession(name='florida_church')
+        # A query comes up again once its cached results have expired
+        self.queries = QueryGenerator('florida_church', QUERY_FAMILIES, LOCATION_WEIGHTS,
+                                      revisit_days=TTL_DAYS)
+        self.search_cache = SearchCache()
         
         # Rotate through realistic user agents
         self.user_agents = [
@@ -44,7 +148,22 @@ class FloridaChurchCrawler:
         
         self.update_headers()
         
-        # Rate limiting configuration
+        # Each engine searches on its own budget and backs off on its own (crawlkit/search_dispatch.py).
+        # The lanes search concurrently in threads, so each gets its own session (headers, deadline,
+        # connection pool) and rotates only its own headers; dead hosts are still shared
+        self.search_sessions = {name: CrawlSession(health=self.session.health, redirects=self.session.redirects,
+                                                   name=f'florida_church_{name}')
+                                for name in ('duckduckgo', 'bing')}
+        for session in self.search_sessions.values():
+            self.update_headers(session)
+        self.engines = [
+            Engine('duckduckgo', self.search_duckduckgo, per_minute=8, backoff=60,
+                   on_block=lambda: self.update_headers(self.search_sessions['duckduckgo'])),
+            Engine('bing', self.search_bing, per_minute=6, backoff=120,
+                   on_block=lambda: self.update_headers(self.search_sessions['bing'])),
+        ]
+        
+        # Rate limiting configuration (page scraping)
         self.request_count = 0
         self.last_request_time = time.time()
         self.min_delay = 3
@@ -66,9 +185,9 @@ class FloridaChurchCrawler:
         with open(self.log_file, 'a', encoding='utf-8') as f:
             f.write(log_message + '\n')
     
-    def update_headers(self):
-        """Rotate user agent and update headers to appear more human"""
-        self.session.headers.update({
+    def update_headers(self, session=None):
+        """Rotate user agent and update headers (of session, default the page session) to appear more human"""
+        (session or self.session).headers.update({
             'User-Agent': random.choice(self.user_agents),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
@@ -88,7 +207,7 @@ class FloridaChurchCrawler:
         
         if self.request_count % self.cooldown_after == 0:
             self.log(f"⏸️  Taking extended cooldown ({self.long_cooldown}s) after {self.request_count} requests...")
-            time.sleep(self.long_cooldown)
+            self.session.sleep(self.long_cooldown, 'cooldown')
             self.update_headers()
             return
         
@@ -106,225 +225,63 @@ class FloridaChurchCrawler:
             total_delay += random.uniform(5, 15)
             self.log(f"   💤 Random extended pause: {total_delay:.1f}s")
         
-        time.sleep(total_delay)
+        self.session.sleep(total_delay, 'delay')
         self.last_request_time = time.time()
         
         if self.request_count % 10 == 0:
             self.update_headers()
         
-    def generate_search_queries(self):
-        """Generate exhaustive combinations of search terms"""
-        
-        locations = [
-            "Florida", "Miami", "Tampa", "Orlando", "Jacksonville", "St Petersburg",
-            "Hialeah", "Tallahassee", "Fort Lauderdale", "Port St Lucie", "Cape Coral",
-            "Pembroke Pines", "Hollywood", "Miramar", "Gainesville", "Coral Springs",
-            "Miami Gardens", "Clearwater", "Palm Bay", "Pompano Beach", "West Palm Beach",
-            "Lakeland", "Davie", "Miami Beach", "Plantation", "Sunrise", "Boca Raton",
-            "Deltona", "Largo", "Deerfield Beach", "Palm Coast", "Melbourne", "Boynton Beach",
-            "Lauderhill", "Weston", "Fort Myers", "Kissimmee", "Homestead", "Tamarac",
-            "Delray Beach", "Daytona Beach", "North Miami", "Wellington", "North Port",
-            "Jupiter", "Ocala", "Port Orange", "Margate", "Coconut Creek", "Sanford",
-            "Sarasota", "Pensacola", "Bradenton", "Palm Beach Gardens", "Pinellas Park",
-            "Coral Gables", "Doral", "Bonita Springs", "Apopka", "Titusville", "Naples",
-            "Fort Pierce", "Oakland Park", "North Miami Beach", "Altamonte Springs",
-            "St Cloud", "Greenacres", "Ormond Beach", "Ocoee", "Hallandale Beach",
-            "Winter Garden", "Aventura", "Clermont", "Panama City", "Riverview"
-        ]
-        
-        entities = [
-            "church", "churches", "parish", "congregation", "chapel", "ministry",
-            "catholic church", "baptist church", "methodist church", "lutheran church",
-            "presbyterian church", "episcopal church", "pentecostal church",
-            "non-denominational church", "evangelical church", "assemblies of god",
-            "church of christ", "seventh-day adventist", "nazarene church",
-            "wesleyan church", "reformed church", "orthodox church", "synagogue",
-            "temple", "mosque", "christian church", "protestant church", "megachurch",
-            "community church", "bible church", "worship center", "faith community"
-        ]
-        
-        accommodations = [
-            "autism friendly", "autism", "autistic", "ASD", "autism spectrum",
-            "sensory friendly", "sensory sensitive", "sensory room", "quiet room",
-            "special needs", "neurodivergent", "neurodiverse", "disability accommodations",
-            "inclusive", "accessibility", "adaptive", "modified service",
-            "low sensory", "calm environment", "noise reducing", "sensory processing",
-            "SPD", "ADHD friendly", "developmental disabilities", "cognitive disabilities",
-            "buddy program", "peer support", "one-on-one support", "respite care",
-            "visual schedule", "social story", "communication devices", "AAC",
-            "wheelchair accessible", "mobility accommodations", "assistive technology",
-            "therapeutic support", "behavioral support", "calm space", "break room",
-            "headphones available", "fidget toys", "weighted blankets", "dimmed lights",
-            "flexible seating", "early service", "separate room", "quiet worship",
-            "streaming service", "online worship", "alternative format",
-            "individualized support", "trained staff", "autism trained",
-            "sensory integration", "overstimulation", "stimming friendly"
-        ]
-        
-        descriptors = [
-            "ministry for", "program for", "services for", "supports",
-            "welcoming", "accepting", "inclusive of", "accommodating",
-            "specialized", "adapted", "modified", "tailored to"
-        ]
-        
-        queries = []
-        
-        for loc in locations:
-            for entity in entities:
-                for acc in accommodations:
-                    queries.append(f"{entity} {acc} {loc}")
-                    queries.append(f"{acc} {entity} {loc}")
-                    queries.append(f"{loc} {entity} {acc}")
-        
-        for loc in locations[:20]:
-            for desc in descriptors:
-                for acc in accommodations[:15]:
-                    for entity in entities[:10]:
-                        queries.append(f"{loc} {entity} {desc} {acc}")
-        
-        programs = [
-            "buddy ministry", "special needs ministry", "sensory worship",
-            "autism sunday school", "adaptive worship", "inclusion ministry",
-            "disability ministry", "accessible worship", "calm service"
-        ]
-        
-        for loc in locations[:30]:
-            for prog in programs:
-                queries.append(f"{prog} {loc} Florida")
-                queries.append(f"{loc} {prog}")
-        
-        questions = [
-            "which churches have autism programs in",
-            "churches with sensory rooms in",
-            "autism friendly worship in",
-            "where can I find special needs church in",
-            "best churches for autism in",
-            "sensory friendly services in"
-        ]
-        
-        for loc in locations[:25]:
-            for q in questions:
-                queries.append(f"{q} {loc} Florida")
-        
-        return list(set(queries))
+    def generate_search_queries(self, limit=None):
+        """Yield search queries lazily, best first (crawlkit/queries.py); skips ones earlier runs issued"""
+        return self.queries.queries(limit)
     
-    def search_duckduckgo(self, query, retry_count=0):
-        """Search using DuckDuckGo HTML with retry logic"""
-        max_retries = 3
-        results = []
+    def search_duckduckgo(self, query):
+        """One DuckDuckGo HTML search; a 429 / 403 / CAPTCHA raises SearchBlocked and the dispatcher backs off"""
+        url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
+        response = self.search_sessions['duckduckgo'].get(url, timeout=15)
+        raise_for_block(response)
         
-        try:
-            self.smart_delay()
-            
-            url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            response = self.session.get(url, timeout=15)
-            
-            if response.status_code == 429:
-                self.log(f"   ⚠️  Rate limited by DuckDuckGo. Waiting 60s...")
-                time.sleep(60)
-                if retry_count < max_retries:
-                    return self.search_duckduckgo(query, retry_count + 1)
-                return results
-            
-            if response.status_code == 403:
-                self.log(f"   🚫 Access forbidden. Rotating headers and retrying...")
-                self.update_headers()
-                time.sleep(30)
-                if retry_count < max_retries:
-                    return self.search_duckduckgo(query, retry_count + 1)
-                return results
-            
-            if response.status_code != 200:
-                self.log(f"   ❌ Unexpected status code: {response.status_code}")
-                return results
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            for result in soup.find_all('div', class_='result'):
-                title_elem = result.find('a', class_='result__a')
-                snippet_elem = result.find('a', class_='result__snippet')
-                
-                if title_elem:
-                    results.append({
-                        'title': title_elem.get_text(strip=True),
-                        'url': title_elem.get('href', ''),
-                        'snippet': snippet_elem.get_text(strip=True) if snippet_elem else '',
-                        'source': 'DuckDuckGo'
-                    })
-            
-        except requests.exceptions.Timeout:
-            self.log(f"   ⏱️  Timeout error. Retrying...")
-            if retry_count < max_retries:
-                time.sleep(10)
-                return self.search_duckduckgo(query, retry_count + 1)
-        except requests.exceptions.ConnectionError:
-            self.log(f"   🔌 Connection error. Waiting before retry...")
-            if retry_count < max_retries:
-                time.sleep(30)
-                return self.search_duckduckgo(query, retry_count + 1)
-        except Exception as e:
-            self.log(f"   ❌ DuckDuckGo error: {str(e)[:100]}")
+        results = []
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        for result in soup.find_all('div', class_='result'):
+            title_elem = result.find('a', class_='result__a')
+            snippet_elem = result.find('a', class_='result__snippet')
+            
+            if title_elem:
+                href = title_elem.get('href', '')
+                # Result links go through DuckDuckGo's redirector; keep the target
+                target = parse_qs(urlsplit(href).query).get('uddg') if '/l/?' in href else None
+                results.append({
+                    'title': title_elem.get_text(strip=True),
+                    'url': target[0] if target else href,
+                    'snippet': snippet_elem.get_text(strip=True) if snippet_elem else '',
+                    'source': 'DuckDuckGo'
+                })
         
         return results
     
-    def search_bing(self, query, retry_count=0):
-        """Search using Bing with enhanced anti-blocking measures"""
-        max_retries = 3
+    def search_bing(self, query):
+        """One Bing search; a 429 / 403 / CAPTCHA raises SearchBlocked and the dispatcher backs off"""
+        url = f"https://www.bing.com/search?q={quote_plus(query)}"
+        response = self.search_sessions['bing'].get(url, timeout=15)
+        raise_for_block(response)
+        
         results = []
+        soup = BeautifulSoup(response.content, 'html.parser')
         
-        try:
-            self.smart_delay()
-            
-            url = f"https://www.bing.com/search?q={quote_plus(query)}"
-            response = self.session.get(url, timeout=15)
-            
-            if response.status_code == 429 or 'captcha' in response.text.lower():
-                self.log(f"   ⚠️  Bing rate limit or CAPTCHA detected. Extended cooldown...")
-                time.sleep(120)
-                self.update_headers()
-                if retry_count < max_retries:
-                    return self.search_bing(query, retry_count + 1)
-                return results
-            
-            if response.status_code == 403:
-                self.log(f"   🚫 Bing access forbidden. Switching strategy...")
-                time.sleep(60)
-                self.update_headers()
-                if retry_count < max_retries:
-                    return self.search_bing(query, retry_count + 1)
-                return results
-            
-            if response.status_code != 200:
-                self.log(f"   ❌ Bing status code: {response.status_code}")
-                return results
+        for result in soup.find_all('li', class_='b_algo'):
+            title_elem = result.find('h2')
+            link_elem = result.find('a')
+            snippet_elem = result.find('p')
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            for result in soup.find_all('li', class_='b_algo'):
-                title_elem = result.find('h2')
-                link_elem = result.find('a')
-                snippet_elem = result.find('p')
-                
-                if title_elem and link_elem:
-                    results.append({
-                        'title': title_elem.get_text(strip=True),
-                        'url': link_elem.get('href', ''),
-                        'snippet': snippet_elem.get_text(strip=True) if snippet_elem else '',
-                        'source': 'Bing'
-                    })
-            
-        except requests.exceptions.Timeout:
-            self.log(f"   ⏱️  Timeout. Retrying with longer timeout...")
-            if retry_count < max_retries:
-                time.sleep(15)
-                return self.search_bing(query, retry_count + 1)
-        except requests.exceptions.ConnectionError:
-            self.log(f"   🔌 Connection lost. Waiting before retry...")
-            if retry_count < max_retries:
-                time.sleep(30)
-                return self.search_bing(query, retry_count + 1)
-        except Exception as e:
-            self.log(f"   ❌ Bing error: {str(e)[:100]}")
+            if title_elem and link_elem:
+                results.append({
+                    'title': title_elem.get_text(strip=True),
+                    'url': link_elem.get('href', ''),
+                    'snippet': snippet_elem.get_text(strip=True) if snippet_elem else '',
+                    'source': 'Bing'
+                })
         
         return results
     
@@ -357,10 +314,13 @@ class FloridaChurchCrawler:
         """Scrape individual page with anti-blocking measures"""
         max_retries = 2
         
-        if url in self.visited_urls:
+        if self.frontier.seen(url):
             return None
         
-        self.visited_urls.add(url)
+        dead = self.session.health.check(url)
+        if dead:
+            self.log(f"   💀 Dead domain ({dead['status']}): {url[:50]}... Skipping.")
+            return None
         
         try:
             self.smart_delay()
@@ -371,13 +331,21 @@ class FloridaChurchCrawler:
                 self.log(f"   🚫 Blocked on {url[:50]}... Skipping.")
                 return None
             
+            if response.status_code >= 500:
+                return None
+            
             if response.status_code != 200:
+                self.frontier.mark(url)
                 return None
             
             if 'captcha' in response.text.lower() or 'robot' in response.text.lower():
                 self.log(f"   🤖 CAPTCHA detected. Skipping this page.")
                 return None
             
+            # Marked only once the site gave a real answer: blocks, CAPTCHAs, 5xx and
+            # network errors leave the page queued for the next run
+            self.frontier.mark(url)
+            
             soup = BeautifulSoup(response.content, 'html.parser')
             
             text_content = soup.get_text(separator=' ', strip=True).lower()
@@ -430,70 +398,55 @@ class FloridaChurchCrawler:
         self.log("STARTING EXHAUSTIVE CRAWL")
         self.log("=" * 80)
         
-        self.log("Generating search queries...")
-        queries = self.generate_search_queries()
-        self.log(f"Generated {len(queries)} unique search queries")
-        
-        queries_to_run = queries[:max_queries]
-        self.log(f"Running first {len(queries_to_run)} queries...\n")
+        queries_to_run = self.generate_search_queries(limit=max_queries)
+        self.log(f"Query space: {self.queries.total():,} combinations, "
+                 f"{len(self.queries.issued):,} already issued in earlier runs")
+        self.log(f"Running the best {max_queries} new queries...\n")
         
         all_search_results = []
-        consecutive_failures = 0
-        max_consecutive_failures = 5
+        dispatcher = SearchDispatcher(self.engines, cache=self.search_cache, log=self.log)
         
-        for i, query in enumerate(queries_to_run):
-            self.log(f"\n[{i+1}/{len(queries_to_run)}] Query: {query[:70]}...")
-            
-            search_engine_choice = i % 3
-            
-            if search_engine_choice == 0:
-                self.log("   🔍 Using DuckDuckGo")
-                results = self.search_duckduckgo(query)
-            elif search_engine_choice == 1:
-                self.log("   🔍 Using Bing")
-                results = self.search_bing(query)
-            else:
-                self.log("   ⏭️  Skipping (pattern variation)")
-                time.sleep(random.uniform(2, 5))
-                continue
-            
-            if not results:
-                consecutive_failures += 1
-                self.log(f"   ⚠️  No results ({consecutive_failures} consecutive failures)")
-                
-                if consecutive_failures >= max_consecutive_failures:
-                    self.log(f"\n   🛑 Too many consecutive failures. Taking extended break...")
-                    time.sleep(180)
-                    self.update_headers()
-                    consecutive_failures = 0
+        def handle(answer):
+            if answer.error:
+                self.log(f"   ⊘  {answer.engine}: {answer.query[:60]} ({answer.error})")
             else:
-                consecutive_failures = 0
-                self.log(f"   ✅ Found {len(results)} results")
-                
-                for result in results:
-                    result['search_query'] = query
-                    result['search_timestamp'] = datetime.now().isoformat()
-                    all_search_results.append(result)
-            
-            if (i + 1) % 50 == 0:
-                self.save_progress(all_search_results, f"search_progress_{i+1}")
+                self.log(f"   {'📦' if answer.cached else '🔍'} {answer.engine}: {answer.query[:60]} "
+                         f"- {len(answer.results)} new result(s)")
+            for result in answer.results:
+                result['search_query'] = answer.query
+                result['search_timestamp'] = datetime.now().isoformat()
+                all_search_results.append(result)
+            if not answer.done:
+                return
+            # A query no engine answered is not recorded, so it comes up again next run
+            if answer.answered:
+                self.queries.record(answer.query, answer.total)
+            self.log(f"[{dispatcher.completed}/{max_queries}] ✅ {answer.query[:70]}: {answer.total} result(s) "
+                     f"from {answer.answered} engine(s)")
+            if dispatcher.completed % 50 == 0:
+                self.save_progress(all_search_results, f"search_progress_{dispatcher.completed}")
                 self.log(f"\n   💾 Progress saved. Total results so far: {len(all_search_results)}")
-            
-            if (i + 1) % 100 == 0:
-                self.log(f"\n   ☕ Extended break after 100 queries (120s)...")
-                time.sleep(120)
-                self.update_headers()
+        
+        dispatcher.run(queries_to_run, handle)
         
         self.log(f"\n{'='*80}")
         self.log(f"SEARCH PHASE COMPLETE")
+        self.log(f"Queries: {self.queries.summary()}")
+        self.log(f"Search cache: {self.search_cache.summary()}")
+        self.log(f"Engines: {dispatcher.summary()}")
+        
+        # Equivalent queries were not issued; their results are the representative's
+        variants = {}
+        for result in all_search_results:
+            query = result['search_query']
+            if query not in variants:
+                variants[query] = '; '.join(self.queries.variants(query))
+            result['query_variants'] = variants[query]
         self.log(f"Total search results collected: {len(all_search_results)}")
         self.log(f"{'='*80}\n")
         
-        unique_urls = {}
-        for result in all_search_results:
-            url = result['url']
-            if url not in unique_urls:
-                unique_urls[url] = result
+        # The dispatcher already dropped URLs found before (by any engine or query)
+        unique_urls = {result['url']: result for result in all_search_results}
         
         self.log(f"Unique URLs found: {len(unique_urls)}")
         
@@ -503,10 +456,17 @@ class FloridaChurchCrawler:
         self.log("DEEP SCRAPING PHASE")
         self.log(f"{'='*80}\n")
         
+        # Pages scraped before (as any variant of the URL) are skipped; the rest queue
+        # per host, and what this run does not reach is left for the next one
+        for url, search_result in unique_urls.items():
+            self.frontier.push(url, search_result)
+        self.log(f"Frontier: {self.frontier.summary()}\n")
+        
         detailed_results = []
-        scrape_limit = min(300, len(unique_urls))
+        scrape_limit = min(300, self.frontier.pending())
         
-        for i, (url, search_result) in enumerate(list(unique_urls.items())[:scrape_limit]):
+        for i in range(scrape_limit):
+            url, search_result = self.frontier.pop()
             self.log(f"[{i+1}/{scrape_limit}] Scraping: {url[:60]}...")
             
             page_data = self.scrape_page(url)
@@ -519,12 +479,14 @@ class FloridaChurchCrawler:
             
             if (i + 1) % 25 == 0:
                 self.log(f"\n   ⏸️  Checkpoint break (30s)...")
-                time.sleep(30)
+                self.session.sleep(30, 'cooldown')
                 self.update_headers()
         
         self.results = detailed_results
+        self.frontier.flush()
         self.log(f"\n{'='*80}")
         self.log(f"Final detailed results: {len(detailed_results)}")
+        self.log(f"Frontier: {self.frontier.summary()}")
         self.log(f"{'='*80}\n")
         
         return detailed_results
@@ -553,7 +515,7 @@ class FloridaChurchCrawler:
         
         final_columns = [
             'title', 'url', 'snippet', 'email', 'phone', 'address',
-            'accommodation_keywords', 'programs_offered', 'search_query',
+            'accommodation_keywords', 'programs_offered', 'search_query', 'query_variants',
             'source', 'search_timestamp'
         ]
         
@@ -573,8 +535,8 @@ if __name__ == "__main__":
     print("Running from: C:\\Projects\\ASD-Directory\\faith_based")
     print("=" * 80)
     print("\nThis crawler will:")
-    print("- Generate 1000+ unique search queries")
-    print("- Search multiple engines (DuckDuckGo, Bing)")
+    print("- Issue the best new search queries first (city size, past yield, novelty)")
+    print("- Search multiple engines (DuckDuckGo, Bing) in parallel, each on its own rate budget")
     print("- Cover all major Florida cities")
     print("- Use exhaustive accommodation terminology")
     print("- Deep scrape relevant pages")
@@ -16,14 +16,29 @@ Usage:
 
 import csv
 import json
-import time
 import re
-from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 from collections import defaultdict
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, DeadDomainError, DeadlineExceeded, SkippedContent, documents
+from crawlkit.deadline import DEADLINE
+from crawlkit.corpus import Corpus
+from crawlkit.fingerprint import FingerprintStore, analyzer_version
+from crawlkit.links import extract_links
+from crawlkit.stream_match import StreamMatcher
+from crawlkit.windowed import WindowRule
+
+# Wall-clock cap per provider site (homepage + subpages + sleeps), seconds.
+# Set ASD_CRAWL_RUN_MINUTES to also cap the whole run.
+SITE_DEADLINE = 30
+
+# Subpages worth reading besides the homepage (matched in link URL and text)
+SUBPAGE_HINTS = ['therap', 'service', 'about', 'program']
+
 # ============================================================================
 # KEYWORD DEFINITIONS
 # ============================================================================
@@ -63,23 +78,31 @@ AUTISM_KEYWORDS = [
 # EXCLUSION: Red flags that indicate NON-therapy services
 EXCLUSION_KEYWORDS = [
     r'veterinary clinic', r'animal hospital', r'pet hospital',
-    r'emergency vet', r'urgent care.*animal',
+    r'emergency vet', WindowRule(r'urgent care', requires=r'animal'),
     r'dog grooming', r'pet grooming', r'boarding kennel',
     r'pet daycare', r'dog daycare',
-    r'obedience training(?!.*therapy)', r'puppy training(?!.*therapy)',
+    WindowRule(r'obedience training', unless=r'therapy'), WindowRule(r'puppy training', unless=r'therapy'),
 ]
 
+# analyze_content's decision as a score, for deciding mid-crawl: one therapy
+# keyword outranks every autism keyword together
+SCORE_WEIGHTS = {'therapy': len(AUTISM_KEYWORDS) + 1, 'autism': 1}
+DECISION_BANDS = [(SCORE_WEIGHTS['therapy'], 'KEEP'), (1, 'FLAG_FOR_REVIEW')]
+
 # ============================================================================
 # CRAWLER CLASS
 # ============================================================================
 
 class TherapyCrawler:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = CrawlSession(site_seconds=SITE_DEADLINE, name='aggressive')
+        documents.register(self.session)  # PDF/DOCX service lists -> text, out of process
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.timeout = 10
+        self.last_pages = []  # [(url, text)] of the last crawl, for the corpus
+        self.cut_short = None  # why the last crawl stopped before its last subpage
         
     def clean_url(self, url):
         """Clean and validate URL"""
@@ -95,11 +118,18 @@ class TherapyCrawler:
         
         return url
     
-    def crawl_website(self, url, max_pages=5):
-        """Crawl website and extract text content"""
+    def crawl_website(self, url, max_pages=5, site=None):
+        """Crawl website; returns (pages read, status), pages None if the crawl failed
+
+        With site (a StreamMatcher) the pages are fed to it as they arrive and
+        the crawl stops once its verdict is settled; self.cut_short says so.
+        """
         if not url:
             return None, "No website"
         
+        self.session.new_site(url)
+        self.last_pages = []
+        self.cut_short = None
         try:
             # Get homepage
             response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
@@ -114,36 +144,48 @@ class TherapyCrawler:
             # Get all text
             text = soup.get_text(separator=' ', strip=True)
             text = re.sub(r'\s+', ' ', text).lower()
+            self.last_pages.append((response.url, text))
+            if site is not None:
+                site.feed(text)
             
             # Also check common subpages
-            subpages_to_check = []
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
-                # Look for therapy/services/about pages
-                if any(keyword in href for keyword in ['therap', 'service', 'about', 'program']):
-                    full_url = urljoin(url, link['href'])
-                    if urlparse(full_url).netloc == urlparse(url).netloc:
-                        subpages_to_check.append(full_url)
+            # Nav/footer links are site-wide boilerplate, not this provider's subpages
+            subpages_to_check = [link.url for link in extract_links(
+                response.text, response.url, SUBPAGE_HINTS, skip=('nav', 'footer'))]
             
             # Check up to max_pages subpages
-            subpage_texts = []
-            for subpage in subpages_to_check[:max_pages-1]:
+            subpages = subpages_to_check[:max_pages-1]
+            for n, subpage in enumerate(subpages):
+                if site is not None and site.decided():
+                    # no further page can change the verdict
+                    self.cut_short = f"verdict settled after {n + 1} of {len(subpages) + 1} page(s)"
+                    break
                 try:
                     sub_response = self.session.get(subpage, timeout=self.timeout)
                     sub_soup = BeautifulSoup(sub_response.content, 'html.parser')
                     for script in sub_soup(["script", "style"]):
                         script.decompose()
                     subpage_text = sub_soup.get_text(separator=' ', strip=True).lower()
-                    subpage_texts.append(subpage_text)
-                    time.sleep(0.5)  # Be nice to servers
+                    if site is not None:
+                        site.feed(subpage_text)
+                    self.last_pages.append((subpage, subpage_text))
+                    self.session.sleep(0.5, 'polite')  # Be nice to servers
+                except DeadlineExceeded:
+                    break  # keep the pages already read; status says DEADLINE
                 except:
                     continue
             
-            # Combine all text
-            full_text = text + ' ' + ' '.join(subpage_texts)
-            
-            return full_text, "Success"
+            status = self.session.crawl_status(url)
+            if self.cut_short:
+                status = f"{status} (stopped early: {self.cut_short})"
+            return self.last_pages, status
             
+        except DeadlineExceeded:
+            return None, DEADLINE
+        except DeadDomainError as e:
+            return None, f"Dead domain: {e.status}"
+        except SkippedContent as e:
+            return None, f"Skipped: {e.reason}"
         except requests.Timeout:
             return None, "Timeout"
         except requests.RequestException as e:
@@ -151,8 +193,17 @@ class TherapyCrawler:
         except Exception as e:
             return None, f"Parse error: {str(e)[:100]}"
     
+    def site_matcher(self):
+        """StreamMatcher over the keyword lists above, decided like analyze_content"""
+        return StreamMatcher(
+            {'therapy': THERAPY_KEYWORDS, 'autism': AUTISM_KEYWORDS, 'exclusion': EXCLUSION_KEYWORDS},
+            weights=SCORE_WEIGHTS, bands=DECISION_BANDS, default='REJECT')
+
     def analyze_content(self, text, provider_name):
-        """Analyze text for THERAPY and AUTISM keywords"""
+        """Analyze text for THERAPY and AUTISM keywords
+
+        text is the site text, or the StreamMatcher crawl_website fed page by page.
+        """
         if not text:
             return {
                 'has_therapy': False,
@@ -165,23 +216,13 @@ class TherapyCrawler:
                 'reason': 'No website content'
             }
         
-        # Check for therapy keywords
-        therapy_matches = []
-        for keyword in THERAPY_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                therapy_matches.append(keyword)
-        
-        # Check for autism keywords
-        autism_matches = []
-        for keyword in AUTISM_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                autism_matches.append(keyword)
+        site = text if isinstance(text, StreamMatcher) else self.site_matcher().feed(text)
+        site.finish()
         
-        # Check for exclusion keywords
-        exclusion_matches = []
-        for keyword in EXCLUSION_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                exclusion_matches.append(keyword)
+        # Therapy, autism and exclusion keywords
+        therapy_matches = site.matched('therapy')
+        autism_matches = site.matched('autism')
+        exclusion_matches = site.matched('exclusion')
         
         has_therapy = len(therapy_matches) > 0
         has_autism = len(autism_matches) > 0
@@ -220,6 +261,11 @@ def process_providers(input_csv):
     """Process all providers from CSV"""
     
     crawler = TherapyCrawler()
+    corpus = Corpus()
+    # Unchanged sites reuse last run's verdict; flips go to a review queue
+    fingerprints = FingerprintStore('aggressive', analyzer_version(
+        TherapyCrawler.analyze_content, TherapyCrawler.site_matcher, THERAPY_KEYWORDS, AUTISM_KEYWORDS,
+        EXCLUSION_KEYWORDS, SCORE_WEIGHTS, DECISION_BANDS))
     
     # Load providers
     providers = []
@@ -243,6 +289,10 @@ def process_providers(input_csv):
     
     # Process each provider
     for i, provider in enumerate(providers, 1):
+        if crawler.session.run_expired():
+            print(f"\n⏱️  Run budget spent - stopping with {len(providers) - i + 1} providers left")
+            break
+        
         name = provider.get('provider_name', 'Unknown')
         website = crawler.clean_url(provider.get('website', ''))
         
@@ -265,9 +315,13 @@ def process_providers(input_csv):
         print(f"  🌐 Crawling: {website}")
         
         # Crawl website
-        text, status = crawler.crawl_website(website)
+        provider_id = provider.get('id') or name
+        # A site with a stored verdict is read whole and only scored if it changed;
+        # the others are scored as pages arrive and may stop early
+        site = None if fingerprints.reusable(provider_id) else crawler.site_matcher()
+        pages, status = crawler.crawl_website(website, site=site)
         
-        if not text:
+        if not pages:
             print(f"  ⚠️  Crawl failed: {status}")
             result = {
                 **provider,
@@ -280,8 +334,15 @@ def process_providers(input_csv):
             results['REJECT'].append(result)
             stats['crawl_failed'] += 1
         else:
+            corpus.put_site(provider_id, pages, partial=crawler.cut_short)
+            
             # Analyze content
-            analysis = crawler.analyze_content(text, name)
+            analysis, reused = fingerprints.analyze(
+                provider_id, pages,
+                lambda: crawler.analyze_content(site or ' '.join(text for _, text in pages), name),
+                partial=bool(crawler.cut_short))
+            if reused:
+                print("  ♻️  Unchanged since last run - verdict reused")
             
             decision = analysis['decision']
             
@@ -294,7 +355,7 @@ def process_providers(input_csv):
             
             result = {
                 **provider,
-                'crawl_status': 'Success',
+                'crawl_status': status,
                 'decision': decision,
                 'reason': analysis['reason'],
                 'has_therapy': analysis['has_therapy'],
@@ -308,7 +369,7 @@ def process_providers(input_csv):
             stats[decision.lower()] += 1
         
         # Rate limiting
-        time.sleep(1)
+        crawler.session.sleep(1, 'polite')
         
         # Save progress every 50 providers
         if i % 50 == 0:
@@ -317,6 +378,12 @@ def process_providers(input_csv):
     
     # Final save
     save_results(results, stats)
+    print(f"\n♻️  Change detection: {fingerprints.summary()}")
+    if documents.shared_summary():
+        print(f"📄 Documents: {documents.shared_summary()}")
+    queue = fingerprints.review_queue()
+    if queue:
+        print(f"🔎 {len(queue)} provider(s) with material changes awaiting review (review_queue table)")
     print_final_summary(stats, len(providers))
 
 def save_results(results, stats):
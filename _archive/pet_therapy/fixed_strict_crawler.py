@@ -13,14 +13,29 @@ Usage:
 
 import csv
 import json
-import time
 import re
-from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 from collections import defaultdict
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, DeadDomainError, DeadlineExceeded, SkippedContent, documents
+from crawlkit.deadline import DEADLINE
+from crawlkit.corpus import Corpus
+from crawlkit.fingerprint import FingerprintStore, analyzer_version
+from crawlkit.links import extract_links
+from crawlkit.stream_match import ProximityCounter, StreamMatcher
+from crawlkit.windowed import WindowRule, compile_rule
+
+# Wall-clock cap per provider site (homepage + subpages + sleeps), seconds.
+# Set ASD_CRAWL_RUN_MINUTES to also cap the whole run.
+SITE_DEADLINE = 30
+
+# Subpages worth reading besides the homepage (matched in link URL and text)
+SUBPAGE_HINTS = ['therap', 'service', 'program', 'about']
+
 # ============================================================================
 # FIXED KEYWORD DEFINITIONS
 # ============================================================================
@@ -50,39 +65,39 @@ HUMAN_BENEFIT_KEYWORDS = [
     r'developmental',
     r'veterans',
     r'PTSD',
-    r'mental health.*(?:horse|animal|dog)',
+    WindowRule(r'mental health', requires=r'horse|animal|dog'),
 ]
 
 # EXCLUSIONS: Animal rehab/veterinary services (therapy FOR animals)
 ANIMAL_REHAB_EXCLUSIONS = [
-    r'animal rehabilitation(?!.*(?:for people|for children|for humans))',
+    WindowRule(r'animal rehabilitation', unless=r'for people|for children|for humans'),
     r'pet rehabilitation',
-    r'canine rehabilitation(?!.*service)',
-    r'dog rehabilitation(?!.*service)',
-    r'equine rehabilitation(?!.*therap)',
+    WindowRule(r'canine rehabilitation', unless=r'service'),
+    WindowRule(r'dog rehabilitation', unless=r'service'),
+    WindowRule(r'equine rehabilitation', unless=r'therap'),
     r'veterinary rehabilitation',
     r'vet rehab',
-    r'animal physical therapy(?!.*for people)',
+    WindowRule(r'animal physical therapy', unless=r'for people'),
     r'pet physical therapy',
-    r'canine physical therapy(?!.*service)',
-    r'dog physical therapy(?!.*service)',
+    WindowRule(r'canine physical therapy', unless=r'service'),
+    WindowRule(r'dog physical therapy', unless=r'service'),
     r'animal chiropractic',
     r'pet chiropractic',
     r'veterinary physical therapy',
-    r'animal hydrotherapy(?!.*assisted)',
-    r'canine hydrotherapy(?!.*service)',
+    WindowRule(r'animal hydrotherapy', unless=r'assisted'),
+    WindowRule(r'canine hydrotherapy', unless=r'service'),
 ]
 
 # Other NON-animal therapy exclusions
 NON_ANIMAL_THERAPY = [
-    r'physical therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'occupational therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'speech therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'chiropractic(?!.*(?:horse|equine|dog|animal|pet)).*(?:for people|human)',
-    r'massage therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'psychotherapy(?!.*(?:horse|equine|dog|animal|pet|assisted))',
-    r'counseling(?!.*(?:horse|equine|dog|animal|pet|assisted))',
-    r'ABA therapy(?!.*(?:horse|equine|dog|animal|pet))',
+    WindowRule(r'physical therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'occupational therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'speech therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'chiropractic', unless=r'horse|equine|dog|animal|pet', requires=r'for people|human'),
+    WindowRule(r'massage therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'psychotherapy', unless=r'horse|equine|dog|animal|pet|assisted'),
+    WindowRule(r'counseling', unless=r'horse|equine|dog|animal|pet|assisted'),
+    WindowRule(r'ABA therapy', unless=r'horse|equine|dog|animal|pet'),
 ]
 
 ANIMAL_WORDS = [
@@ -104,17 +119,34 @@ AUTISM_KEYWORDS = [
     r'neurodivergent', r'special needs',
 ]
 
+# Points per matching keyword (proximity: per animal/therapy pair). Shared by
+# analyze_content and batch_decide so the two always agree.
+SCORE_WEIGHTS = {
+    'rehab': -10,
+    'assisted': 10,
+    'human': 3,
+    'proximity': 1,
+    'non_animal': -3,
+}
+
+# analyze_content's (decision, confidence) by score, for deciding mid-crawl
+DECISION_BANDS = [(10, ('KEEP', 'HIGH')), (5, ('KEEP', 'MEDIUM')), (2, ('REVIEW', 'LOW')),
+                  (-5, ('REJECT', 'LOW'))]
+
 # ============================================================================
 # CRAWLER CLASS
 # ============================================================================
 
 class FixedStrictCrawler:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = CrawlSession(site_seconds=SITE_DEADLINE, name='fixed_strict')
+        documents.register(self.session)  # PDF/DOCX service lists -> text, out of process
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.timeout = 10
+        self.last_pages = []  # [(url, text)] of the last crawl, for the corpus
+        self.cut_short = None  # why the last crawl stopped before its last subpage
         
     def clean_url(self, url):
         """Clean and validate URL"""
@@ -127,11 +159,18 @@ class FixedStrictCrawler:
             url = 'https://' + url
         return url
     
-    def crawl_website(self, url, max_pages=5):
-        """Crawl website and extract text content"""
+    def crawl_website(self, url, max_pages=5, site=None):
+        """Crawl website; returns (pages read, status), pages None if the crawl failed
+
+        With site (a StreamMatcher) the pages are fed to it as they arrive and
+        the crawl stops once its verdict is settled; self.cut_short says so.
+        """
         if not url:
             return None, "No website"
         
+        self.session.new_site(url)
+        self.last_pages = []
+        self.cut_short = None
         try:
             response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
             response.raise_for_status()
@@ -143,33 +182,47 @@ class FixedStrictCrawler:
             
             text = soup.get_text(separator=' ', strip=True)
             text = re.sub(r'\s+', ' ', text).lower()
+            self.last_pages.append((response.url, text))
+            if site is not None:
+                site.feed(text)
             
             # Check subpages
-            subpages_to_check = []
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
-                if any(keyword in href for keyword in ['therap', 'service', 'program', 'about']):
-                    full_url = urljoin(url, link['href'])
-                    if urlparse(full_url).netloc == urlparse(url).netloc:
-                        subpages_to_check.append(full_url)
+            # Nav/footer links are site-wide boilerplate, not this provider's subpages
+            subpages_to_check = [link.url for link in extract_links(
+                response.text, response.url, SUBPAGE_HINTS, skip=('nav', 'footer'))]
             
-            subpage_texts = []
-            for subpage in subpages_to_check[:max_pages-1]:
+            subpages = subpages_to_check[:max_pages-1]
+            for n, subpage in enumerate(subpages):
+                if site is not None and site.decided():
+                    # no further page can change the verdict
+                    self.cut_short = f"verdict settled after {n + 1} of {len(subpages) + 1} page(s)"
+                    break
                 try:
                     sub_response = self.session.get(subpage, timeout=self.timeout)
                     sub_soup = BeautifulSoup(sub_response.content, 'html.parser')
                     for script in sub_soup(["script", "style"]):
                         script.decompose()
                     subpage_text = sub_soup.get_text(separator=' ', strip=True).lower()
-                    subpage_texts.append(subpage_text)
-                    time.sleep(0.5)
+                    if site is not None:
+                        site.feed(subpage_text)
+                    self.last_pages.append((subpage, subpage_text))
+                    self.session.sleep(0.5, 'polite')
+                except DeadlineExceeded:
+                    break  # keep the pages already read; status says DEADLINE
                 except:
                     continue
             
-            full_text = text + ' ' + ' '.join(subpage_texts)
-            
-            return full_text, "Success"
+            status = self.session.crawl_status(url)
+            if self.cut_short:
+                status = f"{status} (stopped early: {self.cut_short})"
+            return self.last_pages, status
             
+        except DeadlineExceeded:
+            return None, DEADLINE
+        except DeadDomainError as e:
+            return None, f"Dead domain: {e.status}"
+        except SkippedContent as e:
+            return None, f"Skipped: {e.reason}"
         except requests.Timeout:
             return None, "Timeout"
         except requests.RequestException as e:
@@ -193,8 +246,21 @@ class FixedStrictCrawler:
         
         return matches
     
+    def site_matcher(self):
+        """StreamMatcher over the keyword lists below, scored like analyze_content"""
+        return StreamMatcher(
+            {'rehab': ANIMAL_REHAB_EXCLUSIONS, 'assisted': ANIMAL_ASSISTED_THERAPY_KEYWORDS,
+             'human': HUMAN_BENEFIT_KEYWORDS, 'non_animal': NON_ANIMAL_THERAPY,
+             'autism': AUTISM_KEYWORDS},
+            counters={'proximity': ProximityCounter(ANIMAL_WORDS, THERAPY_WORDS)},
+            weights=SCORE_WEIGHTS, bands=DECISION_BANDS, default=('REJECT', 'NONE'),
+            veto=('rehab', ('REJECT', 'HIGH')))
+
     def analyze_content(self, text, provider_name):
-        """FIXED analysis that excludes animal rehab (therapy FOR animals)"""
+        """FIXED analysis that excludes animal rehab (therapy FOR animals)
+
+        text is the site text, or the StreamMatcher crawl_website fed page by page.
+        """
         if not text:
             return {
                 'decision': 'REJECT',
@@ -204,15 +270,14 @@ class FixedStrictCrawler:
                 'evidence': []
             }
         
+        site = text if isinstance(text, StreamMatcher) else self.site_matcher().feed(text)
+        site.finish()
         evidence = []
         score = 0
         
         # CHECK 1: Animal REHAB exclusions (therapy FOR animals) - STRONG NEGATIVE
-        animal_rehab_matches = []
-        for keyword in ANIMAL_REHAB_EXCLUSIONS:
-            if re.search(keyword, text, re.IGNORECASE):
-                animal_rehab_matches.append(keyword)
-                score -= 10  # Heavy penalty
+        animal_rehab_matches = site.matched('rehab')
+        score += len(animal_rehab_matches) * SCORE_WEIGHTS['rehab']  # Heavy penalty
         
         if animal_rehab_matches:
             evidence.append(f"🚫 ANIMAL REHAB: {animal_rehab_matches[0][:40]}")
@@ -226,43 +291,34 @@ class FixedStrictCrawler:
             }
         
         # CHECK 2: Animal-ASSISTED therapy keywords (HIGH CONFIDENCE)
-        animal_assisted_matches = []
-        for keyword in ANIMAL_ASSISTED_THERAPY_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                animal_assisted_matches.append(keyword)
-                score += 10  # Strong positive
+        animal_assisted_matches = site.matched('assisted')
+        score += len(animal_assisted_matches) * SCORE_WEIGHTS['assisted']  # Strong positive
         
         if animal_assisted_matches:
             evidence.extend([f"✓ {kw}" for kw in animal_assisted_matches[:3]])
         
         # CHECK 3: Human benefit context
-        human_benefit_matches = []
-        for keyword in HUMAN_BENEFIT_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                human_benefit_matches.append(keyword)
-                score += 3
+        human_benefit_matches = site.matched('human')
+        score += len(human_benefit_matches) * SCORE_WEIGHTS['human']
         
         if human_benefit_matches:
             evidence.extend([f"✓ {kw[:30]}" for kw in human_benefit_matches[:2]])
         
         # CHECK 4: Animal + therapy proximity (MEDIUM)
-        proximity_matches = self.check_animal_therapy_proximity(text)
-        if proximity_matches and not animal_rehab_matches:
-            score += len(proximity_matches) * 1  # Reduced weight
-            evidence.extend([f"~ {pm}" for pm in proximity_matches[:2]])
+        proximity_count = site.count('proximity')
+        if proximity_count and not animal_rehab_matches:
+            score += proximity_count * SCORE_WEIGHTS['proximity']  # Reduced weight
+            evidence.extend([f"~ {pm}" for pm in site.labels('proximity')[:2]])
         
         # CHECK 5: Non-animal therapy (NEGATIVE)
-        non_animal_matches = []
-        for keyword in NON_ANIMAL_THERAPY:
-            if re.search(keyword, text, re.IGNORECASE):
-                non_animal_matches.append(keyword)
-                score -= 3
+        non_animal_matches = site.matched('non_animal')
+        score += len(non_animal_matches) * SCORE_WEIGHTS['non_animal']
         
         if non_animal_matches:
             evidence.extend([f"✗ {kw[:30]}" for kw in non_animal_matches[:2]])
         
         # CHECK 6: Autism context
-        has_autism = any(re.search(kw, text, re.IGNORECASE) for kw in AUTISM_KEYWORDS)
+        has_autism = bool(site.matched('autism'))
         if has_autism:
             evidence.append("(autism-related)")
         
@@ -295,6 +351,40 @@ class FixedStrictCrawler:
             'evidence': evidence[:6]
         }
 
+    # ------------------------------------------------------------------
+    # Batch mode: the same model over the whole corpus at once
+    # ------------------------------------------------------------------
+
+    def matrix_columns(self):
+        """(group, name, counter) columns for crawlkit.scoring_matrix, one per pattern"""
+        columns = []
+        for group, keywords in [('rehab', ANIMAL_REHAB_EXCLUSIONS),
+                                ('assisted', ANIMAL_ASSISTED_THERAPY_KEYWORDS),
+                                ('human', HUMAN_BENEFIT_KEYWORDS),
+                                ('non_animal', NON_ANIMAL_THERAPY)]:
+            for keyword in keywords:
+                pattern = compile_rule(keyword)
+                columns.append((group, str(keyword),
+                                lambda text, p=pattern: 1 if p.search(text) else 0))
+        columns.append(('proximity', 'animal + therapy',
+                        lambda text: len(self.check_animal_therapy_proximity(text))))
+        return columns
+
+    def batch_decide(self, matrix, weights=None):
+        """Decisions for every row of a ScoringMatrix; same thresholds as analyze_content"""
+        import numpy as np
+        weights = {**SCORE_WEIGHTS, **(weights or {})}
+        rehab = matrix.group_hits('rehab') > 0
+        # analyze_content returns on a rehab hit, before anything else is scored
+        scores = np.where(rehab, matrix.scores({'rehab': weights['rehab']}),
+                          matrix.scores(weights))
+        decision = np.select([rehab, scores >= 5, scores >= 2],
+                             ['REJECT', 'KEEP', 'REVIEW'], 'REJECT')
+        empty = matrix.text_lengths == 0
+        confidence = np.select([empty, rehab, scores >= 10, scores >= 5, scores >= 2, scores < -5],
+                               ['NONE', 'HIGH', 'HIGH', 'MEDIUM', 'LOW', 'NONE'], 'LOW')
+        return scores, decision, confidence
+
 # ============================================================================
 # MAIN PROCESSING
 # ============================================================================
@@ -303,6 +393,14 @@ def process_providers(input_csv):
     """Process all providers from CSV"""
     
     crawler = FixedStrictCrawler()
+    corpus = Corpus()
+    # Unchanged sites reuse last run's verdict; flips go to a review queue
+    fingerprints = FingerprintStore('fixed_strict', analyzer_version(
+        FixedStrictCrawler.analyze_content, FixedStrictCrawler.site_matcher,
+        FixedStrictCrawler.check_animal_therapy_proximity,
+        ANIMAL_ASSISTED_THERAPY_KEYWORDS, HUMAN_BENEFIT_KEYWORDS,
+        ANIMAL_REHAB_EXCLUSIONS, NON_ANIMAL_THERAPY, ANIMAL_WORDS, THERAPY_WORDS,
+        AUTISM_KEYWORDS, SCORE_WEIGHTS, DECISION_BANDS))
     
     providers = []
     with open(input_csv, 'r', encoding='utf-8') as f:
@@ -325,6 +423,10 @@ def process_providers(input_csv):
     stats = defaultdict(int)
     
     for i, provider in enumerate(providers, 1):
+        if crawler.session.run_expired():
+            print(f"\n⏱️  Run budget spent - stopping with {len(providers) - i + 1} providers left")
+            break
+        
         name = provider.get('provider_name', 'Unknown')
         website = crawler.clean_url(provider.get('website', ''))
         
@@ -345,9 +447,13 @@ def process_providers(input_csv):
         
         print(f"  🌐 {website}")
         
-        text, status = crawler.crawl_website(website)
+        provider_id = provider.get('id') or name
+        # A site with a stored verdict is read whole and only scored if it changed;
+        # the others are scored as pages arrive and may stop early
+        site = None if fingerprints.reusable(provider_id) else crawler.site_matcher()
+        pages, status = crawler.crawl_website(website, site=site)
         
-        if not text:
+        if not pages:
             print(f"  ⚠️  Crawl failed: {status}")
             result = {
                 **provider,
@@ -359,7 +465,13 @@ def process_providers(input_csv):
             results['REJECT'].append(result)
             stats['crawl_failed'] += 1
         else:
-            analysis = crawler.analyze_content(text, name)
+            corpus.put_site(provider_id, pages, partial=crawler.cut_short)
+            analysis, reused = fingerprints.analyze(
+                provider_id, pages,
+                lambda: crawler.analyze_content(site or ' '.join(text for _, text in pages), name),
+                partial=bool(crawler.cut_short))
+            if reused:
+                print("  ♻️  Unchanged since last run - verdict reused")
             decision = analysis['decision']
             
             if decision == 'KEEP':
@@ -375,7 +487,7 @@ def process_providers(input_csv):
             
             result = {
                 **provider,
-                'crawl_status': 'Success',
+                'crawl_status': status,
                 'decision': decision,
                 'confidence': analysis['confidence'],
                 'reason': analysis['reason'],
@@ -386,13 +498,19 @@ def process_providers(input_csv):
             results[decision].append(result)
             stats[decision.lower()] += 1
         
-        time.sleep(1)
+        crawler.session.sleep(1, 'polite')
         
         if i % 50 == 0:
             save_results(results, stats)
             print(f"\n💾 Progress saved at {i}/{len(providers)}")
     
     save_results(results, stats)
+    print(f"\n♻️  Change detection: {fingerprints.summary()}")
+    if documents.shared_summary():
+        print(f"📄 Documents: {documents.shared_summary()}")
+    queue = fingerprints.review_queue()
+    if queue:
+        print(f"🔎 {len(queue)} provider(s) with material changes awaiting review (review_queue table)")
     print_final_summary(stats, len(providers))
 
 def save_results(results, stats):
@@ -19,14 +19,29 @@ Usage:
 
 import csv
 import json
-import time
 import re
-from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 from collections import defaultdict
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, DeadDomainError, DeadlineExceeded, SkippedContent, documents
+from crawlkit.deadline import DEADLINE
+from crawlkit.corpus import Corpus
+from crawlkit.fingerprint import FingerprintStore, analyzer_version
+from crawlkit.links import extract_links
+from crawlkit.stream_match import ProximityCounter, StreamMatcher
+from crawlkit.windowed import WindowRule
+
+# Wall-clock cap per provider site (homepage + subpages + sleeps), seconds.
+# Set ASD_CRAWL_RUN_MINUTES to also cap the whole run.
+SITE_DEADLINE = 30
+
+# Subpages worth reading besides the homepage (matched in link URL and text)
+SUBPAGE_HINTS = ['therap', 'service', 'program', 'about']
+
 # ============================================================================
 # STRICT KEYWORD DEFINITIONS
 # ============================================================================
@@ -75,27 +90,35 @@ AUTISM_KEYWORDS = [
 
 # EXCLUSIONS: Non-animal therapy that should be rejected
 NON_ANIMAL_THERAPY = [
-    r'physical therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'occupational therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'speech therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'chiropractic(?!.*(?:horse|equine|dog|animal|pet))',
-    r'massage therapy(?!.*(?:horse|equine|dog|animal|pet))',
-    r'psychotherapy(?!.*(?:horse|equine|dog|animal|pet|assisted))',
-    r'counseling(?!.*(?:horse|equine|dog|animal|pet|assisted))',
-    r'ABA therapy(?!.*(?:horse|equine|dog|animal|pet))',
+    WindowRule(r'physical therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'occupational therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'speech therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'chiropractic', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'massage therapy', unless=r'horse|equine|dog|animal|pet'),
+    WindowRule(r'psychotherapy', unless=r'horse|equine|dog|animal|pet|assisted'),
+    WindowRule(r'counseling', unless=r'horse|equine|dog|animal|pet|assisted'),
+    WindowRule(r'ABA therapy', unless=r'horse|equine|dog|animal|pet'),
 ]
 
+# Points per matching keyword (proximity: per animal/therapy pair), and
+# analyze_content's (decision, confidence) by score for deciding mid-crawl
+SCORE_WEIGHTS = {'animal': 5, 'proximity': 2, 'non_animal': -3}
+DECISION_BANDS = [(5, ('KEEP', 'HIGH')), (2, ('REVIEW', 'MEDIUM')), (-2, ('REJECT', 'LOW'))]
+
 # ============================================================================
 # CRAWLER CLASS
 # ============================================================================
 
 class StrictTherapyCrawler:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = CrawlSession(site_seconds=SITE_DEADLINE, name='strict')
+        documents.register(self.session)  # PDF/DOCX service lists -> text, out of process
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.timeout = 10
+        self.last_pages = []  # [(url, text)] of the last crawl, for the corpus
+        self.cut_short = None  # why the last crawl stopped before its last subpage
         
     def clean_url(self, url):
         """Clean and validate URL"""
@@ -111,11 +134,18 @@ class StrictTherapyCrawler:
         
         return url
     
-    def crawl_website(self, url, max_pages=5):
-        """Crawl website and extract text content"""
+    def crawl_website(self, url, max_pages=5, site=None):
+        """Crawl website; returns (pages read, status), pages None if the crawl failed
+
+        With site (a StreamMatcher) the pages are fed to it as they arrive and
+        the crawl stops once its verdict is settled; self.cut_short says so.
+        """
         if not url:
             return None, "No website"
         
+        self.session.new_site(url)
+        self.last_pages = []
+        self.cut_short = None
         try:
             response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
             response.raise_for_status()
@@ -129,34 +159,48 @@ class StrictTherapyCrawler:
             # Get all text
             text = soup.get_text(separator=' ', strip=True)
             text = re.sub(r'\s+', ' ', text).lower()
+            self.last_pages.append((response.url, text))
+            if site is not None:
+                site.feed(text)
             
             # Check subpages for therapy/services/programs
-            subpages_to_check = []
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
-                if any(keyword in href for keyword in ['therap', 'service', 'program', 'about']):
-                    full_url = urljoin(url, link['href'])
-                    if urlparse(full_url).netloc == urlparse(url).netloc:
-                        subpages_to_check.append(full_url)
+            # Nav/footer links are site-wide boilerplate, not this provider's subpages
+            subpages_to_check = [link.url for link in extract_links(
+                response.text, response.url, SUBPAGE_HINTS, skip=('nav', 'footer'))]
             
             # Check subpages
-            subpage_texts = []
-            for subpage in subpages_to_check[:max_pages-1]:
+            subpages = subpages_to_check[:max_pages-1]
+            for n, subpage in enumerate(subpages):
+                if site is not None and site.decided():
+                    # no further page can change the verdict
+                    self.cut_short = f"verdict settled after {n + 1} of {len(subpages) + 1} page(s)"
+                    break
                 try:
                     sub_response = self.session.get(subpage, timeout=self.timeout)
                     sub_soup = BeautifulSoup(sub_response.content, 'html.parser')
                     for script in sub_soup(["script", "style"]):
                         script.decompose()
                     subpage_text = sub_soup.get_text(separator=' ', strip=True).lower()
-                    subpage_texts.append(subpage_text)
-                    time.sleep(0.5)
+                    if site is not None:
+                        site.feed(subpage_text)
+                    self.last_pages.append((subpage, subpage_text))
+                    self.session.sleep(0.5, 'polite')
+                except DeadlineExceeded:
+                    break  # keep the pages already read; status says DEADLINE
                 except:
                     continue
             
-            full_text = text + ' ' + ' '.join(subpage_texts)
-            
-            return full_text, "Success"
+            status = self.session.crawl_status(url)
+            if self.cut_short:
+                status = f"{status} (stopped early: {self.cut_short})"
+            return self.last_pages, status
             
+        except DeadlineExceeded:
+            return None, DEADLINE
+        except DeadDomainError as e:
+            return None, f"Dead domain: {e.status}"
+        except SkippedContent as e:
+            return None, f"Skipped: {e.reason}"
         except requests.Timeout:
             return None, "Timeout"
         except requests.RequestException as e:
@@ -164,28 +208,19 @@ class StrictTherapyCrawler:
         except Exception as e:
             return None, f"Parse error: {str(e)[:100]}"
     
-    def check_animal_therapy_proximity(self, text):
-        """Check if animal words appear near therapy words"""
-        matches = []
-        
-        # Split text into chunks
-        words = text.split()
-        
-        for i, word in enumerate(words):
-            # Check if this word matches animal keyword
-            for animal_kw in ANIMAL_WORDS:
-                if re.search(animal_kw, word):
-                    # Look within next 50 words for therapy keyword
-                    context = ' '.join(words[max(0, i-25):min(len(words), i+25)])
-                    for therapy_kw in THERAPY_WORDS:
-                        if re.search(therapy_kw, context):
-                            matches.append(f"{animal_kw} + {therapy_kw}")
-                            break
-        
-        return matches
-    
+    def site_matcher(self):
+        """StreamMatcher over the keyword lists above, scored like analyze_content"""
+        return StreamMatcher(
+            {'animal': ANIMAL_THERAPY_KEYWORDS, 'non_animal': NON_ANIMAL_THERAPY,
+             'autism': AUTISM_KEYWORDS},
+            counters={'proximity': ProximityCounter(ANIMAL_WORDS, THERAPY_WORDS)},
+            weights=SCORE_WEIGHTS, bands=DECISION_BANDS, default=('REJECT', 'NONE'))
+
     def analyze_content(self, text, provider_name):
-        """Strict analysis requiring animal + therapy"""
+        """Strict analysis requiring animal + therapy
+
+        text is the site text, or the StreamMatcher crawl_website fed page by page.
+        """
         if not text:
             return {
                 'is_pet_therapy': False,
@@ -195,37 +230,33 @@ class StrictTherapyCrawler:
                 'evidence': []
             }
         
+        site = text if isinstance(text, StreamMatcher) else self.site_matcher().feed(text)
+        site.finish()
         evidence = []
         score = 0
         
         # CHECK 1: Explicit animal therapy keywords (HIGH CONFIDENCE)
-        animal_therapy_matches = []
-        for keyword in ANIMAL_THERAPY_KEYWORDS:
-            if re.search(keyword, text, re.IGNORECASE):
-                animal_therapy_matches.append(keyword)
-                score += 5
+        animal_therapy_matches = site.matched('animal')
+        score += len(animal_therapy_matches) * SCORE_WEIGHTS['animal']
         
         if animal_therapy_matches:
             evidence.extend([f"✓ {kw}" for kw in animal_therapy_matches[:3]])
         
         # CHECK 2: Animal + therapy proximity (MEDIUM CONFIDENCE)
-        proximity_matches = self.check_animal_therapy_proximity(text)
-        if proximity_matches:
-            score += len(proximity_matches) * 2
-            evidence.extend([f"~ {pm}" for pm in proximity_matches[:3]])
+        proximity_count = site.count('proximity')
+        if proximity_count:
+            score += proximity_count * SCORE_WEIGHTS['proximity']
+            evidence.extend([f"~ {pm}" for pm in site.labels('proximity')[:3]])
         
         # CHECK 3: Check for NON-animal therapy (NEGATIVE)
-        non_animal_matches = []
-        for keyword in NON_ANIMAL_THERAPY:
-            if re.search(keyword, text, re.IGNORECASE):
-                non_animal_matches.append(keyword)
-                score -= 3
+        non_animal_matches = site.matched('non_animal')
+        score += len(non_animal_matches) * SCORE_WEIGHTS['non_animal']
         
         if non_animal_matches:
             evidence.extend([f"✗ {kw}" for kw in non_animal_matches[:2]])
         
         # CHECK 4: Has autism context (adds context but not enough alone)
-        has_autism = any(re.search(kw, text, re.IGNORECASE) for kw in AUTISM_KEYWORDS)
+        has_autism = bool(site.matched('autism'))
         if has_autism:
             evidence.append("(autism-related)")
         
@@ -263,6 +294,12 @@ def process_providers(input_csv):
     """Re-check all 132 CONFIRMED providers"""
     
     crawler = StrictTherapyCrawler()
+    corpus = Corpus()
+    # Unchanged sites reuse last run's verdict; flips go to a review queue
+    fingerprints = FingerprintStore('strict', analyzer_version(
+        StrictTherapyCrawler.analyze_content, StrictTherapyCrawler.site_matcher,
+        ANIMAL_THERAPY_KEYWORDS, ANIMAL_WORDS, THERAPY_WORDS, AUTISM_KEYWORDS,
+        NON_ANIMAL_THERAPY, SCORE_WEIGHTS, DECISION_BANDS))
     
     # Load providers
     providers = []
@@ -284,6 +321,10 @@ def process_providers(input_csv):
     stats = defaultdict(int)
     
     for i, provider in enumerate(providers, 1):
+        if crawler.session.run_expired():
+            print(f"\n⏱️  Run budget spent - stopping with {len(providers) - i + 1} providers left")
+            break
+        
         name = provider.get('provider_name', 'Unknown')
         website = crawler.clean_url(provider.get('website', ''))
         
@@ -304,9 +345,13 @@ def process_providers(input_csv):
         
         print(f"  🌐 {website}")
         
-        text, status = crawler.crawl_website(website)
+        provider_id = provider.get('id') or name
+        # A site with a stored verdict is read whole and only scored if it changed;
+        # the others are scored as pages arrive and may stop early
+        site = None if fingerprints.reusable(provider_id) else crawler.site_matcher()
+        pages, status = crawler.crawl_website(website, site=site)
         
-        if not text:
+        if not pages:
             print(f"  ⚠️  Crawl failed: {status}")
             result = {
                 **provider,
@@ -318,7 +363,13 @@ def process_providers(input_csv):
             results['REJECT'].append(result)
             stats['crawl_failed'] += 1
         else:
-            analysis = crawler.analyze_content(text, name)
+            corpus.put_site(provider_id, pages, partial=crawler.cut_short)
+            analysis, reused = fingerprints.analyze(
+                provider_id, pages,
+                lambda: crawler.analyze_content(site or ' '.join(text for _, text in pages), name),
+                partial=bool(crawler.cut_short))
+            if reused:
+                print("  ♻️  Unchanged since last run - verdict reused")
             decision = analysis['decision']
             
             if decision == 'KEEP':
@@ -335,7 +386,7 @@ def process_providers(input_csv):
             
             result = {
                 **provider,
-                'crawl_status': 'Success',
+                'crawl_status': status,
                 'decision': decision,
                 'confidence': analysis['confidence'],
                 'reason': analysis['reason'],
@@ -346,13 +397,19 @@ def process_providers(input_csv):
             results[decision].append(result)
             stats[decision.lower()] += 1
         
-        time.sleep(1)
+        crawler.session.sleep(1, 'polite')
         
         if i % 25 == 0:
             save_results(results, stats)
             print(f"\n💾 Progress saved")
     
     save_results(results, stats)
+    print(f"\n♻️  Change detection: {fingerprints.summary()}")
+    if documents.shared_summary():
+        print(f"📄 Documents: {documents.shared_summary()}")
+    queue = fingerprints.review_queue()
+    if queue:
+        print(f"🔎 {len(queue)} provider(s) with material changes awaiting review (review_queue table)")
     print_final_summary(stats, len(providers))
 
 def save_results(results, stats):
@@ -5,12 +5,20 @@ Helps validate the 939 "NEEDS REVIEW" providers
 """
 
 import json
+import os
+import sys
 import requests
 from bs4 import BeautifulSoup
-import time
 import re
 from urllib.parse import urljoin, urlparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession, DeadDomainError, DeadlineExceeded, SkippedContent
+from crawlkit.deadline import DEADLINE
+
+# Shared session: skips domains the health store already knows are dead
+SESSION = CrawlSession(name='website_checker')
+
 # Therapy-related keywords to search for on websites
 THERAPY_KEYWORDS = [
     'animal assisted therapy', 'pet therapy', 'therapy animal',
@@ -32,14 +40,19 @@ NON_THERAPY_KEYWORDS = [
 ]
 
 def fetch_website_text(url, timeout=10):
-    """Fetch and extract text from a website"""
+    """Fetch and extract text from a website; returns (text, status), text None on failure
+
+    status is the session's crawl_status, so a truncated page or a skipped
+    download is reported as such rather than as a plain Success.
+    """
+    SESSION.new_site(url)
     try:
         # Add headers to appear like a browser
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response = SESSION.get(url, headers=headers, timeout=timeout, allow_redirects=True)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -52,10 +65,20 @@ def fetch_website_text(url, timeout=10):
         text = soup.get_text(separator=' ', strip=True)
         text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
         
-        return text.lower()
+        return text.lower(), SESSION.crawl_status(url)
     
+    except DeadlineExceeded:
+        return None, DEADLINE
+    except DeadDomainError as e:
+        return None, f"Dead domain: {e.status}"
+    except SkippedContent as e:
+        return None, f"Skipped: {e.reason}"
+    except requests.Timeout:
+        return None, "Timeout"
+    except requests.RequestException as e:
+        return None, f"Error: {str(e)[:100]}"
     except Exception as e:
-        return None
+        return None, f"Parse error: {str(e)[:100]}"
 
 def analyze_website_content(text):
     """Analyze website text for therapy-related content"""
@@ -139,21 +162,24 @@ def process_providers_batch(providers, max_to_check=939):
         print(f"    URL: {website}")
         
         # Fetch and analyze website
-        text = fetch_website_text(website)
+        text, status = fetch_website_text(website)
         analysis = analyze_website_content(text)
         
         print(f"    Result: {'THERAPY' if analysis['is_therapy'] else 'NOT THERAPY' if analysis['is_therapy'] == False else 'UNCLEAR'} (Confidence: {analysis['confidence']})")
+        if status != 'Success':
+            print(f"    ⚠️  Crawl: {status}")
         if analysis['matched_therapy_keywords']:
             print(f"    Therapy keywords found: {', '.join(analysis['matched_therapy_keywords'][:3])}")
         
         results.append({
             **provider,
             'website_checked': True,
+            'crawl_status': status,
             'website_analysis': analysis
         })
         
         # Polite delay
-        time.sleep(1)
+        SESSION.sleep(1, 'polite')
     
     # Add unchecked providers to results
     for provider in providers[len(results):]:
@@ -215,6 +241,9 @@ def main():
     print(f"Confirmed NOT therapy:        {len(not_therapy):>4}")
     print(f"Still unclear:                {len(unclear):>4}")
     print(f"Not checked (no website):     {len(not_checked):>4}")
+    incomplete = [r for r in results if r.get('website_checked') and r.get('crawl_status') != 'Success']
+    if incomplete:
+        print(f"  of the checked, crawl not clean (truncated, skipped, deadline or failed): {len(incomplete)}")
     print(f"Total:                        {len(results):>4}")
     
     # Save results
@@ -225,7 +254,7 @@ def main():
     
     # Create separate files for each category
     with open('pet_therapy_CONFIRMED_BY_WEBSITE.json', 'w') as f:
-        clean = [{k: v for k, v in p.items() if k not in ['website_checked', 'website_analysis', 'analysis_score', 'confidence', 'decision', 'category', 'subcategory', 'reasons']} 
+        clean = [{k: v for k, v in p.items() if k not in ['website_checked', 'crawl_status', 'website_analysis', 'analysis_score', 'confidence', 'decision', 'category', 'subcategory', 'reasons']} 
                  for p in therapy_confirmed]
         json.dump(clean, f, indent=2)
     
@@ -5,19 +5,35 @@ Distinguishes Applied Behavior Analysis (ABA) from general Behavioral Therapy.
 """
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
+import os
 import re
-import time
+import sys
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Python_scripts'))
+from crawlkit import CrawlSession
+from crawlkit.corpus import Corpus
+from crawlkit.deadline import DEADLINE
+from crawlkit.planner import CrawlPlanner
+from crawlkit.rules import RuleEngine
+
+# Wall-clock cap per provider across all page_paths, seconds. Set
+# ASD_CRAWL_RUN_MINUTES to also cap the whole run.
+SITE_DEADLINE = 45
+
 
 class ABAVerificationCrawler:
-    def __init__(self, input_csv):
+    def __init__(self, input_csv=None, audit_pages=0):
         self.input_csv = input_csv
-        self.df = pd.read_csv(input_csv)
+        self.df = pd.read_csv(input_csv) if input_csv else None
         self.results = []
+        self.corpus = Corpus()
+        self.last_pages = []  # [(url, text)] of the last crawl, for the corpus
+        # Every rule pack (ABA, pediatric therapy, autism, animal-assisted,
+        # insurance) is evaluated on the pages this crawl already fetches
+        self.rules = RuleEngine.load()
         
         # --- Updated search term logic ---
         self.aba_terms = [
@@ -66,8 +82,15 @@ class ABAVerificationCrawler:
             '', '/about', '/about-us', '/aboutus', '/services',
             '/our-services', '/what-we-do', '/programs', '/therapy', '/treatments'
         ]
+        # Homepage first, then the paths that most often showed ABA terms;
+        # stop once ABA is found (KEEP_AS_ABA cannot change after that).
+        # audit_pages > 0 fetches that many more for the other verdicts; the
+        # packs a skipped page could still have changed are listed in
+        # verdicts_partial.
+        self.planner = CrawlPlanner('aba_verification')
+        self.audit_pages = audit_pages
         
-        self.session = requests.Session()
+        self.session = CrawlSession(site_seconds=SITE_DEADLINE, name='aba_verification')
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -115,8 +138,8 @@ class ABAVerificationCrawler:
         return ' '.join(chunk for chunk in chunks if chunk)
     
     # ---------------------- Core Crawl Logic ----------------------
-    def crawl_website(self, website):
-        result = {
+    def new_result(self, website):
+        return {
             'website': website,
             'has_valid_website': False,
             'pages_crawled': 0,
@@ -134,9 +157,15 @@ class ABAVerificationCrawler:
             'pediatric_pt_found': False,
             'therapy_pages': [],
             'therapy_matches': {},
+            'pages_skipped': 0,
+            'verdicts': {},
+            'verdicts_partial': [],
             'recommendation': 'UNKNOWN',
             'notes': ''
         }
+
+    def crawl_website(self, website):
+        result = self.new_result(website)
         
         if not self.is_valid_website(website):
             result['notes'] = 'No valid website or FL-DD database link'
@@ -149,55 +178,84 @@ class ABAVerificationCrawler:
         parsed = urlparse(website)
         base_url = f"{parsed.scheme}://{parsed.netloc}"
         
-        for path in self.page_paths:
+        self.session.new_site(base_url)
+        self.last_pages = []
+        site_rules = self.rules.new_site()
+        dead = None
+        attempted = 0
+        for path in self.planner.plan(self.page_paths, lambda: result['aba_found'],
+                                      extra=self.audit_pages):
+            # Stop guessing paths once the host is known dead (possibly by
+            # this very loop): every further path would cost a full timeout
+            dead = self.session.health.check(base_url)
+            if dead or self.session.out_of_time(base_url):
+                break
+            attempted += 1
             url = urljoin(base_url, path)
             html = self.fetch_page(url)
             if not html:
+                self.planner.record(path, False)
                 continue
 
-            result['pages_crawled'] += 1
             text = self.extract_text_from_html(html)
+            self.last_pages.append((url, text))
+            aba_before = result['aba_found']
+            self.analyze_page(result, path if path else 'home', text)
+            site_rules.add_page(path if path else 'home', text)
+            self.planner.record(path, result['aba_found'] and not aba_before)
+
+            self.session.sleep(0.5, 'polite')
+        result['pages_skipped'] = len(self.page_paths) - attempted
+
+        result['crawl_status'] = self.session.crawl_status(base_url)
+        result['verdicts'] = site_rules.verdicts()
+        if result['pages_skipped']:
+            result['verdicts_partial'] = site_rules.unsettled()
+        self.recommend(result, dead)
+        return result
 
-            # Strict ABA check
-            aba_found, aba_matches = self.search_text(text, self.aba_terms)
-            if aba_found:
-                result['aba_found'] = True
-                result['aba_pages'].append(path if path else 'home')
-                result['aba_matches'].extend(aba_matches)
+    def analyze_page(self, result, page_key, text):
+        """Fold one page's text into result. Also used by rescore.py."""
+        result['pages_crawled'] += 1
 
-            # Broader behavioral analysis check
-            behavior_found, behavior_matches = self.search_text(text, self.behavior_analysis_terms)
-            if behavior_found and not result['aba_found']:
-                result['behavior_analysis_found'] = True
-                result['behavior_analysis_pages'].append(path if path else 'home')
-                result['behavior_analysis_matches'].extend(behavior_matches)
+        # Strict ABA check
+        aba_found, aba_matches = self.search_text(text, self.aba_terms)
+        if aba_found:
+            result['aba_found'] = True
+            result['aba_pages'].append(page_key)
+            result['aba_matches'].extend(aba_matches)
 
-            autism_found, autism_matches = self.search_text(text, self.autism_terms)
-            if autism_found:
-                result['autism_found'] = True
-                result['autism_pages'].append(path if path else 'home')
-                result['autism_matches'].extend(autism_matches)
+        # Broader behavioral analysis check
+        behavior_found, behavior_matches = self.search_text(text, self.behavior_analysis_terms)
+        if behavior_found and not result['aba_found']:
+            result['behavior_analysis_found'] = True
+            result['behavior_analysis_pages'].append(page_key)
+            result['behavior_analysis_matches'].extend(behavior_matches)
 
-            pediatric_found, _ = self.search_text(text, self.pediatric_indicators)
-            if pediatric_found:
-                for therapy_type, patterns in self.pediatric_therapy_terms.items():
-                    therapy_found, matches = self.search_text(text, patterns)
-                    if therapy_found:
-                        page_key = path if path else 'home'
-                        if therapy_type == 'speech':
-                            result['pediatric_speech_found'] = True
-                        elif therapy_type == 'ot':
-                            result['pediatric_ot_found'] = True
-                        elif therapy_type == 'pt':
-                            result['pediatric_pt_found'] = True
-                        if page_key not in result['therapy_pages']:
-                            result['therapy_pages'].append(page_key)
-                        if therapy_type not in result['therapy_matches']:
-                            result['therapy_matches'][therapy_type] = []
-                        result['therapy_matches'][therapy_type].extend(matches)
+        autism_found, autism_matches = self.search_text(text, self.autism_terms)
+        if autism_found:
+            result['autism_found'] = True
+            result['autism_pages'].append(page_key)
+            result['autism_matches'].extend(autism_matches)
 
-            time.sleep(0.5)
+        pediatric_found, _ = self.search_text(text, self.pediatric_indicators)
+        if pediatric_found:
+            for therapy_type, patterns in self.pediatric_therapy_terms.items():
+                therapy_found, matches = self.search_text(text, patterns)
+                if therapy_found:
+                    if therapy_type == 'speech':
+                        result['pediatric_speech_found'] = True
+                    elif therapy_type == 'ot':
+                        result['pediatric_ot_found'] = True
+                    elif therapy_type == 'pt':
+                        result['pediatric_pt_found'] = True
+                    if page_key not in result['therapy_pages']:
+                        result['therapy_pages'].append(page_key)
+                    if therapy_type not in result['therapy_matches']:
+                        result['therapy_matches'][therapy_type] = []
+                    result['therapy_matches'][therapy_type].extend(matches)
 
+    def recommend(self, result, dead=None):
         # --- Updated recommendation logic ---
         if result['aba_found']:
             result['recommendation'] = 'KEEP_AS_ABA'
@@ -217,7 +275,12 @@ class ABAVerificationCrawler:
             result['notes'] = f"Pediatric therapy found: {', '.join(therapies)}"
         elif result['pages_crawled'] == 0:
             result['recommendation'] = 'FLAG_WEBSITE_DOWN'
-            result['notes'] = 'Website could not be crawled (down or blocked)'
+            if dead:
+                result['notes'] = f"Website dead ({dead['status']}): {dead['reason']}"
+            elif str(result.get('crawl_status', '')).startswith(DEADLINE):
+                result['notes'] = f"No page loaded within the {SITE_DEADLINE}s site deadline"
+            else:
+                result['notes'] = 'Website could not be crawled (down or blocked)'
         else:
             result['recommendation'] = 'FLAG_FOR_REMOVAL'
             result['notes'] = f"Crawled {result['pages_crawled']} pages — no ABA, autism, or therapy found"
@@ -233,6 +296,9 @@ class ABAVerificationCrawler:
         print(f"Processing {len(aba_providers)} ABA-labeled providers...\n")
         
         for idx, row in aba_providers.iterrows():
+            if self.session.run_expired():
+                print(f"⏱️  Run budget spent - stopping after {len(self.results)} providers\n")
+                break
             provider_name = row['provider_name']
             website = row['website']
             
@@ -240,6 +306,10 @@ class ABAVerificationCrawler:
             print(f"Website: {website}")
             
             result = self.crawl_website(website)
+            if self.last_pages:
+                skipped = result['pages_skipped']
+                self.corpus.put_site(row['id'], self.last_pages, partial=skipped and
+                                     f"{skipped} of {len(self.page_paths)} path(s) not fetched")
             result['provider_id'] = row['id']
             result['provider_name'] = provider_name
             result['phone'] = row.get('phone', '')
@@ -262,6 +332,7 @@ class ABAVerificationCrawler:
         
         output_data = []
         for result in self.results:
+            verdicts = result.get('verdicts', {})
             output_data.append({
                 'provider_id': result['provider_id'],
                 'provider_name': result['provider_name'],
@@ -271,6 +342,8 @@ class ABAVerificationCrawler:
                 'website': result['website'],
                 'has_valid_website': result['has_valid_website'],
                 'pages_crawled': result['pages_crawled'],
+                'pages_skipped': result.get('pages_skipped', 0),
+                'crawl_status': result.get('crawl_status', ''),
                 'aba_found': result['aba_found'],
                 'aba_pages': '|'.join(result['aba_pages']),
                 'behavior_analysis_found': result.get('behavior_analysis_found', False),
@@ -282,7 +355,10 @@ class ABAVerificationCrawler:
                 'pediatric_pt_found': result['pediatric_pt_found'],
                 'therapy_pages': '|'.join(result['therapy_pages']),
                 'recommendation': result['recommendation'],
-                'notes': result['notes']
+                'notes': result['notes'],
+                **{f'verdict_{name}': verdicts[name]['verdict'] if name in verdicts else ''
+                   for name in self.rules.names},
+                'verdicts_partial': '|'.join(result.get('verdicts_partial', [])),
             })
         
         df_output = pd.DataFrame(output_data)
@@ -315,14 +391,24 @@ class ABAVerificationCrawler:
         print(f"⚠ Flag for removal: {flag_removal} ({flag_removal/total*100:.1f}%)")
         print(f"⚠ Flag for review (no website): {flag_review} ({flag_review/total*100:.1f}%)")
         print(f"⚠ Website down/blocked: {flag_down} ({flag_down/total*100:.1f}%)")
+        skipped = sum(r.get('pages_skipped', 0) for r in self.results if r['has_valid_website'])
+        possible = len(self.page_paths) * sum(1 for r in self.results if r['has_valid_website'])
+        if possible:
+            print(f"⏭ Pages skipped by the planner: {skipped}/{possible} ({skipped/possible*100:.1f}%)")
+        partial = sum(1 for r in self.results if r.get('verdicts_partial'))
+        if partial:
+            print(f"◐ Providers with rule-pack verdicts cut short by skipped pages: {partial} "
+                  f"(see verdicts_partial)")
         print("="*60)
 
 
 def main():
     input_file = 'Supabase_Providers_table_10-23-2025_0550_DL.csv'
+    # --audit N: after ABA is settled, still fetch up to N more pages per site
+    audit_pages = int(sys.argv[sys.argv.index('--audit') + 1]) if '--audit' in sys.argv else 0
     print("ABA Provider Verification Crawler (Updated)")
     print("="*60)
-    crawler = ABAVerificationCrawler(input_file)
+    crawler = ABAVerificationCrawler(input_file, audit_pages=audit_pages)
     print("\nStarting full crawl of ABA-labeled providers...")
     print("Progress saved every 50 providers.\n")
     crawler.process_providers(limit=None)